@@ -0,0 +1,146 @@
+# app/api/companies.py
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core import cache
+from app.db.models import Company, Person
+from app.db.session import SessionLocal
+
+router = APIRouter(prefix="/companies")
+
+
+class PersonDetailsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    headline:             str | None = None
+    photo_url:            str | None = None
+    linkedin_url_full:    str | None = None
+    twitter_url:          str | None = None
+    email_status:         str | None = None
+    departments:          list | None = None
+    subdepartments:       list | None = None
+    functions:            list | None = None
+    webhook_phone_number: str | None = None
+
+
+class PersonOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id:                        int
+    apollo_person_id:          str | None = None
+    first_name:                str | None = None
+    last_name:                 str | None = None
+    title:                     str | None = None
+    seniority:                 str | None = None
+    email:                     str | None = None
+    phone:                     str | None = None
+    personal_email:            str | None = None
+    personal_phone:            str | None = None
+    phone_verification_status: str | None = None
+    linkedin_url:              str | None = None
+    location_city:             str | None = None
+    location_country:          str | None = None
+    is_enriched:               bool | None = None
+    enriched_at:               datetime | None = None
+    details:                   PersonDetailsOut | None = None
+
+
+class OrganizationDetailsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    website_url:       str | None = None
+    linkedin_url:      str | None = None
+    phone:             str | None = None
+    logo_url:          str | None = None
+    founded_year:      int | None = None
+    short_description: str | None = None
+    keywords:          list | None = None
+    industries:        list | None = None
+    technology_names:  list | None = None
+    city:              str | None = None
+    state:             str | None = None
+    country:           str | None = None
+
+
+class CompanyOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id:               int
+    name:             str
+    apollo_org_id:    str | None = None
+    domain_entered:   str | None = None
+    domain_resolved:  str | None = None
+    industry:         str | None = None
+    employee_count:   int | None = None
+    revenue:          int | None = None
+    location_city:    str | None = None
+    location_country: str | None = None
+    is_enriched:      bool | None = None
+    enriched_at:      datetime | None = None
+    updated_at:       datetime | None = None
+    details:          OrganizationDetailsOut | None = None
+    people:           list[PersonOut] = []
+
+
+def _load(db, *where) -> Company | None:
+    # 2 queries however many people: company ⟕ org details, then people ⟕ details
+    return db.scalars(
+        select(Company)
+        .where(*where)
+        .options(
+            joinedload(Company.details),
+            selectinload(Company.people).joinedload(Person.details),
+        )
+        .order_by(Company.enriched_at.desc())
+        .limit(1)
+    ).unique().first()
+
+
+def _serialise(comp: Company) -> str:
+    out = CompanyOut.model_validate(comp)
+    # company_people may hold the same link twice
+    seen: set[int] = set()
+    out.people = [p for p in out.people if not (p.id in seen or seen.add(p.id))]
+    return out.model_dump_json()
+
+
+def _json(payload: str | bytes) -> Response:
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/by-domain/{domain}", response_model=CompanyOut)
+def get_company_by_domain(domain: str):
+    company_id = cache.company_id_for_domain(domain)
+    if company_id is not None:
+        cached = cache.get_company(company_id)
+        if cached is not None:
+            return _json(cached)
+
+    # cache fills read the primary: a lagging replica could store pre-write
+    # data right after a writer's invalidation, for the whole cache TTL
+    with SessionLocal(primary=True) as db:
+        comp = _load(db, or_(Company.domain_resolved == domain, Company.domain_entered == domain))
+        if comp is None:
+            raise HTTPException(404, f"No company with domain '{domain}'")
+        payload = _serialise(comp)
+    cache.put_company(comp.id, payload, domain=domain)
+    return _json(payload)
+
+
+@router.get("/{company_id}", response_model=CompanyOut)
+def get_company(company_id: int):
+    cached = cache.get_company(company_id)
+    if cached is not None:
+        return _json(cached)
+
+    with SessionLocal(primary=True) as db:                  # cache fill, see above
+        comp = _load(db, Company.id == company_id)
+        if comp is None:
+            raise HTTPException(404, f"Company {company_id} not found")
+        payload = _serialise(comp)
+    cache.put_company(company_id, payload)
+    return _json(payload)
@@ -2,10 +2,13 @@
 import uuid
 import logging
 
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from app.tasks import enrich_company
+# only the Celery app object – the API never imports the worker stack
+from app.core.celery_app import ENRICH_TASK
+from app.core.admission import admit, enqueue as enqueue_task
+from app.core.profiling import authorized
 
 log = logging.getLogger("api")
 router = APIRouter()
@@ -13,18 +16,34 @@ router = APIRouter()
 class EnrichPayload(BaseModel):
     company_name: str
     domain_entered: str | None = None
+    debug: bool = False         # DEBUG logs for this one task
+    profile: bool = False       # sample-profile this one task; needs X-Profile (app/core/profiling.py)
 
 class TaskAck(BaseModel):
     task_id: str
 
+
+def _caller(request: Request) -> str:
+    # the peer address, never a client-supplied header: a caller could mint a
+    # new identity per request. Behind a proxy, run uvicorn with
+    # --proxy-headers --forwarded-allow-ips=<proxy> so this is the real client.
+    return request.client.host if request.client else "unknown"
+
+
 @router.post("/enrich", response_model=TaskAck, status_code=202)
-async def enqueue(payload: EnrichPayload, bg: BackgroundTasks):
+async def enqueue(payload: EnrichPayload, request: Request):
+    caller = _caller(request)
+    decision = await admit(caller)
+    if not decision.allowed:
+        log.warning("REJECTED %s – %s (%s)", caller, payload.company_name, decision.reason)
+        raise HTTPException(429, decision.reason, headers={"Retry-After": str(decision.retry_after)})
+
     task_id = str(uuid.uuid4())
-    bg.add_task(
-        enrich_company.delay,
-        task_id,
-        payload.company_name,
-        payload.domain_entered
+    flags = {"debug": payload.debug,
+             "profile": payload.profile and authorized(request.headers.get("X-Profile"))}
+    await enqueue_task(
+        ENRICH_TASK, task_id, (task_id, payload.company_name, payload.domain_entered),
+        {k: True for k, on in flags.items() if on} or None,
     )
     log.info("QUEUED %s – %s", task_id, payload.company_name)
     return TaskAck(task_id=task_id)
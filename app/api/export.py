@@ -0,0 +1,40 @@
+# app/api/export.py
+import hmac
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.core.settings import get_settings
+from app.export import MEDIA_TYPES, parquet_available, stream_export
+
+router = APIRouter()
+
+
+def _authorized(authorization: str | None = Header(None)) -> None:
+    """Emails and phones: only for holders of EXPORT_TOKEN."""
+    token = get_settings().export_token
+    if not token:
+        raise HTTPException(404, "Not Found")          # CLI-only deployment
+    scheme, _, given = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(given.encode(), token.encode()):
+        raise HTTPException(401, "Invalid export token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get("/export/enriched", dependencies=[Depends(_authorized)])
+def export_enriched(
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+):
+    """Stream companies joined with their people; see app/export.py."""
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(501, "Parquet export needs pyarrow installed on the API host")
+
+    filename = f"enriched.{format}"
+    return StreamingResponse(
+        stream_export(format, updated_from, updated_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,59 @@
+# app/api/history.py
+from datetime import datetime
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from app.db.session import SessionLocal
+from app.history import payload_at, versions
+
+router = APIRouter(prefix="/history")
+
+Kind = Literal["person", "person_contact", "org"]
+
+
+class VersionOut(BaseModel):
+    version:     int
+    created_at:  datetime
+    is_keyframe: bool
+    operations:  int | None = None      # patch length; None for keyframes
+
+
+class PayloadOut(BaseModel):
+    kind:       str
+    entity_id:  int
+    version:    int
+    created_at: datetime
+    payload:    Any
+
+
+@router.get("/{kind}/{entity_id}/versions", response_model=list[VersionOut])
+def list_versions(kind: Kind, entity_id: int):
+    """All recorded versions of a payload (person / org id), oldest first."""
+    with SessionLocal() as db:
+        rows = versions(db, kind, entity_id)
+    return [
+        VersionOut(
+            version=r.version, created_at=r.created_at, is_keyframe=r.is_keyframe,
+            operations=None if r.is_keyframe else len(r.doc or []),
+        )
+        for r in rows
+    ]
+
+
+@router.get("/{kind}/{entity_id}", response_model=PayloadOut)
+def get_payload(
+    kind: Kind,
+    entity_id: int,
+    at: datetime | None = Query(None, description="point in time (UTC); default: latest"),
+    version: int | None = Query(None, ge=1),
+):
+    """The payload as it was at `at` (or at `version`), rebuilt from patches."""
+    with SessionLocal() as db:
+        found = payload_at(db, kind, entity_id, at=at, version=version)
+    if found is None:
+        raise HTTPException(404, f"No {kind} history for {entity_id} at that point")
+    row, payload = found
+    return PayloadOut(kind=kind, entity_id=entity_id, version=row.version,
+                      created_at=row.created_at, payload=payload)
@@ -0,0 +1,197 @@
+# app/api/segments.py
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import Select, exists, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.settings import get_settings
+from app.db.models import (
+    Company, CompanyPeople, CompanyTerm, OrganizationDetails, Person, PersonDetails,
+)
+from app.db.session import SessionLocal
+from app.terms import SOURCES, iter_terms, match_companies, parse_term, term_ids
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/segments")
+
+
+class SegmentCompanyOut(BaseModel):
+    id:               int
+    name:             str
+    domain_resolved:  str | None = None
+    industry:         str | None = None
+    employee_count:   int | None = None
+    revenue:          int | None = None
+    location_city:    str | None = None
+    location_country: str | None = None
+
+
+class SegmentPageOut(BaseModel):
+    companies:  list[SegmentCompanyOut]
+    next_after: int | None = None       # pass back as `after` for the next page
+
+
+_COMPANY_COLUMNS = (
+    Company.id, Company.name, Company.domain_resolved, Company.industry,
+    Company.employee_count, Company.revenue, Company.location_city, Company.location_country,
+)
+MYSQL_QUERY_TIMEOUT = 3024      # ER_QUERY_TIMEOUT: MAX_EXECUTION_TIME exceeded
+
+
+def _with_budget(stmt: Select) -> Select:
+    """Cap the statement's run time on MySQL; a timeout surfaces as 504."""
+    ms = get_settings().segment_query_timeout_ms
+    return stmt.prefix_with(f"/*+ MAX_EXECUTION_TIME({int(ms)}) */", dialect="mysql")
+
+
+def _timed_out(exc: OperationalError) -> bool:
+    return bool(getattr(exc.orig, "args", None)) and exc.orig.args[0] == MYSQL_QUERY_TIMEOUT
+
+
+def _parse(specs: list[str]) -> list[tuple[str, str]]:
+    try:
+        return [parse_term(s) for s in specs]
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+
+
+@router.get("/terms", response_model=SegmentPageOut)
+def companies_by_terms(
+    all: list[str] = Query([], description="every one of these, e.g. technology:salesforce"),
+    any: list[str] = Query([], description="at least one of these"),
+    after: int | None = Query(None, description="last company id of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Companies by technology / keyword / industry (AND over `all`, OR over `any`)."""
+    all_of, any_of = _parse(all), _parse(any)
+    if not (all_of or any_of):
+        raise HTTPException(422, "give at least one `all` or `any` term")
+
+    with SessionLocal() as db:
+        ids = match_companies(db, all_of, any_of, after_id=after, limit=limit)
+        rows = db.execute(
+            select(*_COMPANY_COLUMNS)
+            .where(Company.id.in_(ids))
+            .order_by(Company.id)
+        ).all() if ids else []
+
+    return SegmentPageOut(
+        companies=[SegmentCompanyOut(**row._mapping) for row in rows],
+        next_after=ids[-1] if len(ids) == limit else None,
+    )
+
+
+@router.get("/terms/{kind}", response_model=list[str])
+def list_terms(kind: str, prefix: str = "", limit: int = Query(50, ge=1, le=500)):
+    """Known values of one term kind (for building queries)."""
+    if kind not in SOURCES:
+        raise HTTPException(404, f"Unknown term kind '{kind}'")
+    with SessionLocal() as db:
+        return list(iter_terms(db, kind, prefix, limit))
+
+
+@router.get("/companies", response_model=SegmentPageOut)
+def companies_segment(
+    industry: list[str] = Query([]),
+    country: list[str] = Query([], description="companies.location_country"),
+    city: str | None = None,
+    state: str | None = Query(None, description="organization_details.state"),
+    employees_min: int | None = Query(None, ge=0),
+    employees_max: int | None = Query(None, ge=0),
+    revenue_min: int | None = Query(None, ge=0),
+    revenue_max: int | None = Query(None, ge=0),
+    founded_min: int | None = None,
+    founded_max: int | None = None,
+    term: list[str] = Query([], description="every one of these, e.g. technology:salesforce"),
+    has_verified_phone: bool | None = Query(None, description="some person has a verified personal phone"),
+    seniority: list[str] = Query([], description="some person has one of these seniorities"),
+    email_status: list[str] = Query([], description="some person has one of these email statuses"),
+    after: int | None = Query(None, description="last company id of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Filter companies by firmographics and by the people we hold for them.
+
+    Seek-paginated on company id (pass `next_after` back as `after`), so
+    every page costs the same; each query runs under a time budget.
+    """
+    terms = _parse(term)
+    stmt = select(*_COMPANY_COLUMNS)
+
+    # -- company columns (ix_companies_segment) --
+    if industry:
+        stmt = stmt.where(Company.industry.in_(industry))
+    if country:
+        stmt = stmt.where(Company.location_country.in_(country))
+    if city:
+        stmt = stmt.where(Company.location_city == city)
+    if employees_min is not None:
+        stmt = stmt.where(Company.employee_count >= employees_min)
+    if employees_max is not None:
+        stmt = stmt.where(Company.employee_count <= employees_max)
+    if revenue_min is not None:
+        stmt = stmt.where(Company.revenue >= revenue_min)
+    if revenue_max is not None:
+        stmt = stmt.where(Company.revenue <= revenue_max)
+
+    # -- organization_details --
+    if state is not None or founded_min is not None or founded_max is not None:
+        stmt = stmt.join(OrganizationDetails, OrganizationDetails.company_id == Company.id)
+        if state is not None:
+            stmt = stmt.where(OrganizationDetails.state == state)
+        if founded_min is not None:
+            stmt = stmt.where(OrganizationDetails.founded_year >= founded_min)
+        if founded_max is not None:
+            stmt = stmt.where(OrganizationDetails.founded_year <= founded_max)
+
+    # -- people: one person has to satisfy all person filters --
+    def people():
+        return (
+            select(CompanyPeople.person_id)
+            .join(Person, Person.id == CompanyPeople.person_id)
+            .where(CompanyPeople.company_id == Company.id)
+        )
+
+    if has_verified_phone or seniority or email_status:
+        person = people()
+        if has_verified_phone:
+            person = person.where(Person.has_verified_phone.is_(True))
+        if seniority:
+            person = person.where(Person.seniority.in_(seniority))
+        if email_status:
+            person = (
+                person.join(PersonDetails, PersonDetails.person_id == Person.id)
+                .where(PersonDetails.email_status.in_(email_status))
+            )
+        stmt = stmt.where(exists(person))
+    if has_verified_phone is False:
+        stmt = stmt.where(~exists(people().where(Person.has_verified_phone.is_(True))))
+
+    if after is not None:
+        stmt = stmt.where(Company.id > after)
+
+    with SessionLocal() as db:
+        if terms:
+            ids = term_ids(db, terms)
+            if len(ids) < len(terms):
+                return SegmentPageOut(companies=[])
+            stmt = stmt.where(Company.id.in_(
+                select(CompanyTerm.company_id)
+                .where(CompanyTerm.term_id.in_(ids.values()))
+                .group_by(CompanyTerm.company_id)
+                .having(func.count() == len(ids))
+            ))
+        try:
+            rows = db.execute(_with_budget(stmt.order_by(Company.id).limit(limit))).all()
+        except OperationalError as exc:
+            if _timed_out(exc):
+                log.warning("Segment query exceeded its time budget")
+                raise HTTPException(504, "Query exceeded its time budget; narrow the filters")
+            raise
+
+    return SegmentPageOut(
+        companies=[SegmentCompanyOut(**row._mapping) for row in rows],
+        next_after=rows[-1].id if len(rows) == limit else None,
+    )
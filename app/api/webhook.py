@@ -1,21 +1,61 @@
 
 # app/api/webhooks.py
 from fastapi import APIRouter, Request, HTTPException, status
-from sqlalchemy import select
+from fastapi.responses import JSONResponse
 from app.db.session import SessionLocal
-from app.db.models import Person, PersonDetails
+from app.db.models import Person
+from app.phone_updates import InvalidPayload, apply_phone_update, park, parse_phone_payload
 from app.core.settings import get_settings
-from typing import Any
-import logging
+from app.core import cache
+from app.identity import find_person
+from app.zoho import phone_push
+from app.core.redis import get_async_redis
+import hashlib, json, logging
+import redis
 log = logging.getLogger(__name__)
-from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 
 router = APIRouter(prefix="/webhook")
 
+# ── duplicate suppression ─────────────────────────────────────────────────
+# Apollo retries deliveries; an exact duplicate body is answered from Redis
+# with the ACK we sent the first time, without touching the DB.
+_PENDING = b"pending"
+
+
+def _dedupe_key(body: bytes) -> str:
+    return "webhook:apollo_phone:" + hashlib.sha256(body).hexdigest()
+
+
+async def _claim(key: str, ttl: int) -> bytes | None:
+    """None → we own this payload; otherwise the stored ACK (or _PENDING)."""
+    try:
+        r = get_async_redis()
+        if await r.set(key, _PENDING, nx=True, ex=ttl):
+            return None
+        return await r.get(key) or _PENDING
+    except redis.RedisError as exc:
+        log.warning("Webhook dedupe unavailable, processing anyway: %s", exc)
+        return None
+
+
+async def _remember(key: str, ack: dict, ttl: int) -> None:
+    try:
+        await get_async_redis().set(key, json.dumps(ack), ex=ttl)
+    except redis.RedisError:
+        pass
+
+
+async def _release(key: str) -> None:
+    """Processing failed – let Apollo's next retry through."""
+    try:
+        await get_async_redis().delete(key)
+    except redis.RedisError:
+        pass
+
 @router.post("/apollo_phone")
 async def apollo_phone(request: Request):
-    print("Apollo phone webhook received", request, request.headers)
+    log.debug("Apollo phone webhook received from %s", request.client)
     settings = get_settings()
 
     # secret = (
@@ -25,66 +65,69 @@ async def apollo_phone(request: Request):
     # if secret != settings.apollo_webhook_secret:
     #     raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid secret")
 
-    # ── 1. parse JSON body ─────────────────────────────────────────────────
-    payload = await request.json()
+    # ── 0. exact duplicate? ────────────────────────────────────────────────
+    body = await request.body()
+    dedupe_key = _dedupe_key(body)
+    seen = await _claim(dedupe_key, settings.webhook_dedupe_ttl)
+    if seen == _PENDING:
+        # the first delivery is still being processed right now
+        return {"status": "duplicate", "detail": "already processing"}
+    if seen is not None:
+        return _respond(json.loads(seen))
 
-    print("Incoming Apollo phone payload: %r", payload)
+    try:
+        ack = await _process(request, settings)
+    except BaseException:
+        await _release(dedupe_key)
+        raise
+    await _remember(dedupe_key, ack, settings.webhook_dedupe_ttl)
+    return _respond(ack)
 
-    # keep a copy for storage
-    full_blob = payload
 
-    # Apollo always returns an *array* of people; we only ever request one
-    first_person: dict[str, Any] = (payload.get("people") or [{}])[0]
+def _respond(ack: dict):
+    if ack["status"] == "pending":
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=ack)
+    return ack
 
-    person_id: str | None = first_person.get("id")
-    if not person_id:
-        raise HTTPException(400, "No person id in payload")
 
-    # prefer first sanitized_number, fall back to raw if sanitised missing
-    phones: list[dict[str, Any]] = first_person.get("phone_numbers") or []
-    sanitized_number: str | None = (
-        phones[0].get("sanitized_number") if phones else None
-    ) or (phones[0].get("raw_number") if phones else None)
+async def _process(request: Request, settings) -> dict:
+    # ── 1. parse JSON body ─────────────────────────────────────────────────
+    payload = await request.json()
 
-    if not sanitized_number:
-        raise HTTPException(400, "No phone number found")
+    log.debug("Incoming Apollo phone payload: %r", payload, extra={"event": "webhook.payload"})
 
-    phone_status: str = first_person.get("status", "verified")
+    try:
+        upd = parse_phone_payload(payload)
+    except InvalidPayload as exc:
+        raise HTTPException(400, str(exc))
 
     # ── 2. save to DB ──────────────────────────────────────────────────────
     try:
         with SessionLocal() as db, db.begin():
-            # 2-a. Person (must exist – inserted during import phase)
-            person: Person | None = db.scalars(
-                select(Person).where(Person.apollo_person_id == person_id)
-            ).first()
+            # 2-a. Person (inserted during import phase – maybe not committed yet)
+            # (or under an older Apollo id the person was merged into)
+            person: Person | None = find_person(db, upd.apollo_person_id)
 
             if person is None:
-                raise HTTPException(404, f"Person '{person_id}' not found")
-
-            person.personal_phone            = sanitized_number
-            person.phone_verification_status = phone_status
-            person.phones_raw_json           = phones
-            person.updated_at                = datetime.utcnow()
-
-            # 2-b. PersonDetails (create if missing – race-safe)
-            details: PersonDetails | None = db.scalars(
-                select(PersonDetails).where(PersonDetails.person_id == person.id)
-            ).first()
+                # enrich_company applies it once the person row commits
+                await park(upd)
+                return {"status": "pending", "person_id": upd.apollo_person_id}
 
-            if details is None:
-                details = PersonDetails(person_id=person.id)
-                db.add(details)
+            if not apply_phone_update(db, person, upd):
+                # same number / status as stored – nothing to rewrite
+                return {
+                    "status": "unchanged",
+                    "person_id": upd.apollo_person_id,
+                    "personal_phone": upd.number,
+                }
 
-            # store the *same* info in details for analytics / BI users
-            details.webhook_phone_number  = sanitized_number
-            details.webhook_respomse_json       = full_blob
-            details.updated_at     = datetime.utcnow()
-
-            # optional: also keep status if you want it per-number / per-payload
-            details.contact_blob   = first_person   # ← freeform JSON column
+            company_ids = cache.company_ids_for_person(db, person.id)
 
             # commit happens automatically at context-exit
+
+        # only invalidate / push to Zoho once the write is committed
+        cache.invalidate_company(*company_ids)
+        await phone_push.abuffer(person.id)
     except SQLAlchemyError as exc:
         # make sure we roll back so the connection returns to pool clean
         log.error("DB error while saving Apollo phone webhook: %s", exc, exc_info=True)
@@ -96,6 +139,6 @@ async def apollo_phone(request: Request):
     # ── 3. ACK to Apollo ───────────────────────────────────────────────────
     return {
         "status": "ok",
-        "person_id": person_id,
-        "personal_phone": sanitized_number,
+        "person_id": upd.apollo_person_id,
+        "personal_phone": upd.number,
     }
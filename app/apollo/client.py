@@ -1,47 +1,118 @@
-import requests, time, logging
+import requests, time, logging, os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import AsyncIterator, Iterator, Protocol
+from app.core.profiling import record_apollo
 from app.core.settings import get_settings
+from app.apollo.paginate import paginate
+from app.apollo.keys import KeyPool, NoHealthyKey, configured_keys
 
 settings = get_settings()
 log = logging.getLogger("apollo")
 
+
+class ApolloTransientError(Exception):
+    """429 / 5xx / network failure – worth retrying the task."""
+
+
+class ResponseStore(Protocol):
+    def get_response(self, key: str) -> dict | None: ...
+    def put_response(self, key: str, data: dict) -> None: ...
+
+
+# Responses for calls made with an idempotency key are written to / replayed
+# from this store (a task Checkpoint). A ContextVar so the paginator's
+# worker threads (asyncio.to_thread copies the context) see it as well.
+_replay: ContextVar[ResponseStore | None] = ContextVar("apollo_replay", default=None)
+
+
+@contextmanager
+def replaying(store: ResponseStore) -> Iterator[None]:
+    token = _replay.set(store)
+    try:
+        yield
+    finally:
+        _replay.reset(token)
+
+
 class ApolloClient:
     BASE = "https://api.apollo.io/v1"
 
-    def __init__(self):
+    def __init__(self, keys: KeyPool | None = None):
+        self.keys = keys or KeyPool(configured_keys())
         self.session = requests.Session()
+        # the x-api-key header is set per request from the key pool
         self.session.headers.update({
-            "x-api-key": settings.apollo_api_key,
             "Content-Type": "application/json"
         })
 
 
     # --- internal helpers --------------------------------------------------
-    def _call(self, method: str, path: str, **kwargs) -> dict:
+    def _call(self, method: str, path: str, *, idempotency_key: str | None = None, **kwargs) -> dict:
+        store = _replay.get() if idempotency_key else None
+        if store is not None:
+            cached = store.get_response(idempotency_key)
+            if cached is not None:
+                log.info("Apollo %s %s replayed from checkpoint", method, path)
+                return cached
+
         url = f"{self.BASE}{path}"
-        resp = self.session.request(method, url, timeout=30, **kwargs)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        tried: set[str] = set()
+        while True:
+            try:
+                fp, api_key = self.keys.acquire(exclude=tried)
+            except NoHealthyKey as exc:
+                raise ApolloTransientError(str(exc)) from exc
+            tried.add(fp)
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(
+                    method, url, timeout=30, headers={**headers, "x-api-key": api_key}, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self.keys.record(fp, None)
+                raise ApolloTransientError(f"Apollo {method} {path}: {exc}") from exc
+            finally:
+                record_apollo(time.perf_counter() - started)
+            self.keys.record(fp, resp.status_code, resp.headers)
+            # a 429 is per key – try the next healthy one before giving up
+            if resp.status_code == 429 and len(tried) < len(self.keys):
+                continue
+            break
+
         if resp.status_code >= 400:
             log.error("Apollo %s → %s returned %s\nPayload: %s\nBody: %s",
                     method, url, resp.status_code, kwargs.get("json"), resp.text)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ApolloTransientError(f"Apollo {method} {path} returned {resp.status_code}")
             resp.raise_for_status()
-        return resp.json()
+        data = resp.json()
+        if store is not None:
+            store.put_response(idempotency_key, data)
+        return data
 
     # --- public API --------------------------------------------------------
     # app/apollo/client.py
-    def company_search(self, *, name: str, page: int = 1, per_page: int = 5):
+    def company_search(self, *, name: str, page: int = 1, per_page: int = 5,
+                       idempotency_key: str | None = None):
         payload = {
             "q_organization_name": name,
             "page": page,
             "per_page": per_page,
             "display_mode": "explorer_mode",   # ← mandatory
         }
-        return self._call("POST", "/mixed_companies/search", json=payload)
+        return self._call("POST", "/mixed_companies/search", json=payload,
+                          idempotency_key=idempotency_key)
 
     
-    def enrich_org(self, *, name: str | None = None, domain: str | None = None):
+    def enrich_org(self, *, name: str | None = None, domain: str | None = None,
+                   idempotency_key: str | None = None):
         return self._call("GET", "/organizations/enrich", params={
             "organization_name": name,
             "domain": domain
-        })
+        }, idempotency_key=idempotency_key)
 
     def people_search(
         self,
@@ -51,6 +122,7 @@ class ApolloClient:
         titles: list[str] | None = None,
         page: int = 1,
         per_page: int = 100,
+        idempotency_key: str | None = None,
     ) -> dict:
         """
         POST /mixed_people/search but send filters as repeated query-params:
@@ -73,9 +145,34 @@ class ApolloClient:
         params.append(("page", str(page)))
         params.append(("per_page", str(per_page)))
 
-        print("Params for people search api call",params)
+        log.debug("People search params: %s", params, extra={"event": "apollo.request"})
+
+        return self._call("POST", "/mixed_people/search", params=params,
+                          idempotency_key=idempotency_key)
 
-        return self._call("POST", "/mixed_people/search", params=params)
+    # --- streaming pagination ---------------------------------------------
+    def iter_people_search(
+        self,
+        *,
+        domain: str,
+        seniorities: list[str],
+        titles: list[str] | None = None,
+        per_page: int = 25,
+        max_people: int | None = None,
+        concurrency: int | None = None,
+        idempotency_key: str | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """Async generator over people + contacts stubs, one list per page."""
+        fetch = partial(
+            self.people_search, domain=domain, seniorities=seniorities,
+            titles=titles, per_page=per_page,
+        )
+        return paginate(
+            lambda page: fetch(page=page, idempotency_key=_page_key(idempotency_key, page)),
+            items=lambda resp: resp.get("people", []) + resp.get("contacts", []),
+            concurrency=concurrency or settings.apollo_page_concurrency,
+            max_items=max_people,
+        )
 
     def enrich_person_async(
         self,
@@ -86,6 +183,7 @@ class ApolloClient:
         reveal_email: bool = True,
         reveal_phone: bool = True,
         domain: str | None = None,
+        idempotency_key: str | None = None,
     ):
         payload = {
             "id": person_id,
@@ -99,8 +197,35 @@ class ApolloClient:
         if domain:
             payload["domain"] = domain
         
-        print(payload)
+        log.debug("People match payload: %s", payload, extra={"event": "apollo.request"})
 
-        return self._call("POST", "/people/match", json=payload)
-    
-    
+        return self._call("POST", "/people/match", json=payload,
+                          idempotency_key=idempotency_key)
+
+
+def _page_key(idempotency_key: str | None, page: int) -> str | None:
+    return f"{idempotency_key}:page:{page}" if idempotency_key else None
+
+
+# --- per-process instance ------------------------------------------------
+# A requests.Session owns a connection pool; like the DB engine it must not
+# be shared across a fork, so callers go through get_apollo().
+_apollo: ApolloClient | None = None
+_apollo_pid: int | None = None
+
+
+def get_apollo() -> ApolloClient:
+    global _apollo, _apollo_pid
+    if _apollo is None or _apollo_pid != os.getpid():
+        _apollo = ApolloClient()
+        _apollo_pid = os.getpid()
+    return _apollo
+
+
+def reset_apollo() -> None:
+    """Drop the cached client so the next get_apollo() opens a new session."""
+    global _apollo, _apollo_pid
+    if _apollo is not None and _apollo_pid == os.getpid():
+        _apollo.session.close()
+    _apollo = None
+    _apollo_pid = None
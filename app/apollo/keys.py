@@ -0,0 +1,135 @@
+"""
+Pool of Apollo API keys with shared health / quota state.
+
+Each key has its own rate limit. Before every call the client asks the pool
+for the key with the most remaining quota; afterwards it reports the
+outcome. State lives in Redis so all API and worker processes agree:
+
+    apollo:key:{fp}           hash  remaining (from Apollo's rate-limit
+                                    headers), errors (consecutive failures)
+    apollo:key:{fp}:ejected   string with a TTL – present while the key is
+                                    benched after a 429 or repeated errors
+
+Keys are identified by a short SHA-256 fingerprint; the secret itself never
+goes to Redis. Configure with APOLLO_API_KEYS=key1,key2,… (falls back to
+APOLLO_API_KEY).
+"""
+from __future__ import annotations
+
+import hashlib, itertools, logging, random
+
+import redis
+
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+
+log = logging.getLogger("apollo")
+
+# Apollo reports quota per window; the tightest window is the one that bites
+REMAINING_HEADERS = (
+    "x-minute-requests-left",
+    "x-hourly-requests-left",
+    "x-24-hour-requests-left",
+    "x-rate-limit-remaining",
+)
+UNKNOWN_REMAINING = 10**9          # never seen a response for this key yet
+
+
+class NoHealthyKey(Exception):
+    """Every key is ejected right now."""
+
+
+def fingerprint(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+class KeyPool:
+    def __init__(self, keys: list[str]):
+        if not keys:
+            raise ValueError("KeyPool needs at least one Apollo API key")
+        self._keys = {fingerprint(k): k for k in keys}
+        self._fallback = itertools.cycle(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _state_key(fp: str) -> str:
+        return f"apollo:key:{fp}"
+
+    # --- selection -------------------------------------------------------------
+    def acquire(self, exclude: set[str] = frozenset()) -> tuple[str, str]:
+        """Return (fingerprint, api_key) of the healthiest key not in `exclude`."""
+        fps = [fp for fp in self._keys if fp not in exclude] or list(self._keys)
+        try:
+            r = get_redis()
+            pipe = r.pipeline(transaction=False)
+            for fp in fps:
+                pipe.hget(self._state_key(fp), "remaining")
+                pipe.exists(f"{self._state_key(fp)}:ejected")
+            res = pipe.execute()
+        except redis.RedisError as exc:
+            log.warning("Key pool state unavailable (%s); round-robin", exc)
+            fp = next(self._fallback)
+            return fp, self._keys[fp]
+
+        healthy = [
+            (int(remaining) if remaining is not None else UNKNOWN_REMAINING, fp)
+            for fp, remaining, ejected in zip(fps, res[::2], res[1::2])
+            if not ejected
+        ]
+        if not healthy:
+            raise NoHealthyKey(f"all {len(fps)} Apollo key(s) are ejected")
+
+        best = max(remaining for remaining, _ in healthy)
+        fp = random.choice([fp for remaining, fp in healthy if remaining == best])
+        try:
+            # reserve one unit so concurrent callers spread across keys
+            if best != UNKNOWN_REMAINING:
+                r.hincrby(self._state_key(fp), "remaining", -1)
+        except redis.RedisError:
+            pass
+        return fp, self._keys[fp]
+
+    # --- accounting ------------------------------------------------------------
+    def record(self, fp: str, status: int | None, headers: dict | None = None) -> None:
+        """Report the outcome of a call; status None means a network failure."""
+        settings = get_settings()
+        key = self._state_key(fp)
+        try:
+            r = get_redis()
+            pipe = r.pipeline(transaction=False)
+            left = [
+                int(value) for h in REMAINING_HEADERS
+                if (value := (headers or {}).get(h)) is not None and str(value).isdigit()
+            ]
+            if left:
+                pipe.hset(key, "remaining", min(left))
+
+            if status == 429:
+                retry_after = (headers or {}).get("retry-after")
+                ttl = int(retry_after) if retry_after and str(retry_after).isdigit() else settings.apollo_key_eject_seconds
+                pipe.set(f"{key}:ejected", "429", ex=max(ttl, 1))
+                pipe.hset(key, "remaining", 0)
+                log.warning("Apollo key %s rate-limited; ejected for %ss", fp, ttl)
+            elif status is None or status >= 500:
+                pipe.hincrby(key, "errors", 1)
+            else:
+                pipe.hset(key, "errors", 0)
+            pipe.expire(key, 86400)
+            res = pipe.execute()
+
+            if status is None or (status and status >= 500):
+                errors = res[-2]
+                if errors >= settings.apollo_key_max_errors:
+                    r.set(f"{key}:ejected", "errors", ex=settings.apollo_key_eject_seconds)
+                    r.hset(key, "errors", 0)
+                    log.warning("Apollo key %s failed %d times in a row; ejected", fp, errors)
+        except redis.RedisError as exc:
+            log.warning("Could not record Apollo key state: %s", exc)
+
+
+def configured_keys() -> list[str]:
+    settings = get_settings()
+    keys = [k.strip() for k in settings.apollo_api_keys.split(",") if k.strip()]
+    return keys or [settings.apollo_api_key]
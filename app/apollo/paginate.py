@@ -0,0 +1,92 @@
+"""
+Concurrent, order-preserving pagination over Apollo search endpoints.
+
+`paginate()` fetches page 1, reads `pagination.total_pages`, then keeps at
+most `concurrency` later pages in flight. Pages are yielded strictly in
+order; a new fetch is only scheduled when the consumer takes a page, so a
+slow consumer (e.g. the DB writes in `enrich_company`) throttles the
+fetching instead of buffering the whole result set.
+
+The Apollo client is synchronous (requests), so each fetch runs in a
+worker thread via `asyncio.to_thread`. Celery tasks are synchronous too;
+`iterate_sync()` drives the async generator from plain code.
+"""
+from __future__ import annotations
+
+import asyncio, logging, math
+from collections import deque
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+log = logging.getLogger("apollo")
+
+T = TypeVar("T")
+
+
+async def paginate(
+    fetch_page: Callable[[int], dict],
+    *,
+    items: Callable[[dict], list[dict]],
+    concurrency: int = 4,
+    max_items: int | None = None,
+) -> AsyncIterator[list[dict]]:
+    """Yield the item list of each page, in page order.
+
+    `fetch_page(n)` performs the HTTP call for page `n` and returns the
+    decoded JSON. Stops after `max_items` items (the last page is trimmed).
+    """
+    first = await asyncio.to_thread(fetch_page, 1)
+    pagination = first.get("pagination") or {}
+    total_pages = int(pagination.get("total_pages") or 1)
+    per_page = int(pagination.get("per_page") or len(items(first)) or 1)
+    if max_items is not None:
+        # don't even request pages past the cap
+        total_pages = min(total_pages, math.ceil(max_items / per_page))
+
+    remaining = max_items
+    batch = items(first)
+    if remaining is not None:
+        batch = batch[:remaining]
+        remaining -= len(batch)
+    yield batch
+
+    next_page = 2
+    in_flight: deque[asyncio.Task] = deque()
+
+    def fill() -> None:
+        nonlocal next_page
+        while len(in_flight) < concurrency and next_page <= total_pages:
+            in_flight.append(asyncio.create_task(asyncio.to_thread(fetch_page, next_page)))
+            next_page += 1
+
+    try:
+        fill()
+        while in_flight and (remaining is None or remaining > 0):
+            resp = await in_flight.popleft()
+            fill()
+            batch = items(resp)
+            if not batch:           # Apollo ran out early
+                break
+            if remaining is not None:
+                batch = batch[:remaining]
+                remaining -= len(batch)
+            yield batch
+    finally:
+        # threads can't be interrupted; just drop whatever is still running
+        for task in in_flight:
+            task.cancel()
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """Consume an async generator from synchronous code (Celery tasks)."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        # let abandoned fetch threads finish before the loop goes away
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
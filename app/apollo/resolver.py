@@ -0,0 +1,174 @@
+"""
+Local company-name → domain resolver.
+
+Built from what earlier runs already paid for:
+  - `companies` rows that were enriched (name → domain_resolved)
+  - `company_search_results` hits (hit name → primary_domain)
+
+Names are normalised (case, accents, punctuation, legal suffixes) and
+indexed by character trigrams; `resolve()` returns the best domain with a
+confidence in [0, 1]. The task only falls back to Apollo's
+/mixed_companies/search when the confidence is below
+`settings.resolver_min_confidence`.
+
+The index lives in process memory and is topped up incrementally from the
+DB every `resolver_refresh_seconds`.
+"""
+from __future__ import annotations
+
+import logging, os, re, time, unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.core.settings import get_settings
+from app.db.models import Company, CompanySearchResults
+from app.db.session import SessionLocal
+
+log = logging.getLogger("resolver")
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp",
+    "corporation", "co", "company", "plc", "gmbh", "ag", "sa", "sas", "sarl",
+    "srl", "spa", "bv", "nv", "oy", "ab", "as", "aps", "kk", "pty", "pvt",
+    "private", "pte", "group", "holdings", "holding",
+}
+_PUNCT = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """'The ACME Corp., Inc.' → 'acme'"""
+    s = unicodedata.normalize("NFKD", name or "")
+    s = s.encode("ascii", "ignore").decode().lower().replace("&", " and ")
+    tokens = _PUNCT.sub(" ", s).split()
+    if tokens and tokens[0] == "the":
+        tokens = tokens[1:]
+    # strip trailing legal forms ("acme holdings pvt ltd" → "acme"),
+    # but never strip the name down to nothing
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def trigrams(norm: str) -> set[str]:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class Resolution:
+    domain: str
+    confidence: float
+    matched_name: str
+
+
+class DomainResolver:
+    def __init__(self):
+        # normalised name → Counter(domain → times seen)
+        self._domains: dict[str, Counter] = defaultdict(Counter)
+        self._grams: dict[str, set[str]] = {}
+        # trigram → normalised names containing it
+        self._postings: dict[str, set[str]] = defaultdict(set)
+
+        self._last_hit_id = 0
+        self._last_enriched_at: datetime | None = None
+        self._loaded_at: float | None = None
+
+    # --- index maintenance -------------------------------------------------
+    def add(self, name: str | None, domain: str | None, weight: int = 1) -> None:
+        if not name or not domain:
+            return
+        norm = normalize_name(name)
+        if not norm:
+            return
+        self._domains[norm][domain.lower()] += weight
+        if norm not in self._grams:
+            grams = trigrams(norm)
+            self._grams[norm] = grams
+            for g in grams:
+                self._postings[g].add(norm)
+
+    def refresh(self) -> None:
+        """Pull rows added since the last refresh (id / timestamp watermarks)."""
+        with SessionLocal() as db:
+            hits = db.execute(
+                select(
+                    CompanySearchResults.id,
+                    CompanySearchResults.name,
+                    CompanySearchResults.primary_domain,
+                )
+                .where(CompanySearchResults.id > self._last_hit_id)
+                .order_by(CompanySearchResults.id)
+                .execution_options(yield_per=5000)
+            )
+            for hit_id, name, domain in hits:
+                self.add(name, domain)
+                self._last_hit_id = hit_id
+
+            q = select(Company.name, Company.domain_resolved, Company.enriched_at).where(
+                Company.is_enriched.is_(True), Company.domain_resolved.is_not(None)
+            )
+            if self._last_enriched_at is not None:
+                q = q.where(Company.enriched_at > self._last_enriched_at)
+            for name, domain, enriched_at in db.execute(q.execution_options(yield_per=5000)):
+                # a name the user typed that we actually enriched is stronger
+                # evidence than a search hit
+                self.add(name, domain, weight=3)
+                if enriched_at and (self._last_enriched_at is None or enriched_at > self._last_enriched_at):
+                    self._last_enriched_at = enriched_at
+        self._loaded_at = time.monotonic()
+        log.info("Resolver index holds %d names", len(self._grams))
+
+    def _maybe_refresh(self) -> None:
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= get_settings().resolver_refresh_seconds
+        ):
+            try:
+                self.refresh()
+            except Exception as exc:                  # never block enrichment
+                log.warning("Resolver refresh failed: %s", exc)
+
+    # --- lookup ------------------------------------------------------------
+    def resolve(self, name: str) -> Resolution | None:
+        self._maybe_refresh()
+        norm = normalize_name(name)
+        if not norm:
+            return None
+
+        if norm in self._domains:
+            best_norm, similarity = norm, 1.0
+        else:
+            q_grams = trigrams(norm)
+            shared: Counter = Counter()
+            for g in q_grams:
+                for cand in self._postings.get(g, ()):
+                    shared[cand] += 1
+            if not shared:
+                return None
+            # Dice coefficient over trigram sets
+            best_norm, similarity = max(
+                ((cand, 2 * n / (len(q_grams) + len(self._grams[cand]))) for cand, n in shared.items()),
+                key=lambda t: t[1],
+            )
+
+        domains = self._domains[best_norm]
+        domain, seen = domains.most_common(1)[0]
+        # a name that historically mapped to several domains is ambiguous
+        share = seen / sum(domains.values())
+        return Resolution(domain=domain, confidence=round(similarity * share, 4), matched_name=best_norm)
+
+
+# --- per-process instance ------------------------------------------------
+_resolver: DomainResolver | None = None
+_resolver_pid: int | None = None
+
+
+def get_resolver() -> DomainResolver:
+    global _resolver, _resolver_pid
+    if _resolver is None or _resolver_pid != os.getpid():
+        _resolver = DomainResolver()
+        _resolver_pid = os.getpid()
+    return _resolver
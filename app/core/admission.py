@@ -0,0 +1,161 @@
+"""
+Admission control for POST /enrich.
+
+Before a task is accepted the API checks, against Redis:
+
+* the caller's request count in the current minute
+  (`ratelimit:enrich:{caller}:{window}`, INCR + EXPIRE);
+* the depth of the `enrich` list – the Celery/kombu Redis transport keeps a
+  queue as a plain list, so LLEN is O(1) and exact;
+* live worker capacity – every worker's main process heartbeats from a
+  thread into two keys: the sorted set `enrich:workers` (hostname scored by
+  the time its heartbeat expires) and the hash `enrich:workers:slots`
+  (hostname → pool size). Capacity is `ZRANGEBYSCORE now +inf` + HGETALL
+  in one round trip, cached for a few seconds per process; the heartbeats
+  prune expired workers, so dead workers drop out by themselves.
+
+The backlog limit is `enrich_backlog_per_slot` × live slots, capped at
+`enrich_max_queue_depth`; past it, or past the caller's rate, the API
+answers 429 with a Retry-After estimate.
+
+Accepted tasks are published with Celery's own `send_task` – the limits
+above are checked first. `enqueue` runs it on a worker thread so the
+request's event loop never blocks on the synchronous kombu producer; batch
+producers (the Zoho import) use `enqueue_many`, which sends a whole chunk
+over one pooled producer connection.
+"""
+from __future__ import annotations
+
+import asyncio, logging, math, threading, time
+from dataclasses import dataclass
+
+import redis
+
+from app.core.celery_app import ENRICH_QUEUE, celery
+from app.core.redis import get_async_redis, get_redis
+from app.core.settings import get_settings
+
+log = logging.getLogger("admission")
+
+WORKERS_KEY = "enrich:workers"
+WORKER_SLOTS_KEY = "enrich:workers:slots"
+HEARTBEAT_SECONDS = 15
+CAPACITY_CACHE_SECONDS = 5.0
+RATE_WINDOW = 60
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    retry_after: int = 0
+    reason: str = ""
+
+
+# --- worker capacity ----------------------------------------------------------
+def _beat(r: redis.Redis, hostname: str, concurrency: int) -> None:
+    now = time.time()
+    pipe = r.pipeline(transaction=True)
+    pipe.zadd(WORKERS_KEY, {hostname: now + HEARTBEAT_SECONDS * 3})
+    pipe.hset(WORKER_SLOTS_KEY, hostname, concurrency)
+    pipe.zrangebyscore(WORKERS_KEY, "-inf", now)
+    expired = pipe.execute()[-1]
+    if expired:
+        pipe = r.pipeline(transaction=True)
+        pipe.zremrangebyscore(WORKERS_KEY, "-inf", now)
+        pipe.hdel(WORKER_SLOTS_KEY, *expired)
+        pipe.execute()
+
+
+def _heartbeat_loop(hostname: str, concurrency: int, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            _beat(get_redis(), hostname, concurrency)
+        except redis.RedisError as exc:
+            log.warning("Worker heartbeat failed: %s", exc)
+        stop.wait(HEARTBEAT_SECONDS)
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.zrem(WORKERS_KEY, hostname)
+        pipe.hdel(WORKER_SLOTS_KEY, hostname)
+        pipe.execute()
+    except redis.RedisError:
+        pass
+
+
+def start_heartbeat(hostname: str, concurrency: int) -> threading.Event:
+    """Advertise this worker's pool size until the returned event is set."""
+    stop = threading.Event()
+    threading.Thread(
+        target=_heartbeat_loop, args=(hostname, concurrency, stop),
+        name="enrich-heartbeat", daemon=True,
+    ).start()
+    return stop
+
+
+# (expires_at, slots) – capacity changes on the heartbeat's time scale
+_capacity: tuple[float, int] = (0.0, 0)
+
+
+async def worker_capacity() -> int:
+    global _capacity
+    now = time.monotonic()
+    if now < _capacity[0]:
+        return _capacity[1]
+    pipe = get_async_redis().pipeline(transaction=False)
+    pipe.zrangebyscore(WORKERS_KEY, time.time(), "+inf")
+    pipe.hgetall(WORKER_SLOTS_KEY)
+    live, slots = await pipe.execute()
+    total = sum(int(slots[h]) for h in live if h in slots)
+    _capacity = (now + CAPACITY_CACHE_SECONDS, total)
+    return total
+
+
+# --- admission ----------------------------------------------------------------
+async def admit(caller: str) -> Decision:
+    settings = get_settings()
+    now = time.time()
+    window = int(now // RATE_WINDOW)
+    rate_key = f"ratelimit:enrich:{caller}:{window}"
+    try:
+        r = get_async_redis()
+        pipe = r.pipeline(transaction=False)
+        pipe.incr(rate_key)
+        pipe.expire(rate_key, RATE_WINDOW * 2)
+        pipe.llen(ENRICH_QUEUE)
+        calls, _, depth = await pipe.execute()
+        slots = await worker_capacity()
+    except redis.RedisError as exc:
+        # can't see the queue – and can't enqueue either; let enqueue fail loudly
+        log.warning("Admission state unavailable: %s", exc)
+        return Decision(True)
+
+    if calls > settings.enrich_rate_limit_per_minute:
+        return Decision(False, math.ceil((window + 1) * RATE_WINDOW - now), "rate limit exceeded")
+
+    limit = min(settings.enrich_max_queue_depth, max(slots, 1) * settings.enrich_backlog_per_slot)
+    if depth >= limit:
+        # time for the live slots to work the queue back under the limit
+        excess = depth - limit + 1
+        retry = math.ceil(excess / max(slots, 1) * settings.enrich_avg_task_seconds)
+        reason = "enrich queue is full" if slots else "no enrich workers available"
+        return Decision(False, min(max(retry, 5), 600), reason)
+    return Decision(True)
+
+
+# --- enqueue ------------------------------------------------------------------
+async def enqueue(
+    task_name: str, task_id: str, args: tuple, kwargs: dict | None = None, queue: str = ENRICH_QUEUE,
+) -> None:
+    """send_task() on a worker thread – kombu's producer is synchronous."""
+    await asyncio.to_thread(
+        celery.send_task, task_name, args=args, kwargs=kwargs, task_id=task_id, queue=queue,
+    )
+
+
+def enqueue_many(
+    task_name: str, calls: list[tuple[str, tuple]], queue: str = ENRICH_QUEUE,
+) -> None:
+    """send_task() once per (task_id, args), all over one pooled producer."""
+    with celery.producer_or_acquire() as producer:
+        for task_id, args in calls:
+            celery.send_task(task_name, args=args, task_id=task_id, queue=queue, producer=producer)
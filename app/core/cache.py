@@ -0,0 +1,74 @@
+"""
+Redis cache for the company read API.
+
+    company:{id}               → serialised CompanyOut JSON
+    company:domain:{domain}    → company id
+
+Writers (enrich_company, the apollo_phone webhook) call
+`invalidate_company` after they commit.
+A failed invalidation is logged, not raised – the write already happened
+and the TTL bounds how long a stale entry can live.
+"""
+import logging
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.db.models import CompanyPeople
+
+log = logging.getLogger("cache")
+
+
+def company_key(company_id: int) -> str:
+    return f"company:{company_id}"
+
+
+def domain_key(domain: str) -> str:
+    return f"company:domain:{domain.lower()}"
+
+
+def get_company(company_id: int) -> bytes | None:
+    try:
+        return get_redis().get(company_key(company_id))
+    except redis.RedisError as exc:
+        log.warning("Cache read failed for company %s: %s", company_id, exc)
+        return None
+
+
+def put_company(company_id: int, payload: str, domain: str | None = None) -> None:
+    ttl = get_settings().company_cache_ttl
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(company_key(company_id), payload, ex=ttl)
+        if domain:
+            pipe.set(domain_key(domain), company_id, ex=ttl)
+        pipe.execute()
+    except redis.RedisError as exc:
+        log.warning("Cache write failed for company %s: %s", company_id, exc)
+
+
+def company_id_for_domain(domain: str) -> int | None:
+    try:
+        raw = get_redis().get(domain_key(domain))
+    except redis.RedisError:
+        return None
+    return int(raw) if raw is not None else None
+
+
+def invalidate_company(*company_ids: int) -> None:
+    if not company_ids:
+        return
+    try:
+        get_redis().delete(*(company_key(cid) for cid in company_ids))
+    except redis.RedisError as exc:
+        log.warning("Cache invalidation failed for companies %s: %s", company_ids, exc)
+
+
+def company_ids_for_person(db: Session, person_id: int) -> list[int]:
+    """Companies whose cached read model embeds this person."""
+    return db.scalars(
+        select(CompanyPeople.company_id).where(CompanyPeople.person_id == person_id).distinct()
+    ).all()
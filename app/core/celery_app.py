@@ -0,0 +1,62 @@
+"""
+Celery application object, kept free of DB / Apollo imports.
+
+The API only needs this to publish messages; the worker loads the task
+modules listed in `include`. Run the worker with:
+
+    celery -A app.core.celery_app worker -Q enrich
+
+and background refreshes (app/refresh.py), the Zoho push and the periodic
+housekeeping tasks on a separate, smaller worker:
+
+    celery -A app.core.celery_app worker -Q enrich_low,zoho,maintenance --concurrency 2
+"""
+from celery import Celery, signals
+from celery.schedules import crontab
+from app.core.logging import setup_logging
+from app.core.settings import get_settings
+
+ENRICH_QUEUE = "enrich"
+ENRICH_LOW_QUEUE = "enrich_low"
+ZOHO_QUEUE = "zoho"                 # Zoho push-back; never waits behind enrichment
+MAINTENANCE_QUEUE = "maintenance"   # beat housekeeping; never takes an enrich slot
+ENRICH_TASK = "app.tasks.enrich_company"
+
+celery = Celery("tasks", broker=get_settings().redis_url, include=["app.tasks"])
+celery.conf.task_default_queue = ENRICH_QUEUE
+celery.conf.task_routes = {
+    "app.tasks.push_phones_to_zoho":      {"queue": ZOHO_QUEUE},
+    "app.tasks.purge_company_search":     {"queue": MAINTENANCE_QUEUE},
+    "app.tasks.sweep_pending_webhooks":   {"queue": MAINTENANCE_QUEUE},
+    "app.tasks.refresh_stale_companies":  {"queue": MAINTENANCE_QUEUE},
+}
+
+
+@signals.setup_logging.connect
+def _setup_logging(**_):
+    # connecting this stops Celery from installing its own root handlers
+    setup_logging("celery")
+
+
+celery.conf.beat_schedule = {
+    "purge-company-search": {
+        "task": "app.tasks.purge_company_search",
+        "schedule": crontab(hour=3, minute=15),
+        "options": {"queue": MAINTENANCE_QUEUE},
+    },
+    "sweep-pending-webhooks": {
+        "task": "app.tasks.sweep_pending_webhooks",
+        "schedule": 300.0,
+        "options": {"queue": MAINTENANCE_QUEUE},
+    },
+    "push-phones-to-zoho": {
+        "task": "app.tasks.push_phones_to_zoho",
+        "schedule": float(get_settings().zoho_push_interval_seconds),
+        "options": {"queue": ZOHO_QUEUE},
+    },
+    "refresh-stale-companies": {
+        "task": "app.tasks.refresh_stale_companies",
+        "schedule": float(get_settings().refresh_tick_seconds),
+        "options": {"queue": MAINTENANCE_QUEUE},
+    },
+}
@@ -0,0 +1,63 @@
+"""
+Per-task enrichment checkpoints, stored in Redis.
+
+`enrich_company` records what it has finished (search → org → each person)
+under its own `task_id`. Celery retries re-run the task with the same
+arguments, so a retry picks up the same checkpoint and skips what is
+already done. Apollo responses are kept too, keyed by idempotency key, so
+a retried stage replays the paid-for response instead of calling again.
+"""
+from __future__ import annotations
+
+import hashlib, json
+from typing import Any
+
+from app.core.redis import get_redis
+
+CHECKPOINT_TTL = 7 * 24 * 3600
+
+
+def idempotency_key(*parts: Any) -> str:
+    """Deterministic key for one logical Apollo call."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Checkpoint:
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self._key = f"enrich:ckpt:{task_id}"
+        self._people_key = f"{self._key}:people"
+        self._responses_key = f"{self._key}:responses"
+
+    # --- stages --------------------------------------------------------------
+    def get(self, stage: str) -> Any | None:
+        raw = get_redis().hget(self._key, stage)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, stage: str, value: Any) -> None:
+        r = get_redis()
+        r.hset(self._key, stage, json.dumps(value))
+        r.expire(self._key, CHECKPOINT_TTL)
+
+    # --- people --------------------------------------------------------------
+    def person_done(self, apollo_id: str) -> bool:
+        return bool(get_redis().sismember(self._people_key, apollo_id))
+
+    def mark_person(self, apollo_id: str) -> None:
+        r = get_redis()
+        r.sadd(self._people_key, apollo_id)
+        r.expire(self._people_key, CHECKPOINT_TTL)
+
+    # --- Apollo response replay ----------------------------------------------
+    def get_response(self, key: str) -> dict | None:
+        raw = get_redis().hget(self._responses_key, key)
+        return None if raw is None else json.loads(raw)
+
+    def put_response(self, key: str, data: dict) -> None:
+        r = get_redis()
+        r.hset(self._responses_key, key, json.dumps(data))
+        r.expire(self._responses_key, CHECKPOINT_TTL)
+
+    def clear(self) -> None:
+        get_redis().delete(self._key, self._people_key, self._responses_key)
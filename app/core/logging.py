@@ -0,0 +1,201 @@
+"""
+Process-wide logging: queue-backed, JSON, truncated, sampled.
+
+The calling thread only formats the message and puts the record on an
+in-memory queue; a `QueueListener` thread does the actual stdout write, so
+a slow stream never stalls an Apollo page or a webhook. On top of that:
+
+* every message (and traceback) is cut to `log_max_chars` before it is
+  queued – whole Apollo payloads can't fill the disk any more;
+* records tagged with `extra={"event": "<name>"}` are sampled at the rate
+  configured in LOG_SAMPLE_RATES ("apollo.response=0.01,person.upserted=0.1");
+  untagged records are always kept;
+* DEBUG records are dropped unless the global level is DEBUG or the code
+  runs inside `debug_scope()` – e.g. one enrich task started with
+  `debug=True` – so debugging a single company doesn't flood the fleet;
+* `log_context(task_id=…)` adds fields to every record emitted inside it.
+
+When the queue is full records are dropped (and counted) rather than
+blocking. Like the DB engine and Redis pool, the listener thread doesn't
+survive a fork: `setup_logging()` rebuilds it when the pid changes (see
+`worker_process_init` in app/tasks.py).
+"""
+from __future__ import annotations
+
+import atexit, copy, json, logging, os, queue, random, sys, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.settings import get_settings
+
+_debug: ContextVar[bool] = ContextVar("log_debug", default=False)
+_fields: ContextVar[dict] = ContextVar("log_fields", default={})
+
+_listener: QueueListener | None = None
+_listener_pid: int | None = None
+_base_level = logging.INFO
+_debug_scopes = 0
+_debug_lock = threading.Lock()
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "service"}
+
+
+def truncate(text: str, limit: int) -> str:
+    if limit and len(text) > limit:
+        return f"{text[:limit]}… [{len(text) - limit} more chars]"
+    return text
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class _Gate(logging.Filter):
+    """Debug scoping + per-event sampling, applied before a record is queued."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < _base_level and not _debug.get():
+            return False
+        event = getattr(record, "event", None)
+        rate = self.rates.get(event, 1.0) if event else 1.0
+        # warnings and errors are never sampled away
+        return rate >= 1.0 or record.levelno >= logging.WARNING or random.random() < rate
+
+
+class _TruncatingQueueHandler(QueueHandler):
+    def __init__(self, q: queue.Queue, max_chars: int, service: str):
+        super().__init__(q)
+        self.max_chars = max_chars
+        self.service = service
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # format in the caller (args may be mutated later), but only once
+        # and only up to max_chars; the listener never sees the raw payload
+        record = copy.copy(record)
+        record.msg = truncate(record.getMessage(), self.max_chars)
+        record.args = None
+        if record.exc_info:
+            record.exc_text = truncate(logging.Formatter().formatException(record.exc_info), self.max_chars * 4)
+            record.exc_info = None
+        record.service = self.service
+        for key, value in _fields.get().items():
+            record.__dict__.setdefault(key, value)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts":      datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level":   record.levelname,
+            "logger":  record.name,
+            "service": getattr(record, "service", None),
+            "pid":     record.process,
+            "msg":     record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = value if isinstance(value, (int, float, bool, type(None))) \
+                    else truncate(str(value), self.max_chars)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(service)s:%(name)s] %(message)s")
+
+
+def setup_logging(service: str) -> None:
+    """Install the queue handler on the root logger (idempotent per process)."""
+    global _listener, _listener_pid, _base_level
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+    if _listener is not None:
+        # inherited through fork: the thread is gone, drop it without joining
+        _listener = None
+
+    settings = get_settings()
+    _base_level = logging.getLevelName(settings.log_level.upper())
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter(settings.log_max_chars) if settings.log_json else TextFormatter())
+
+    q: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = _TruncatingQueueHandler(q, settings.log_max_chars, service)
+    handler.addFilter(_Gate(parse_sample_rates(settings.log_sample_rates)))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG if _debug_scopes else _base_level)
+
+    _listener = QueueListener(q, stream, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def shutdown_logging() -> None:
+    """Flush what is queued; called at exit."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+@contextmanager
+def debug_scope(enabled: bool = True):
+    """Let DEBUG records through for code running in this context only."""
+    global _debug_scopes
+    if not enabled:
+        yield
+        return
+    token = _debug.set(True)
+    with _debug_lock:
+        _debug_scopes += 1
+        logging.getLogger().setLevel(logging.DEBUG)
+    try:
+        yield
+    finally:
+        with _debug_lock:
+            _debug_scopes -= 1
+            if not _debug_scopes:
+                logging.getLogger().setLevel(_base_level)
+        _debug.reset(token)
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach `fields` (e.g. task_id) to every record emitted inside."""
+    token = _fields.set({**_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _fields.reset(token)
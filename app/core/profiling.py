@@ -0,0 +1,214 @@
+"""
+Opt-in statistical profiling for enrich tasks and API requests.
+
+Turned on for a random `profile_sample_rate` share of requests and tasks,
+per task (`enrich_company(..., profile=True)`), or – when
+PROFILE_REQUESTS_ENABLED is set – by a caller that sends
+`X-Profile: <PROFILE_TOKEN>` on any request (`"profile": true` on POST
+/enrich needs the same header). A profiled run writes two files to
+`profile_dir`:
+
+    <kind>-<tag>-<ts>.folded   stacks sampled every `profile_interval_ms`,
+                               in folded format ("a;b;c 42") – feed it to
+                               flamegraph.pl, speedscope or inferno
+    <kind>-<tag>-<ts>.json     wall time, DB queries / DB time and Apollo
+                               calls / Apollo time, per stage
+
+The sampler is a plain thread reading `sys._current_frames()`: no
+dependency, and nothing runs at all while profiling is off. It samples the
+thread that started the profile plus any thread that runs a DB query or
+Apollo call on its behalf (the Apollo page fetches run in a thread pool).
+Stages are marked with `mark("org_enrich")`; each one lasts until the next
+mark.
+
+Each process starts at most `profile_max_per_minute` profiles (more are
+skipped, not queued), and only the newest `profile_keep` runs are kept in
+`profile_dir`.
+"""
+from __future__ import annotations
+
+import glob, hmac, json, logging, os, random, sys, threading, time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.settings import get_settings
+
+log = logging.getLogger("profiling")
+
+_current: ContextVar["Profile | None"] = ContextVar("profile", default=None)
+
+# start times of this process' recent profiles (see _take_slot)
+_recent: deque[float] = deque()
+_recent_lock = threading.Lock()
+
+
+class Profile:
+    def __init__(self, kind: str, tag: str, interval: float):
+        self.kind, self.tag, self.interval = kind, tag, interval
+        self.threads = {threading.get_ident()}
+        self.stacks: Counter[str] = Counter()
+        self.stages: dict[str, dict] = {}
+        self.stage = "start"
+        self._stage_started = self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    # --- sampling ------------------------------------------------------------
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid in list(self.threads):
+                frame = frames.get(tid)
+                if frame is None or tid == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[f"{self.stage};" + ";".join(reversed(stack))] += 1
+
+    # --- accounting -----------------------------------------------------------
+    def _bucket(self) -> dict:
+        return self.stages.setdefault(self.stage, {
+            "seconds": 0.0, "db_queries": 0, "db_seconds": 0.0,
+            "apollo_calls": 0, "apollo_seconds": 0.0,
+        })
+
+    def add(self, **amounts: float) -> None:
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            bucket = self._bucket()
+            for key, value in amounts.items():
+                bucket[key] += value
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._bucket()["seconds"] += now - self._stage_started
+            self.stage, self._stage_started = stage, now
+
+    # --- lifecycle --------------------------------------------------------------
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> str:
+        self.mark("end")
+        self.stages.pop("end", None)
+        self._stop.set()
+        self._sampler.join()
+        return self._write()
+
+    def _write(self) -> str:
+        out_dir = get_settings().profile_dir
+        os.makedirs(out_dir, exist_ok=True)
+        safe_tag = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.tag)[:80]
+        base = os.path.join(out_dir, f"{self.kind}-{safe_tag}-{datetime.utcnow():%Y%m%dT%H%M%S}")
+        with open(base + ".folded", "w") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        summary = {
+            "kind": self.kind, "tag": self.tag,
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "samples": sum(self.stacks.values()),
+            "interval_ms": self.interval * 1000,
+            "stages": self.stages,
+        }
+        with open(base + ".json", "w") as fh:
+            json.dump(summary, fh, indent=2)
+        log.info("Profile %s %s: %.2fs → %s.folded", self.kind, self.tag, summary["wall_seconds"], base)
+        _prune(out_dir, get_settings().profile_keep)
+        return base
+
+
+def _prune(out_dir: str, keep: int) -> None:
+    """Delete all but the newest `keep` runs (two files each)."""
+    files = sorted(
+        glob.glob(os.path.join(out_dir, "*.folded")) + glob.glob(os.path.join(out_dir, "*.json")),
+        key=os.path.getmtime, reverse=True,
+    )
+    for path in files[keep * 2:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass                        # pruned by another process
+
+
+def authorized(token: str | None) -> bool:
+    """May this caller ask for a profile? Needs the feature on and PROFILE_TOKEN."""
+    settings = get_settings()
+    return bool(
+        settings.profile_requests_enabled and settings.profile_token and token
+        and hmac.compare_digest(token.encode(), settings.profile_token.encode())
+    )
+
+
+def should_profile(requested: bool = False) -> bool:
+    return requested or random.random() < get_settings().profile_sample_rate
+
+
+def _take_slot() -> bool:
+    """At most `profile_max_per_minute` profiles per process and minute."""
+    now = time.monotonic()
+    with _recent_lock:
+        while _recent and now - _recent[0] >= 60:
+            _recent.popleft()
+        if len(_recent) >= get_settings().profile_max_per_minute:
+            return False
+        _recent.append(now)
+        return True
+
+
+@contextmanager
+def profiled(kind: str, tag: str, enabled: bool = True):
+    """Profile the enclosed block if `enabled`; yields the Profile or None."""
+    if not enabled or _current.get() is not None:
+        yield _current.get()
+        return
+    if not _take_slot():
+        log.info("Profile for %s %s skipped: profile_max_per_minute reached", kind, tag)
+        yield None
+        return
+    prof = Profile(kind, tag, get_settings().profile_interval_ms / 1000)
+    token = _current.set(prof)
+    prof.start()
+    try:
+        yield prof
+    finally:
+        _current.reset(token)
+        try:
+            prof.stop()
+        except OSError as exc:
+            log.warning("Could not write profile for %s %s: %s", kind, tag, exc)
+
+
+def mark(stage: str) -> None:
+    """Start a new stage in the active profile (no-op when not profiling)."""
+    if (prof := _current.get()) is not None:
+        prof.mark(stage)
+
+
+def record_apollo(seconds: float) -> None:
+    if (prof := _current.get()) is not None:
+        prof.add(apollo_calls=1, apollo_seconds=seconds)
+
+
+# --- DB query accounting -------------------------------------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["profile_t0"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    t0 = conn.info.pop("profile_t0", None)
+    if (prof := _current.get()) is not None and t0 is not None:
+        prof.add(db_queries=1, db_seconds=time.perf_counter() - t0)
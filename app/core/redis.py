@@ -0,0 +1,43 @@
+"""
+Per-process Redis client.
+
+Same rule as the DB engine: the connection pool is created lazily and
+rebuilt in a forked child (see `worker_process_init` in app/tasks.py).
+"""
+import os
+
+import redis
+import redis.asyncio
+
+from app.core.settings import get_settings
+
+_client: redis.Redis | None = None
+_client_pid: int | None = None
+
+_async_client: redis.asyncio.Redis | None = None
+_async_client_pid: int | None = None
+
+
+def get_redis() -> redis.Redis:
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(get_settings().redis_url)
+        _client_pid = os.getpid()
+    return _client
+
+
+def reset_redis() -> None:
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        _client.close()
+    _client = None
+    _client_pid = None
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """asyncio client for the API's request handlers."""
+    global _async_client, _async_client_pid
+    if _async_client is None or _async_client_pid != os.getpid():
+        _async_client = redis.asyncio.Redis.from_url(get_settings().redis_url)
+        _async_client_pid = os.getpid()
+    return _async_client
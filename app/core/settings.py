@@ -4,13 +4,125 @@ from pydantic import Field, Extra
 
 class Settings(BaseSettings):
     apollo_api_key:        str = Field(..., env="APOLLO_API_KEY")
+    # comma-separated pool of keys with separate quotas (defaults to apollo_api_key)
+    apollo_api_keys:       str = Field("",  env="APOLLO_API_KEYS")
     mysql_uri:             str = Field(..., env="MYSQL_URI")
     redis_url:             str = Field(..., env="REDIS_URL")
+    # comma-separated read replicas; plain reads go there (app/db/session.py)
+    mysql_replica_uris:    str = Field("",  env="MYSQL_REPLICA_URIS")
     zoho_client_id:        str = Field("",  env="ZOHO_CLIENT_ID")
     zoho_client_secret:    str = Field("",  env="ZOHO_CLIENT_SECRET")
+    zoho_refresh_token:    str = Field("",  env="ZOHO_REFRESH_TOKEN")
+    # overridable for other data centres (.eu, .in, …) or a local stand-in
+    zoho_accounts_url:     str = Field("https://accounts.zoho.com",  env="ZOHO_ACCOUNTS_URL")
+    zoho_api_base:         str = Field("https://www.zohoapis.com",   env="ZOHO_API_BASE")
     public_base_url:       str | None = Field(None, env="PUBLIC_BASE_URL")
     apollo_webhook_secret: str | None = Field(None, env="APOLLO_WEBHOOK_SECRET")
 
+    # local name → domain resolver (skips /mixed_companies/search when sure)
+    resolver_min_confidence: float = Field(0.85, env="RESOLVER_MIN_CONFIDENCE")
+    resolver_refresh_seconds: int  = Field(300,  env="RESOLVER_REFRESH_SECONDS")
+
+    # people / company search pagination
+    apollo_page_concurrency: int = Field(4,   env="APOLLO_PAGE_CONCURRENCY")
+    people_search_per_page:  int = Field(25,  env="PEOPLE_SEARCH_PER_PAGE")
+    people_per_company_cap:  int = Field(100, env="PEOPLE_PER_COMPANY_CAP")
+
+    # which stubs get a paid /people/match (app/selection.py); weights as "key=weight,…"
+    people_match_top_n:        int = Field(25, env="PEOPLE_MATCH_TOP_N")
+    people_match_fresh_days:   int = Field(90, env="PEOPLE_MATCH_FRESH_DAYS")
+    people_seniority_weights:  str = Field(
+        "owner=10,founder=10,partner=8,vp=7,head=6,director=6,manager=4",
+        env="PEOPLE_SENIORITY_WEIGHTS")
+    people_title_weights:      str = Field(
+        "ceo=10,founder=8,owner=8,cfo=8,coo=8,chro=8,hr=5,people=5,talent=5,finance=4",
+        env="PEOPLE_TITLE_WEIGHTS")
+    people_department_weights: str = Field(
+        "c_suite=3,master_human_resources=3,master_finance=2",
+        env="PEOPLE_DEPARTMENT_WEIGHTS")
+
+    # enrich_company retries (exponential backoff + jitter, resumes from checkpoint)
+    enrich_max_retries: int = Field(5, env="ENRICH_MAX_RETRIES")
+
+    # read API cache (invalidated on writes; the TTL is only a safety net)
+    company_cache_ttl: int = Field(3600, env="COMPANY_CACHE_TTL")
+
+    # company_search_runs / _results retention (daily beat task)
+    search_retention_months:  int = Field(6,    env="SEARCH_RETENTION_MONTHS")
+    search_unused_hit_days:   int = Field(14,   env="SEARCH_UNUSED_HIT_DAYS")
+    retention_batch_size:     int = Field(5000, env="RETENTION_BATCH_SIZE")
+    retention_max_partitions: int = Field(3,    env="RETENTION_MAX_PARTITIONS")
+
+    # how long a webhook payload hash is remembered for duplicate suppression
+    webhook_dedupe_ttl: int = Field(86400, env="WEBHOOK_DEDUPE_TTL")
+    # phone webhooks that arrived before their person row; dropped after this
+    pending_webhook_ttl: int = Field(3600, env="PENDING_WEBHOOK_TTL")
+
+    # Apollo key pool health
+    apollo_key_eject_seconds: int = Field(60, env="APOLLO_KEY_EJECT_SECONDS")
+    apollo_key_max_errors:    int = Field(5,  env="APOLLO_KEY_MAX_ERRORS")
+
+    # per-query time budget for GET /segments/* (MySQL MAX_EXECUTION_TIME)
+    segment_query_timeout_ms: int = Field(5000, env="SEGMENT_QUERY_TIMEOUT_MS")
+
+    # GET /export/enriched needs "Authorization: Bearer <EXPORT_TOKEN>";
+    # unset → the endpoint is off and exports are CLI-only (python -m app.export)
+    export_token: str = Field("", env="EXPORT_TOKEN")
+
+    # POST /enrich admission control (app/core/admission.py)
+    enrich_max_queue_depth:       int = Field(10000, env="ENRICH_MAX_QUEUE_DEPTH")
+    enrich_backlog_per_slot:      int = Field(50,    env="ENRICH_BACKLOG_PER_SLOT")
+    enrich_avg_task_seconds:      int = Field(30,    env="ENRICH_AVG_TASK_SECONDS")
+    enrich_rate_limit_per_minute: int = Field(60,    env="ENRICH_RATE_LIMIT_PER_MINUTE")
+
+    # logging (app/core/logging.py); sample rates as "event=rate,…"
+    log_level:        str  = Field("INFO", env="LOG_LEVEL")
+    log_json:         bool = Field(True,   env="LOG_JSON")
+    log_max_chars:    int  = Field(2000,   env="LOG_MAX_CHARS")
+    log_sample_rates: str  = Field("",     env="LOG_SAMPLE_RATES")
+    log_queue_size:   int  = Field(10000,  env="LOG_QUEUE_SIZE")
+
+    # opt-in profiling (app/core/profiling.py): X-Profile header, task kwarg or sampling
+    profile_dir:            str   = Field("/tmp/profiles", env="PROFILE_DIR")
+    profile_sample_rate:    float = Field(0.0, env="PROFILE_SAMPLE_RATE")
+    profile_interval_ms:    float = Field(5.0, env="PROFILE_INTERVAL_MS")
+    profile_max_per_minute: int   = Field(6,   env="PROFILE_MAX_PER_MINUTE")
+    profile_keep:           int   = Field(200, env="PROFILE_KEEP")
+    # X-Profile on API requests: off unless enabled *and* a token is set
+    profile_requests_enabled: bool = Field(False, env="PROFILE_REQUESTS_ENABLED")
+    profile_token:            str  = Field("",    env="PROFILE_TOKEN")
+
+    # replicas further behind than this are skipped; lag is re-read every N s
+    replica_max_lag_seconds: float = Field(5.0, env="REPLICA_MAX_LAG_SECONDS")
+    replica_check_seconds:   int   = Field(10,  env="REPLICA_CHECK_SECONDS")
+
+    # payload_history (app/history.py): a full document every N versions
+    history_keyframe_every: int = Field(20, env="HISTORY_KEYFRAME_EVERY")
+
+    # Zoho Bulk Read import (app/zoho/bulk_read.py)
+    zoho_bulk_poll_max_seconds: int = Field(3600, env="ZOHO_BULK_POLL_MAX_SECONDS")
+    zoho_enqueue_max_depth:     int = Field(5000, env="ZOHO_ENQUEUE_MAX_DEPTH")
+
+    # coalesced phone push to Zoho contacts (app/zoho/phone_push.py)
+    zoho_push_window_seconds:   int = Field(30,  env="ZOHO_PUSH_WINDOW_SECONDS")
+    zoho_push_batch_size:       int = Field(100, env="ZOHO_PUSH_BATCH_SIZE")
+    zoho_push_interval_seconds: int = Field(10,  env="ZOHO_PUSH_INTERVAL_SECONDS")
+    zoho_contacts_module:       str = Field("Contacts", env="ZOHO_CONTACTS_MODULE")
+    zoho_phone_field:           str = Field("Mobile",   env="ZOHO_PHONE_FIELD")
+
+    # background refresh of stale companies (app/refresh.py), on the enrich_low queue
+    refresh_daily_cap:      int = Field(500, env="REFRESH_DAILY_CAP")
+    refresh_min_age_days:   int = Field(30,  env="REFRESH_MIN_AGE_DAYS")
+    refresh_tick_seconds:   int = Field(900, env="REFRESH_TICK_SECONDS")
+    refresh_candidate_pool: int = Field(2000, env="REFRESH_CANDIDATE_POOL")
+
+    # in-process index of stored Apollo person ids (app/known_ids.py);
+    # ~1.2 bytes per id at 1 % false positives
+    known_ids_enabled:    bool  = Field(True,      env="KNOWN_IDS_ENABLED")
+    known_ids_capacity:   int   = Field(5_000_000, env="KNOWN_IDS_CAPACITY")
+    known_ids_error_rate: float = Field(0.01,      env="KNOWN_IDS_ERROR_RATE")
+    known_ids_lru_size:   int   = Field(100_000,   env="KNOWN_IDS_LRU_SIZE")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
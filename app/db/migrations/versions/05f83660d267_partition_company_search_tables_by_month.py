@@ -0,0 +1,84 @@
+"""partition company search tables by month
+
+Revision ID: 05f83660d267
+Revises: 4a0e8283bdbe
+Create Date: 2026-10-19 15:11:00.042891
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '05f83660d267'
+down_revision: Union[str, Sequence[str], None] = '4a0e8283bdbe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table → monthly partitioning column
+PARTITIONED = {
+    'company_search_runs': 'created_at',
+    'company_search_results': 'matched_at',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+    insp = sa.inspect(bind)
+
+    # partitioned InnoDB tables can't take part in foreign keys
+    for fk in insp.get_foreign_keys('company_search_results'):
+        op.drop_constraint(fk['name'], 'company_search_results', type_='foreignkey')
+    for ix in insp.get_indexes('company_search_results'):
+        if ix['column_names'] in (['run_id'], ['company_id']):
+            op.drop_index(ix['name'], table_name='company_search_results')
+    op.create_index('ix_company_search_results_run_id', 'company_search_results', ['run_id'])
+    op.create_index('ix_company_search_results_company_id', 'company_search_results', ['company_id'])
+
+    for table, column in PARTITIONED.items():
+        op.execute(f"UPDATE {table} SET {column} = UTC_TIMESTAMP() WHERE {column} IS NULL")
+        op.alter_column(table, column, existing_type=sa.DateTime(), nullable=False)
+        # every unique key must include the partitioning column
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, {column})")
+
+        first = bind.execute(sa.text(f"SELECT MIN({column}) FROM {table}")).scalar()
+        op.execute(
+            f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS({column}) ("
+            + _partition_list((first or datetime.utcnow()).date(), datetime.utcnow().date())
+            + ")"
+        )
+
+
+def _month(d: date, shift: int = 0) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + shift, 12)
+    return date(y, m + 1, 1)
+
+
+def _partition_list(first: date, today: date) -> str:
+    parts, month = [], _month(first)
+    while month <= _month(today, 2):
+        parts.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_month(month, 1):%Y-%m-%d}')")
+        month = _month(month, 1)
+    parts.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ", ".join(parts)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+
+    for table, column in PARTITIONED.items():
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        op.alter_column(table, column, existing_type=sa.DateTime(), nullable=True)
+
+    op.create_foreign_key(None, 'company_search_results', 'company_search_runs', ['run_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key(None, 'company_search_results', 'companies', ['company_id'], ['id'], ondelete='SET NULL')
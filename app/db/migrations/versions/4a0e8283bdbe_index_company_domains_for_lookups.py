@@ -0,0 +1,30 @@
+"""index company domains for lookups
+
+Revision ID: 4a0e8283bdbe
+Revises: c034233155ca
+Create Date: 2026-10-19 14:19:00.295639
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a0e8283bdbe'
+down_revision: Union[str, Sequence[str], None] = 'c034233155ca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_companies_domain_resolved', 'companies', ['domain_resolved'], unique=False)
+    op.create_index('ix_companies_domain_entered', 'companies', ['domain_entered'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_domain_entered', table_name='companies')
+    op.drop_index('ix_companies_domain_resolved', table_name='companies')
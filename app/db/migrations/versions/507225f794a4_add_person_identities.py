@@ -0,0 +1,40 @@
+"""add person identities
+
+Revision ID: 507225f794a4
+Revises: 7303a24a2973
+Create Date: 2026-10-19 15:49:00.093356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '507225f794a4'
+down_revision: Union[str, Sequence[str], None] = '7303a24a2973'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('person_identities',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('person_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['person_id'], ['people.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'key', name='uq_person_identities_kind_key')
+    )
+    op.create_index(op.f('ix_person_identities_person_id'), 'person_identities', ['person_id'], unique=False)
+    # filled (and existing duplicates merged) by `python -m app.identity dedupe`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_person_identities_person_id'), table_name='person_identities')
+    op.drop_table('person_identities')
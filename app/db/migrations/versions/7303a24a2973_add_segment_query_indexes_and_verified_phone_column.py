@@ -0,0 +1,41 @@
+"""add segment query indexes and verified phone column
+
+Revision ID: 7303a24a2973
+Revises: f121b253b108
+Create Date: 2026-10-19 10:24:00.878552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7303a24a2973'
+down_revision: Union[str, Sequence[str], None] = 'f121b253b108'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_companies_segment', 'companies',
+                    ['industry', 'location_country', 'employee_count', 'id'], unique=False)
+    op.add_column('people', sa.Column(
+        'has_verified_phone', sa.Boolean(),
+        sa.Computed("personal_phone IS NOT NULL AND COALESCE(phone_verification_status, '') = 'verified'",
+                    persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_people_has_verified_phone', 'people', ['has_verified_phone'], unique=False)
+    op.create_index('ix_company_people_company_person', 'company_people',
+                    ['company_id', 'person_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_people_company_person', table_name='company_people')
+    op.drop_index('ix_people_has_verified_phone', table_name='people')
+    op.drop_column('people', 'has_verified_phone')
+    op.drop_index('ix_companies_segment', table_name='companies')
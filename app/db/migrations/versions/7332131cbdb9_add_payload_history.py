@@ -0,0 +1,38 @@
+"""add payload history
+
+Revision ID: 7332131cbdb9
+Revises: fa079fb43bfb
+Create Date: 2026-10-19 09:15:00.421891
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7332131cbdb9'
+down_revision: Union[str, Sequence[str], None] = 'fa079fb43bfb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('payload_history',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.BigInteger(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('is_keyframe', sa.Boolean(), nullable=False),
+    sa.Column('doc', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'entity_id', 'version', name='uq_payload_history_version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('payload_history')
@@ -0,0 +1,45 @@
+"""add term dictionary and company postings
+
+Revision ID: f121b253b108
+Revises: 05f83660d267
+Create Date: 2026-10-19 18:19:00.763762
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f121b253b108'
+down_revision: Union[str, Sequence[str], None] = '05f83660d267'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('terms',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('value', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'value', name='uq_terms_kind_value')
+    )
+    op.create_table('company_terms',
+    sa.Column('company_id', sa.BigInteger(), nullable=False),
+    sa.Column('term_id', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['term_id'], ['terms.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id', 'term_id')
+    )
+    op.create_index('ix_company_terms_term_company', 'company_terms', ['term_id', 'company_id'], unique=False)
+    # postings are filled by `python -m app.terms backfill`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_company_terms_term_company', table_name='company_terms')
+    op.drop_table('company_terms')
+    op.drop_table('terms')
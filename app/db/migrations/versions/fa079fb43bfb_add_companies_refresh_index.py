@@ -0,0 +1,28 @@
+"""add companies refresh index
+
+Revision ID: fa079fb43bfb
+Revises: 507225f794a4
+Create Date: 2026-10-19 13:58:00.201172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fa079fb43bfb'
+down_revision: Union[str, Sequence[str], None] = '507225f794a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_companies_refresh', 'companies', ['is_enriched', 'enriched_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_refresh', table_name='companies')
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
 from sqlalchemy import (
-    BigInteger, String, Integer, Boolean, DateTime, JSON, ForeignKey, Text
+    BigInteger, String, Integer, Boolean, DateTime, JSON, ForeignKey, Text,
+    Index, UniqueConstraint, Computed,
 )
 from datetime import datetime
 
@@ -9,11 +10,18 @@ class Base(DeclarativeBase):
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        # segment filters (app/api/segments.py): equality on industry/country,
+        # range on employee_count, id for the keyset
+        Index("ix_companies_segment", "industry", "location_country", "employee_count", "id"),
+        # stalest-first scan for the background refresh (app/refresh.py)
+        Index("ix_companies_refresh", "is_enriched", "enriched_at"),
+    )
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     apollo_org_id: Mapped[str | None] = mapped_column(String(40), unique=True)
     name:            Mapped[str] = mapped_column(String(255))
-    domain_resolved: Mapped[str | None] = mapped_column(String(255))
-    domain_entered:  Mapped[str | None] = mapped_column(String(255))
+    domain_resolved: Mapped[str | None] = mapped_column(String(255), index=True)
+    domain_entered:  Mapped[str | None] = mapped_column(String(255), index=True)
     industry:        Mapped[str | None] = mapped_column(String(255))
     employee_count:  Mapped[int | None]
     revenue:         Mapped[int | None]
@@ -112,6 +120,15 @@ class Person(Base):
     personal_phone:             Mapped[str | None]= mapped_column(String(64),  nullable=True)
     phone_verification_status:  Mapped[str | None]= mapped_column(String(32),  nullable=True)
     phones_raw_json:            Mapped[list | None]= mapped_column(JSON,         nullable=True)
+    # maintained by the DB; lets segment queries find phone-verified people by index
+    has_verified_phone:         Mapped[bool | None]= mapped_column(
+        Boolean,
+        Computed(
+            "personal_phone IS NOT NULL AND COALESCE(phone_verification_status, '') = 'verified'",
+            persisted=True,
+        ),
+        index=True,
+    )
     created_at:       Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at:       Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -160,8 +177,47 @@ class PersonDetails(Base):
     webhook_respomse_json = mapped_column(JSON)
     webhook_phone_number: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
+class PersonIdentity(Base):
+    """
+    Normalised keys that identify a human independent of Apollo's person id
+    (which changes when they change jobs). kind is linkedin | email | phone
+    | apollo; `apollo` rows alias extra Apollo ids to the surviving person.
+    See app/identity.py.
+    """
+    __tablename__ = "person_identities"
+    __table_args__ = (UniqueConstraint("kind", "key", name="uq_person_identities_kind_key"),)
+
+    id:        Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind:      Mapped[str] = mapped_column(String(16))
+    key:       Mapped[str] = mapped_column(String(255))
+    person_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("people.id", ondelete="CASCADE"), index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class PayloadHistory(Base):
+    """
+    Versions of a raw payload (kind person | person_contact | org, keyed by
+    the owning row's id): a full document on keyframes, otherwise the RFC
+    6902 patch from the previous version. No FK – the audit trail outlives
+    merged or deleted rows. See app/history.py.
+    """
+    __tablename__ = "payload_history"
+    __table_args__ = (
+        UniqueConstraint("kind", "entity_id", "version", name="uq_payload_history_version"),
+    )
+
+    id:          Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind:        Mapped[str] = mapped_column(String(16))
+    entity_id:   Mapped[int] = mapped_column(BigInteger)
+    version:     Mapped[int] = mapped_column(Integer)
+    is_keyframe: Mapped[bool] = mapped_column(Boolean, default=False)
+    doc = mapped_column(JSON)
+    created_at:  Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
 class CompanyPeople(Base):
     __tablename__ = "company_people"
+    __table_args__ = (Index("ix_company_people_company_person", "company_id", "person_id"),)
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(
         BigInteger, ForeignKey("companies.id", ondelete="CASCADE")
@@ -170,10 +226,38 @@ class CompanyPeople(Base):
         BigInteger, ForeignKey("people.id", ondelete="CASCADE")
     )
 
+class Term(Base):
+    """
+    Dictionary of normalised organisation terms (technologies, keywords,
+    industries) pulled out of the JSON arrays on organization_details so
+    segment queries can use an index instead of parsing JSON per row.
+    """
+    __tablename__ = "terms"
+    __table_args__ = (UniqueConstraint("kind", "value", name="uq_terms_kind_value"),)
+
+    id:    Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind:  Mapped[str] = mapped_column(String(16))      # technology | keyword | industry
+    value: Mapped[str] = mapped_column(String(255))     # lower-cased, whitespace-collapsed
+
+class CompanyTerm(Base):
+    """Postings: which company carries which term (maintained by app/terms.py)."""
+    __tablename__ = "company_terms"
+    __table_args__ = (Index("ix_company_terms_term_company", "term_id", "company_id"),)
+
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True
+    )
+    term_id:    Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("terms.id", ondelete="CASCADE"), primary_key=True
+    )
+
 class CompanySearchRun(Base):
     """
     One row per POST /mixed_companies/search call you make.
     Stores breadcrumbs, pagination, etc.
+
+    On MySQL the table is RANGE-partitioned by month on created_at, so the
+    physical primary key is (id, created_at); see app/retention.py.
     """
     __tablename__ = "company_search_runs"
 
@@ -185,22 +269,28 @@ class CompanySearchRun(Base):
     total_entries   = mapped_column(Integer)
     total_pages     = mapped_column(Integer)
     raw_json        = mapped_column(JSON)
-    created_at      = mapped_column(DateTime, default=datetime.utcnow)
+    created_at      = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    # relationship to the individual hits
-    results = relationship("CompanySearchResults", back_populates="run")
+    # relationship to the individual hits (no DB-level FK: partitioned
+    # InnoDB tables can't have foreign keys)
+    results = relationship(
+        "CompanySearchResults",
+        primaryjoin="CompanySearchRun.id == foreign(CompanySearchResults.run_id)",
+        back_populates="run",
+    )
 
 class CompanySearchResults(Base):
     """
     One row per organization returned *on the first page*.
-    We’ll insert only the FIRST hit we actually use, but the schema
-    can hold more if you want later.
+    `company_id` is set on the hit we actually used for domain
+    resolution; the others are purged after a few days (app/retention.py).
+    Partitioned by month on matched_at like company_search_runs.
     """
     __tablename__ = "company_search_results"
 
     id              = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    run_id          = mapped_column(BigInteger, ForeignKey("company_search_runs.id", ondelete="CASCADE"))
-    company_id      = mapped_column(BigInteger, ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    run_id          = mapped_column(BigInteger, index=True)
+    company_id      = mapped_column(BigInteger, nullable=True, index=True)
     apollo_org_id   = mapped_column(String(40))
     name            = mapped_column(String(255))
     primary_domain  = mapped_column(String(255))
@@ -211,7 +301,11 @@ class CompanySearchResults(Base):
     publicly_traded_symbol   = mapped_column(String(20))
     publicly_traded_exchange = mapped_column(String(20))
     alexa_ranking   = mapped_column(Integer)
-    matched_at      = mapped_column(DateTime, default=datetime.utcnow)
+    matched_at      = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     raw_json        = mapped_column(JSON)
 
-    run     = relationship("CompanySearchRun", back_populates="results")
+    run     = relationship(
+        "CompanySearchRun",
+        primaryjoin="foreign(CompanySearchResults.run_id) == CompanySearchRun.id",
+        back_populates="results",
+    )
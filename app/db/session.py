@@ -1,13 +1,189 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+"""
+Engines and sessions, with reads routed to replicas.
+
+`SessionLocal()` returns a `RoutingSession`. Statements go to the primary
+when
+
+* the session was opened for writing (`with SessionLocal() as db, db.begin():`
+  or `SessionLocal(primary=True)`) – read-modify-write code must not read a
+  lagging copy;
+* it is flushing, or runs an INSERT / UPDATE / DELETE / SELECT … FOR UPDATE;
+* the session has written before (it stays on the primary for good), or
+  anything in the current request / task has (read-your-writes: the
+  context is pinned until the request ends or the next task starts – see
+  `reset_pin()`);
+* no replica is configured (MYSQL_REPLICA_URIS) or none is healthy.
+
+Everything else – plain `with SessionLocal() as db:` reads – goes to a
+replica. `SessionLocal(bulk_read=True)` is for large exports that don't need
+read-your-writes: its reads go to a replica even when the context is pinned
+(only a session that writes itself moves to the primary). A replica is
+picked at random among those whose lag is at most
+`replica_max_lag_seconds`. Lag is read from `SHOW REPLICA STATUS` at most
+every `replica_check_seconds` per replica and process; a replica whose
+replication thread is stopped or that can't be reached is skipped until the
+next check. One session sticks to the replica it first picked.
+"""
+import logging, os, random, threading, time
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, SessionTransactionOrigin, sessionmaker
 from app.core.settings import get_settings
 
-settings = get_settings()
-engine = create_engine(
-    settings.mysql_uri,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    pool_recycle=1800,
-)
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+log = logging.getLogger("db")
+
+# The engine (and its connection pool) is created lazily, once per process.
+# Celery's prefork pool forks children after the parent has imported this
+# module; creating the pool at import time would hand the same sockets to
+# every child. We remember the pid that built the engine and rebuild it on
+# first use in a new process.
+_engine: Engine | None = None
+_engine_pid: int | None = None
+
+# replicas follow the same rule; url → (engine, checked_at, healthy)
+_replicas: dict[str, list] = {}
+_replicas_pid: int | None = None
+_replicas_lock = threading.Lock()
+
+# set once anything in this request / task has written
+_pinned: ContextVar[bool] = ContextVar("db_pinned", default=False)
+
+
+def _create(url: str) -> Engine:
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=1800,
+    )
+
+
+def get_engine() -> Engine:
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        if _engine is not None:
+            # inherited from the parent: drop the pool *without* closing the
+            # parent's connections (close=False), just forget about them
+            _engine.dispose(close=False)
+        _engine = _create(get_settings().mysql_uri)
+        _engine_pid = os.getpid()
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Forget the current pools; the next `get_engine()` builds a fresh one.
+
+    Hooked to Celery's `worker_process_init` so each forked child starts
+    with its own connections.
+    """
+    global _engine, _engine_pid, _replicas_pid
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    _engine_pid = None
+    for engine, _, _ in _replicas.values():
+        engine.dispose(close=False)
+    _replicas.clear()
+    _replicas_pid = None
+
+
+# --- replicas -----------------------------------------------------------------
+def replica_lag(engine: Engine) -> float | None:
+    """Seconds behind the primary; None when replication is stopped."""
+    if engine.dialect.name != "mysql":
+        return 0.0
+    with engine.connect() as conn:
+        try:
+            row = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+        except Exception:                   # MySQL < 8.0.22
+            row = conn.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+    if row is None:
+        return 0.0                          # not a replica at all
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+
+def _healthy(url: str, entry: list, now: float) -> bool:
+    engine, checked_at, healthy = entry
+    settings = get_settings()
+    if now - checked_at < settings.replica_check_seconds:
+        return healthy
+    try:
+        lag = replica_lag(engine)
+    except Exception as exc:
+        log.warning("Replica %s unreachable: %s", engine.url.host, exc)
+        lag = None
+    else:
+        if lag is None or lag > settings.replica_max_lag_seconds:
+            log.warning("Replica %s skipped (lag %s)", engine.url.host, lag)
+    healthy = lag is not None and lag <= settings.replica_max_lag_seconds
+    entry[1:] = [now, healthy]
+    return healthy
+
+
+def pick_replica() -> Engine | None:
+    """A healthy replica engine, or None to use the primary."""
+    global _replicas_pid
+    urls = [u.strip() for u in get_settings().mysql_replica_uris.split(",") if u.strip()]
+    if not urls:
+        return None
+    with _replicas_lock:
+        if _replicas_pid != os.getpid():
+            for engine, _, _ in _replicas.values():
+                engine.dispose(close=False)
+            _replicas.clear()
+            _replicas_pid = os.getpid()
+        for url in urls:
+            if url not in _replicas:
+                _replicas[url] = [_create(url), float("-inf"), False]
+        now = time.monotonic()
+        healthy = [_replicas[u][0] for u in urls if _healthy(u, _replicas[u], now)]
+    return random.choice(healthy) if healthy else None
+
+
+def reset_pin() -> None:
+    """Start a new read-your-writes scope (called before each Celery task)."""
+    _pinned.set(False)
+
+
+# --- sessions -----------------------------------------------------------------
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._wants_primary(clause):
+            return get_engine()
+        if "replica" not in self.info:
+            self.info["replica"] = pick_replica()
+        return self.info["replica"] or get_engine()
+
+    def _wants_primary(self, clause) -> bool:
+        if self.info.get("primary") or self._flushing:
+            return True
+        if _pinned.get() and not self.info.get("bulk_read"):
+            return True
+        if clause is not None and (
+            getattr(clause, "is_dml", False) or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self._mark_written()
+            return True
+        transaction = self.get_transaction()
+        return transaction is not None and transaction.origin is SessionTransactionOrigin.BEGIN
+
+    def _mark_written(self) -> None:
+        self.info["primary"] = True
+        _pinned.set(True)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_write(session: RoutingSession, flush_context) -> None:
+    session._mark_written()
+
+
+_SessionFactory = sessionmaker(class_=RoutingSession, expire_on_commit=False)
+
+
+def SessionLocal(primary: bool = False, bulk_read: bool = False, **kwargs) -> Session:
+    """Open a session bound to this process' engines (see module docstring)."""
+    return _SessionFactory(info={"primary": primary, "bulk_read": bulk_read}, **kwargs)
@@ -0,0 +1,213 @@
+"""
+Streaming export of enriched companies joined with their people.
+
+One row per (company, person) – companies without people still get one
+row with empty person columns. Rows come off a server-side cursor
+(`stream_results` + `yield_per`) and are encoded one partition at a time,
+so memory stays flat regardless of how many rows match.
+
+    python -m app.export --format csv --updated-from 2025-07-01 > out.csv
+    python -m app.export --format parquet --out enriched.parquet
+
+Over HTTP the same stream is GET /export/enriched, with
+`Authorization: Bearer $EXPORT_TOKEN` – without EXPORT_TOKEN the endpoint is
+off. Rows are read from a replica whenever one is healthy.
+
+Parquet needs `pyarrow` (optional; not installed by default).
+"""
+from __future__ import annotations
+
+import argparse, csv, io, json, sys
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import Select, and_, or_, select
+
+from app.db.models import Company, CompanyPeople, OrganizationDetails, Person, PersonDetails
+from app.db.session import SessionLocal
+
+FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson":  "application/x-ndjson",
+    "csv":     "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+BATCH_SIZE = 2000
+
+COLUMNS = {
+    "company_id":                Company.id,
+    "company_name":              Company.name,
+    "apollo_org_id":             Company.apollo_org_id,
+    "domain_resolved":           Company.domain_resolved,
+    "industry":                  Company.industry,
+    "employee_count":            Company.employee_count,
+    "revenue":                   Company.revenue,
+    "company_city":              Company.location_city,
+    "company_country":           Company.location_country,
+    "company_enriched_at":       Company.enriched_at,
+    "company_updated_at":        Company.updated_at,
+    "org_website_url":           OrganizationDetails.website_url,
+    "org_linkedin_url":          OrganizationDetails.linkedin_url,
+    "org_phone":                 OrganizationDetails.phone,
+    "org_founded_year":          OrganizationDetails.founded_year,
+    "person_id":                 Person.id,
+    "apollo_person_id":          Person.apollo_person_id,
+    "first_name":                Person.first_name,
+    "last_name":                 Person.last_name,
+    "title":                     Person.title,
+    "seniority":                 Person.seniority,
+    "email":                     Person.email,
+    "phone":                     Person.phone,
+    "personal_phone":            Person.personal_phone,
+    "phone_verification_status": Person.phone_verification_status,
+    "person_linkedin_url":       Person.linkedin_url,
+    "person_city":               Person.location_city,
+    "person_country":            Person.location_country,
+    "person_enriched_at":        Person.enriched_at,
+    "person_updated_at":         Person.updated_at,
+    "headline":                  PersonDetails.headline,
+    "email_status":              PersonDetails.email_status,
+    "webhook_phone_number":      PersonDetails.webhook_phone_number,
+}
+
+
+def export_query(updated_from: datetime | None = None, updated_to: datetime | None = None) -> Select:
+    """A row counts as updated when either the company or the person changed."""
+    stmt = (
+        select(*(col.label(name) for name, col in COLUMNS.items()))
+        .select_from(Company)
+        .outerjoin(OrganizationDetails, OrganizationDetails.company_id == Company.id)
+        .outerjoin(CompanyPeople, CompanyPeople.company_id == Company.id)
+        .outerjoin(Person, Person.id == CompanyPeople.person_id)
+        .outerjoin(PersonDetails, PersonDetails.person_id == Person.id)
+        .order_by(Company.id)
+    )
+    if updated_from is not None or updated_to is not None:
+        # both bounds on the same side: a company changed before the window
+        # plus a person changed after it is not a change inside the window
+        stmt = stmt.where(or_(
+            _in_window(Company.updated_at, updated_from, updated_to),
+            _in_window(Person.updated_at, updated_from, updated_to),
+        ))
+    return stmt
+
+
+def _in_window(col, updated_from: datetime | None, updated_to: datetime | None):
+    bounds = []
+    if updated_from is not None:
+        bounds.append(col >= updated_from)
+    if updated_to is not None:
+        bounds.append(col < updated_to)
+    return and_(*bounds)
+
+
+def iter_batches(updated_from: datetime | None = None, updated_to: datetime | None = None) -> Iterator[list[dict]]:
+    # a replica whenever one is healthy – bulk reads stay off the primary
+    with SessionLocal(bulk_read=True) as db:
+        result = db.execute(
+            export_query(updated_from, updated_to),
+            execution_options={"stream_results": True, "yield_per": BATCH_SIZE},
+        )
+        for part in result.mappings().partitions():
+            yield [dict(row) for row in part]
+
+
+# --- encoders (each yields bytes) -------------------------------------------
+def _ndjson(batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(json.dumps(r, default=str) + "\n" for r in rows).encode()
+
+
+def _csv(batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(COLUMNS))
+    writer.writeheader()
+    for rows in batches:
+        writer.writerows(rows)
+        yield buf.getvalue().encode()
+        buf.seek(0); buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink pyarrow can stream into; we hand out what it wrote."""
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _parquet(batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    import pyarrow as pa, pyarrow.parquet as pq
+
+    arrow_types = {int: pa.int64(), str: pa.string(), bool: pa.bool_(), datetime: pa.timestamp("us")}
+    schema = pa.schema([
+        pa.field(name, arrow_types.get(col.type.python_type, pa.string()))
+        for name, col in COLUMNS.items()
+    ])
+    sink = _Drain()
+    # one row group per batch, flushed to the caller as soon as it's written
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def stream_export(
+    fmt: str,
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+) -> Iterator[bytes]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    if fmt == "parquet" and not parquet_available():
+        raise RuntimeError("Parquet export needs pyarrow installed")
+    encoder = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}[fmt]
+    return encoder(iter_batches(updated_from, updated_to))
+
+
+# --- CLI ----------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Stream enriched companies + people")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--updated-from", type=datetime.fromisoformat)
+    parser.add_argument("--updated-to", type=datetime.fromisoformat)
+    parser.add_argument("--out", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        for chunk in stream_export(args.format, args.updated_from, args.updated_to):
+            out.write(chunk)
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Version history for the raw Apollo payloads we overwrite.
+
+Every committed change to
+
+    person           person_details.raw_json        (search stub / match)
+    person_contact   person_details.contact_blob    (phone webhook)
+    org              organization_details.raw_json  (org enrich)
+
+appends a `payload_history` row holding an RFC 6902 JSON patch from the
+previous version to the new one. Every `history_keyframe_every`-th version –
+and whenever a patch wouldn't be much smaller than the document, or the
+previous value isn't known – stores the full document instead, so rebuilding
+a version replays at most that many patches:
+
+    payload_at(db, "person", 42, at=datetime(2025, 7, 1))
+
+Nothing has to call this module: importing it hooks the ORM session. The
+previous value is the one loaded from the database (attribute history), and
+rows are written in `before_commit`, once per transaction – a person whose
+raw_json goes stub → matched blob inside one transaction gets one version.
+Writes that bypass the ORM (bulk UPDATEs) are not recorded, and the next
+patch is taken against whatever the ORM loaded – keep raw payload writes on
+the ORM path.
+"""
+from __future__ import annotations
+
+import copy, json, logging
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings
+from app.db.models import OrganizationDetails, PayloadHistory, PersonDetails
+
+log = logging.getLogger("history")
+
+# (model, attribute) → history kind; the entity id is the model's primary key
+TRACKED: dict[tuple[type, str], str] = {
+    (PersonDetails, "raw_json"):       "person",
+    (PersonDetails, "contact_blob"):   "person_contact",
+    (OrganizationDetails, "raw_json"): "org",
+}
+KINDS = tuple(TRACKED.values())
+
+_INFO_KEY = "payload_history"
+_UNKNOWN = object()
+# a patch at least this share of the full document's size is stored as a keyframe
+KEYFRAME_SIZE_RATIO = 0.5
+
+
+# --- RFC 6902 -----------------------------------------------------------------
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # 1 == True == 1.0 in Python but not in JSON
+    return type(a) is type(b) and a == b
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    """add / remove / replace operations turning `old` into `new`."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            sub = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": sub, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, sub))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops.extend(json_diff(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old), len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        # trailing removals back to front so the indexes stay valid
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        return ops
+    return [] if _same(old, new) else [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(doc: Any, ops: list[dict]) -> Any:
+    """Apply add / remove / replace operations to a copy of `doc`."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind, path = op["op"], op["path"]
+        if path == "":
+            if kind not in ("add", "replace"):
+                raise ValueError(f"cannot {kind} the document root")
+            doc = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(t) for t in path.split("/")[1:]]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if kind == "add":
+                target.insert(index, copy.deepcopy(op["value"]))
+            elif kind == "remove":
+                del target[index]
+            elif kind == "replace":
+                target[index] = copy.deepcopy(op["value"])
+            else:
+                raise ValueError(f"unsupported op {kind!r}")
+        else:
+            if kind in ("add", "replace"):
+                target[last] = copy.deepcopy(op["value"])
+            elif kind == "remove":
+                del target[last]
+            else:
+                raise ValueError(f"unsupported op {kind!r}")
+    return doc
+
+
+# --- writes -------------------------------------------------------------------
+def _size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def record(db: Session, kind: str, entity_id: int, old: Any, new: Any) -> PayloadHistory | None:
+    """Append the change old → new as the next version (None when unchanged)."""
+    latest, latest_keyframe = db.execute(
+        select(
+            func.max(PayloadHistory.version),
+            func.max(case((PayloadHistory.is_keyframe.is_(True), PayloadHistory.version))),
+        ).where(PayloadHistory.kind == kind, PayloadHistory.entity_id == entity_id)
+    ).one()
+    if latest is not None and old is not _UNKNOWN and _same(old, new):
+        return None
+
+    version = (latest or 0) + 1
+    keyframe = (
+        latest is None or old is _UNKNOWN
+        or version - (latest_keyframe or 0) >= get_settings().history_keyframe_every
+    )
+    doc = new
+    if not keyframe:
+        ops = json_diff(old, new)
+        if not ops:
+            return None
+        if _size(ops) < _size(new) * KEYFRAME_SIZE_RATIO:
+            doc = ops
+        else:
+            keyframe = True
+
+    row = PayloadHistory(
+        kind=kind, entity_id=entity_id, version=version,
+        is_keyframe=keyframe, doc=doc, created_at=datetime.utcnow(),
+    )
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        # a concurrent writer took this version; our diff base is stale too,
+        # so store the full document after theirs
+        row = PayloadHistory(
+            kind=kind, entity_id=entity_id, version=version + 1,
+            is_keyframe=True, doc=new, created_at=datetime.utcnow(),
+        )
+        with db.begin_nested():
+            db.add(row)
+    return row
+
+
+@event.listens_for(Session, "before_flush")
+def _collect(session: Session, flush_context, instances) -> None:
+    """Remember each tracked attribute's value as of the start of the transaction."""
+    pending = session.info.setdefault(_INFO_KEY, {})
+    for obj in (*session.new, *session.dirty):
+        for (model, attr), kind in TRACKED.items():
+            if not isinstance(obj, model) or (kind, obj) in pending:
+                continue
+            hist = inspect(obj).attrs[attr].history
+            if not hist.added:
+                continue
+            if obj in session.new:
+                before = None
+            elif hist.deleted:
+                before = hist.deleted[0]
+            else:
+                before = _UNKNOWN                   # attribute wasn't loaded
+            pending[(kind, obj)] = (attr, before)
+
+
+@event.listens_for(Session, "before_commit")
+def _write(session: Session) -> None:
+    if session.in_nested_transaction():
+        return                                      # only the outer commit counts
+    session.flush()
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    for (kind, obj), (attr, before) in pending.items():
+        state = inspect(obj)
+        if state.deleted or state.detached or state.was_deleted:
+            continue                                # e.g. folded into another person
+        record(session, kind, state.identity[0], before, getattr(obj, attr))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_INFO_KEY, None)
+
+
+# --- reads --------------------------------------------------------------------
+def versions(db: Session, kind: str, entity_id: int) -> list[PayloadHistory]:
+    return db.scalars(
+        select(PayloadHistory)
+        .where(PayloadHistory.kind == kind, PayloadHistory.entity_id == entity_id)
+        .order_by(PayloadHistory.version)
+    ).all()
+
+
+def payload_at(
+    db: Session, kind: str, entity_id: int,
+    at: datetime | None = None, version: int | None = None,
+) -> tuple[PayloadHistory, Any] | None:
+    """The version current at `at` (or exactly `version`) and its rebuilt payload."""
+    where = [PayloadHistory.kind == kind, PayloadHistory.entity_id == entity_id]
+    if version is not None:
+        where.append(PayloadHistory.version == version)
+    if at is not None:
+        where.append(PayloadHistory.created_at <= at)
+    target = db.scalars(
+        select(PayloadHistory).where(*where).order_by(PayloadHistory.version.desc()).limit(1)
+    ).first()
+    if target is None:
+        return None
+    if target.is_keyframe:
+        return target, target.doc
+
+    base = db.scalar(
+        select(func.max(PayloadHistory.version)).where(
+            PayloadHistory.kind == kind, PayloadHistory.entity_id == entity_id,
+            PayloadHistory.is_keyframe.is_(True), PayloadHistory.version < target.version,
+        )
+    )
+    if base is None:
+        raise LookupError(f"{kind} {entity_id} v{target.version} has no keyframe before it")
+    chain = db.scalars(
+        select(PayloadHistory).where(
+            PayloadHistory.kind == kind, PayloadHistory.entity_id == entity_id,
+            PayloadHistory.version.between(base, target.version),
+        ).order_by(PayloadHistory.version)
+    ).all()
+    doc = chain[0].doc
+    for row in chain[1:]:
+        doc = apply_patch(doc, row.doc)
+    return target, doc
@@ -0,0 +1,257 @@
+"""
+Person identity: one `people` row per human, whatever Apollo id they carry.
+
+Apollo mints a new person id when somebody changes jobs, so keying on
+`apollo_person_id` alone creates a second row (and pays for a second
+/people/match). `person_identities` maps normalised keys to the person
+that owns them:
+
+    linkedin   in/<slug>                 from linkedin_url
+    email      lower-cased address       from email / personal_email
+    phone      +<digits>                 from personal_phone
+    apollo     Apollo person id          extra ids of a merged person
+
+`(kind, key)` is unique, so a lookup is a single index probe.
+`enrich_company` finds people through `find_person` and registers their
+keys with `resolve_identity`, which merges rows that turn out to be the same
+human. Which Apollo ids are stored at all is also tracked in-process
+(app/known_ids.py), so a new id skips the lookups. Rows written before this table existed are handled by
+
+    python -m app.identity dedupe [--chunk N]
+
+Only personal keys are used: `people.phone` can be the company switchboard
+(see mapping.primary_phone) and the search-stub email is a placeholder.
+"""
+from __future__ import annotations
+
+import argparse, logging, re
+from typing import Iterable
+from urllib.parse import unquote
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import known_ids
+from app.db.models import CompanyPeople, Person, PersonDetails, PersonIdentity
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+
+log = logging.getLogger("identity")
+
+DEDUPE_CHUNK = 1000
+
+_LINKEDIN = re.compile(r"linkedin\.com/(in|pub)/([^/?#]+)", re.I)
+_NON_DIGIT = re.compile(r"\D")
+
+
+# --- normalisation ------------------------------------------------------------
+def normalize_linkedin(url: str | None) -> str | None:
+    m = _LINKEDIN.search(url or "")
+    return f"{m.group(1).lower()}/{unquote(m.group(2)).strip().lower()}" if m else None
+
+
+def normalize_email(email: str | None) -> str | None:
+    email = (email or "").strip().lower()
+    local, at, host = email.partition("@")
+    # Apollo's redacted placeholder ("email_not_unlocked@domain.com")
+    if not (local and at and "." in host) or "not_unlocked" in local:
+        return None
+    return email[:255]
+
+
+def normalize_phone(phone: str | None) -> str | None:
+    digits = _NON_DIGIT.sub("", phone or "")
+    return f"+{digits}" if len(digits) >= 8 else None
+
+
+def identity_keys(person: Person) -> set[tuple[str, str]]:
+    keys = {
+        ("linkedin", normalize_linkedin(person.linkedin_url)),
+        ("email",    normalize_email(person.email)),
+        ("email",    normalize_email(person.personal_email)),
+        ("phone",    normalize_phone(person.personal_phone)),
+    }
+    return {(kind, key) for kind, key in keys if key}
+
+
+def stub_keys(stub: dict) -> set[tuple[str, str]]:
+    """Keys available before /people/match – just the LinkedIn profile."""
+    key = normalize_linkedin(stub.get("linkedin_url"))
+    return {("linkedin", key)} if key else set()
+
+
+# --- lookups ------------------------------------------------------------------
+def _owners(db: Session, keys: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(PersonIdentity.kind, PersonIdentity.key, PersonIdentity.person_id)
+        .where(or_(*(and_(PersonIdentity.kind == k, PersonIdentity.key == v) for k, v in keys)))
+    )
+    return {(kind, key): pid for kind, key, pid in rows}
+
+
+def find_people(db: Session, apollo_ids: Iterable[str], filtered: bool = True) -> dict[str, Person]:
+    """apollo id → Person, including ids aliased to a merged person.
+
+    With `filtered`, ids the known-id index (app/known_ids.py) has never
+    seen are not looked up, and ids it has a primary key for are loaded by it.
+    """
+    apollo_ids = list(apollo_ids)
+    found: dict[str, Person] = {}
+    known = known_ids.get_known_ids() if filtered else None
+    if known is not None:
+        by_pk = {a: pk for a in apollo_ids if (pk := known.pk(a)) is not None}
+        if by_pk:
+            people = {p.id: p for p in db.scalars(select(Person).where(Person.id.in_(set(by_pk.values()))))}
+            for apollo_id, pk in by_pk.items():
+                if pk in people:
+                    found[apollo_id] = people[pk]
+                else:
+                    known.forget(apollo_id)         # merged away since
+        apollo_ids = [a for a in apollo_ids if a not in found and known.might_exist(a)]
+    if not apollo_ids:
+        return found
+
+    found.update({
+        p.apollo_person_id: p
+        for p in db.scalars(select(Person).where(Person.apollo_person_id.in_(apollo_ids)))
+    })
+    if missing := [a for a in apollo_ids if a not in found]:
+        aliases = dict(db.execute(
+            select(PersonIdentity.key, PersonIdentity.person_id)
+            .where(PersonIdentity.kind == "apollo", PersonIdentity.key.in_(missing))
+        ).all())
+        for apollo_id, pid in aliases.items():
+            found[apollo_id] = db.get(Person, pid)
+    if known is not None:
+        for apollo_id in apollo_ids:
+            if (person := found.get(apollo_id)) is not None:
+                known.remember(apollo_id, person.id)
+    return found
+
+
+def find_person(db: Session, apollo_id: str, keys: Iterable[tuple[str, str]] = ()) -> Person | None:
+    """By Apollo id (or alias) first, then by any identity key."""
+    if person := find_people(db, [apollo_id]).get(apollo_id):
+        return person
+    owners = _owners(db, keys)
+    return db.get(Person, min(owners.values())) if owners else None
+
+
+# --- writes -------------------------------------------------------------------
+def claim_keys(db: Session, person_id: int, keys: Iterable[tuple[str, str]]) -> None:
+    """Register keys nobody owns yet; keys owned by someone else are left alone."""
+    owners = _owners(db, keys)
+    for kind, key in set(keys) - owners.keys():
+        try:
+            with db.begin_nested():
+                db.execute(insert(PersonIdentity), [{"kind": kind, "key": key, "person_id": person_id}])
+        except IntegrityError:
+            continue                    # claimed concurrently
+        if kind == "apollo":
+            known_ids.add(db, key, person_id)
+
+
+def merge_people(db: Session, keep: Person, dupe: Person) -> None:
+    """Fold `dupe` into `keep`: links, details, identities; then delete `dupe`."""
+    # columns keep is missing come from the duplicate
+    for col in Person.__table__.columns:
+        if col.primary_key or col.computed is not None or col.name == "apollo_person_id":
+            continue
+        if getattr(keep, col.key) is None and getattr(dupe, col.key) is not None:
+            setattr(keep, col.key, getattr(dupe, col.key))
+    keep_details = db.get(PersonDetails, keep.id)
+    dupe_details = db.get(PersonDetails, dupe.id)
+    if keep_details is not None and dupe_details is not None:
+        for col in PersonDetails.__table__.columns:
+            if not col.primary_key and getattr(keep_details, col.key) is None:
+                setattr(keep_details, col.key, getattr(dupe_details, col.key))
+    db.flush()
+
+    keep_companies = select(CompanyPeople.company_id).where(CompanyPeople.person_id == keep.id)
+    db.execute(
+        update(CompanyPeople)
+        .where(CompanyPeople.person_id == dupe.id, CompanyPeople.company_id.not_in(keep_companies))
+        .values(person_id=keep.id)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(CompanyPeople).where(CompanyPeople.person_id == dupe.id))
+    if dupe_details is not None:
+        if keep_details is None:
+            db.execute(
+                update(PersonDetails).where(PersonDetails.person_id == dupe.id)
+                .values(person_id=keep.id).execution_options(synchronize_session=False)
+            )
+        else:
+            db.execute(delete(PersonDetails).where(PersonDetails.person_id == dupe.id))
+        db.expunge(dupe_details)
+    db.execute(
+        update(PersonIdentity).where(PersonIdentity.person_id == dupe.id)
+        .values(person_id=keep.id).execution_options(synchronize_session=False)
+    )
+    dupe_apollo_id = dupe.apollo_person_id
+    db.execute(delete(Person).where(Person.id == dupe.id))
+    db.expunge(dupe)
+    if dupe_apollo_id:
+        claim_keys(db, keep.id, [("apollo", dupe_apollo_id)])
+    log.info("Merged person %s (%s) into %s", dupe.id, dupe_apollo_id, keep.id)
+
+
+def resolve_identity(db: Session, person: Person) -> Person:
+    """Register `person`'s keys; merge with whoever already owns one.
+
+    Returns the surviving row (the oldest id) – `person` itself unless it
+    was folded into an earlier duplicate.
+    """
+    db.flush()
+    keys = identity_keys(person)
+    others = {pid for pid in _owners(db, keys).values() if pid != person.id}
+    if not others:
+        claim_keys(db, person.id, keys)
+        return person
+
+    ids = sorted(others | {person.id})
+    keep = person if ids[0] == person.id else db.get(Person, ids[0])
+    for pid in ids[1:]:
+        merge_people(db, keep, person if pid == person.id else db.get(Person, pid))
+    claim_keys(db, keep.id, identity_keys(keep))
+    return keep
+
+
+def dedupe(chunk_size: int = DEDUPE_CHUNK) -> int:
+    """Register keys for every person, merging duplicates; returns merges."""
+    merged, last = 0, 0
+    while True:
+        with SessionLocal() as db, db.begin():
+            people = db.scalars(
+                select(Person).where(Person.id > last).order_by(Person.id).limit(chunk_size)
+            ).all()
+            if not people:
+                break
+            last = people[-1].id
+            for person in people:
+                if person not in db:
+                    continue            # already folded into an earlier row
+                if resolve_identity(db, person) is not person:
+                    merged += 1
+        log.info("Identity dedupe up to person %s: %d merged so far", last, merged)
+    return merged
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Person identity maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    dd = sub.add_parser("dedupe", help="index identity keys for all people and merge duplicates")
+    dd.add_argument("--chunk", type=int, default=DEDUPE_CHUNK)
+    args = parser.parse_args(argv)
+
+    setup_logging("cli")
+    if args.cmd == "dedupe":
+        dedupe(args.chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+In-process index of the Apollo person ids we already store.
+
+`find_people` used to probe `people.apollo_person_id` (and then the
+`apollo` aliases in `person_identities`) for every stub and every phone
+webhook. Each process now keeps
+
+* a Bloom filter of every stored Apollo id – own ids and aliases. "Not in
+  the filter" means the person is new: the two probes are skipped and the
+  stub goes straight to an INSERT, and the webhook is parked without opening
+  a connection;
+* a bounded LRU of apollo id → people.id, filled as ids are written or
+  announced, so a known id is loaded by primary key instead of through the
+  secondary index.
+
+The filter's bits also live in Redis as a bitmap (`known_ids:bloom:<size>:<k>`,
+so resizing starts a new one). Processes load that bitmap instead of scanning
+the tables. Only when it is missing (first deploy, Redis flushed) does one
+process, holding a build lock, scan people and person_identities on a replica
+and OR the result in; the others wait for the `:ready` marker. Until a process
+has loaded the filter every id counts as "maybe stored" and the old queries run.
+
+Writers announce new ids (a new person, an alias claimed on a job change or
+merge) with `add()`. Once the writing session commits, the local copy is
+updated, the id's bits are SETBIT in the shared bitmap and the id is
+PUBLISHed on `known_ids:people` for every other process; a rolled-back insert
+is never announced. The thread subscribes *before* loading the bitmap, so
+nothing announced meanwhile is missed, and a broken subscription reloads the
+bitmap rather than rescanning.
+
+Neither structure is trusted blindly:
+
+* a cached pk whose row is gone (merged away) reads as a miss and is dropped;
+* an id that did not reach this process in time (announced by another
+  worker a moment ago) makes the stub INSERT fail on the unique key.
+  `enrich_company` then retries that one stub through the queries.
+  A webhook for such an id is parked, and the pending-webhook sweep, which
+  does not consult the filter, applies it.
+"""
+from __future__ import annotations
+
+import logging, math, os, threading, time
+from collections import OrderedDict
+from hashlib import blake2b
+
+import redis
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.db.models import Person, PersonIdentity
+from app.db.session import SessionLocal
+
+log = logging.getLogger("identity")
+
+CHANNEL = "known_ids:people"
+WARM_CHUNK = 50_000
+RETRY_SECONDS = 5.0
+BUILD_LOCK_SECONDS = 900        # a builder that dies lets the next one in after this
+SNAPSHOT_POLL_SECONDS = 2.0
+
+
+def bloom_layout(capacity: int, error_rate: float) -> tuple[int, int]:
+    """(bits, hashes) for `capacity` keys at `error_rate` false positives."""
+    capacity = max(capacity, 1)
+    size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    return size, max(1, round(size / capacity * math.log(2)))
+
+
+def bloom_positions(key: str, size: int, hashes: int) -> list[int]:
+    """k bit offsets for `key` (double hashing over one blake2b digest)."""
+    digest = blake2b(key.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % size for i in range(hashes)]
+
+
+class BloomFilter:
+    """Bit array + k positions per key. Bits are numbered like Redis SETBIT
+    (offset 0 is the high bit of byte 0), so the array loads from and merges
+    into the shared bitmap as is."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size, self.hashes = bloom_layout(capacity, error_rate)
+        self.capacity = max(capacity, 1)
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        return bloom_positions(key, self.size, self.hashes)
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 0x80 >> (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (0x80 >> (pos & 7)) for pos in self._positions(key))
+
+    def load(self, bits: bytes) -> None:
+        """Take over a snapshot; `count` becomes the usual fill-ratio estimate."""
+        self.bits[:len(bits)] = bits[:len(self.bits)]
+        ones = int.from_bytes(self.bits, "big").bit_count()
+        if ones >= self.size:
+            self.count = self.capacity * 10             # saturated: far past capacity
+        else:
+            self.count = round(-self.size / self.hashes * math.log(1 - ones / self.size))
+
+
+def _layout() -> tuple[int, int]:
+    settings = get_settings()
+    return bloom_layout(settings.known_ids_capacity, settings.known_ids_error_rate)
+
+
+def snapshot_key() -> str:
+    """The shared bitmap for the configured layout."""
+    return "known_ids:bloom:%d:%d" % _layout()
+
+
+class KnownIds:
+    def __init__(self):
+        settings = get_settings()
+        self.lru_size = settings.known_ids_lru_size
+        self.bloom = self._new_bloom()
+        self.ready = False
+        self._lru: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="known-ids", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        settings = get_settings()
+        return BloomFilter(settings.known_ids_capacity, settings.known_ids_error_rate)
+
+    # --- reads ----------------------------------------------------------------
+    def might_exist(self, apollo_id: str) -> bool:
+        """False only when the id is certainly not stored (filter warm, no hit)."""
+        return not self.ready or apollo_id in self.bloom
+
+    def pk(self, apollo_id: str) -> int | None:
+        with self._lock:
+            pk = self._lru.get(apollo_id)
+            if pk is not None:
+                self._lru.move_to_end(apollo_id)
+            return pk
+
+    # --- writes ---------------------------------------------------------------
+    def remember(self, apollo_id: str, pk: int | None = None) -> None:
+        with self._lock:
+            self.bloom.add(apollo_id)
+            if pk is not None:
+                self._lru[apollo_id] = pk
+                self._lru.move_to_end(apollo_id)
+                if len(self._lru) > self.lru_size:
+                    self._lru.popitem(last=False)
+
+    def forget(self, apollo_id: str) -> None:
+        with self._lock:
+            self._lru.pop(apollo_id, None)
+
+    # --- background sync --------------------------------------------------------
+    def _load(self) -> None:
+        """Swap in the shared bitmap, building it first if nobody has."""
+        r, key = get_redis(), snapshot_key()
+        while not r.exists(f"{key}:ready"):
+            if r.set(f"{key}:build", os.getpid(), nx=True, ex=BUILD_LOCK_SECONDS):
+                try:
+                    self._build(r, key)
+                finally:
+                    r.delete(f"{key}:build")
+            else:
+                time.sleep(SNAPSHOT_POLL_SECONDS)   # another process is scanning
+        fresh = self._new_bloom()
+        fresh.load(r.get(key) or b"")
+        with self._lock:
+            self.bloom = fresh
+        self.ready = True
+        if fresh.count > fresh.capacity:
+            log.warning("Known-id filter holds ~%d ids, sized for %d – raise KNOWN_IDS_CAPACITY",
+                        fresh.count, fresh.capacity)
+
+    @staticmethod
+    def _build(r: redis.Redis, key: str) -> None:
+        """Scan the stored ids on a replica and OR them into the shared bitmap.
+        Ids announced during the scan were SETBIT into it already; OR keeps them."""
+        started = time.monotonic()
+        bloom = KnownIds._new_bloom()
+        with SessionLocal(bulk_read=True) as db:
+            for model, id_col, where in (
+                (Person, Person.apollo_person_id, Person.apollo_person_id.is_not(None)),
+                (PersonIdentity, PersonIdentity.key, PersonIdentity.kind == "apollo"),
+            ):
+                last = 0
+                while True:
+                    rows = db.execute(
+                        select(model.id, id_col)
+                        .where(model.id > last, where).order_by(model.id).limit(WARM_CHUNK)
+                    ).all()
+                    for _, apollo_id in rows:
+                        bloom.add(apollo_id)
+                    if len(rows) < WARM_CHUNK:
+                        break
+                    last = rows[-1][0]
+        pipe = r.pipeline()
+        pipe.set(f"{key}:scan", bytes(bloom.bits))
+        pipe.bitop("OR", key, key, f"{key}:scan")
+        pipe.delete(f"{key}:scan")
+        pipe.set(f"{key}:ready", int(time.time()))
+        pipe.execute()
+        log.info("Known-id filter built from %d ids in %.1fs",
+                 bloom.count, time.monotonic() - started)
+
+    def _apply(self, data: bytes) -> None:
+        apollo_id, _, pk = data.decode().partition(" ")
+        self.remember(apollo_id, int(pk) if pk else None)
+
+    def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                self._load()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._apply(message["data"])
+            except Exception as exc:
+                log.warning("Known-id filter out of sync (%s); reloading in %.0fs",
+                            exc, RETRY_SECONDS)
+            finally:
+                self.ready = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(RETRY_SECONDS)
+
+
+# --- per-process instance ------------------------------------------------
+# Threads don't survive a fork: a child starts its own (see worker_process_init).
+_known: KnownIds | None = None
+_known_pid: int | None = None
+_known_lock = threading.Lock()
+
+
+def get_known_ids() -> KnownIds | None:
+    """This process' index (started on first use), or None when disabled."""
+    global _known, _known_pid
+    if not get_settings().known_ids_enabled:
+        return None
+    with _known_lock:
+        if _known is None or _known_pid != os.getpid():
+            _known = KnownIds()
+            _known_pid = os.getpid()
+    return _known
+
+
+def reset_known_ids() -> None:
+    global _known, _known_pid
+    _known = None
+    _known_pid = None
+
+
+_INFO_KEY = "known_ids"
+
+
+def add(db: Session, apollo_id: str, pk: int) -> None:
+    """Announce a stored Apollo id (own id or alias) owned by person `pk`
+    once `db` commits – a rolled-back insert is never announced."""
+    if get_settings().known_ids_enabled:
+        db.info.setdefault(_INFO_KEY, []).append((apollo_id, pk))
+
+
+@event.listens_for(Session, "after_commit")
+def _announce(session: Session) -> None:
+    if session.in_nested_transaction():
+        return                                      # only the outer commit counts
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    if _known is not None and _known_pid == os.getpid():
+        for apollo_id, pk in pending:
+            _known.remember(apollo_id, pk)
+    (size, hashes), key = _layout(), snapshot_key()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for apollo_id, pk in pending:
+            for pos in bloom_positions(apollo_id, size, hashes):
+                pipe.setbit(key, pos, 1)
+            pipe.publish(CHANNEL, f"{apollo_id} {pk}")
+        pipe.execute()
+    except redis.RedisError as exc:
+        log.warning("Could not announce %d known id(s): %s", len(pending), exc)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_INFO_KEY, None)
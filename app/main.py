@@ -1,16 +1,42 @@
-import logging
+import logging, uuid
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from app.api.enrich import router as enrich_router
 from app.api.webhook import router as webhooks
+from app.api.export import router as export_router
+from app.api.companies import router as companies_router
+from app.api.segments import router as segments_router
+from app.api.history import router as history_router
 
-# optional: configure logging here or in a separate app/core/logging.py
-logging.basicConfig(level=logging.INFO)
+from app.core.logging import setup_logging
+from app.core.profiling import authorized, profiled, should_profile
+
+setup_logging("api")
 log = logging.getLogger("api")
 
 app = FastAPI(title="Apollo-Zoho Enricher")
 
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """`X-Profile: <PROFILE_TOKEN>` (or PROFILE_SAMPLE_RATE) profiles one request."""
+    enabled = should_profile(authorized(request.headers.get("X-Profile")))
+    if not enabled:
+        return await call_next(request)
+    request_id = request.headers.get("X-Request-Id") or uuid.uuid4().hex[:12]
+    tag = f"{request.url.path.strip('/').replace('/', '_')}-{request_id}"
+    with profiled("request", tag):
+        return await call_next(request)
+
 # mount the enrich endpoint
 app.include_router(enrich_router)
 
-app.include_router(webhooks)
\ No newline at end of file
+app.include_router(webhooks)
+
+app.include_router(export_router)
+
+app.include_router(companies_router)
+
+app.include_router(segments_router)
+
+app.include_router(history_router)
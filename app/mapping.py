@@ -0,0 +1,169 @@
+"""
+Apollo JSON → column values.
+
+Pure functions (no DB, no I/O) shared by `enrich_company` and the offline
+re-processor (app/reprocess.py), so a column added here is filled the same
+way whether the data comes fresh from Apollo or from a stored raw_json.
+"""
+from __future__ import annotations
+
+
+def primary_phone(stub: dict) -> str | None:
+    """Return the best single phone number for either payload type."""
+    # 1) person‐level
+    if stub.get("sanitized_phone"):
+        return stub["sanitized_phone"]
+    if stub.get("phone_numbers"):
+        return stub["phone_numbers"][0].get("sanitized_number")
+
+    # 2) fallback to the nested org‐block, if present
+    org = stub.get("organization", {})
+    # Apollo sometimes gives both "sanitized_phone" *and*
+    # "primary_phone":{…}, so check both
+    if org.get("sanitized_phone"):
+        return org["sanitized_phone"]
+    if isinstance(org.get("primary_phone"), dict):
+        return org["primary_phone"].get("sanitized_number")
+
+    # 3) legacy
+    if stub.get("number"):
+        return (stub["number"] or [{}])[0].get("sanitized_number")
+
+
+# --- organizations ------------------------------------------------------------
+def company_columns(org_json: dict) -> dict:
+    """`companies` columns taken from /organizations/enrich."""
+    return {
+        "apollo_org_id":    org_json["id"],
+        "employee_count":   org_json.get("estimated_num_employees"),
+        "industry":         org_json.get("industry"),
+        "location_city":    org_json.get("city"),
+        "location_country": org_json.get("country"),
+        "revenue":          org_json.get("annual_revenue"),
+    }
+
+
+def org_detail_columns(org_json: dict) -> dict:
+    """`organization_details` columns taken from /organizations/enrich."""
+    return {
+        "website_url":              org_json.get("website_url"),
+        "blog_url":                 org_json.get("blog_url"),
+        "angellist_url":            org_json.get("angellist_url"),
+        "linkedin_url":             org_json.get("linkedin_url"),
+        "twitter_url":              org_json.get("twitter_url"),
+        "facebook_url":             org_json.get("facebook_url"),
+        "alexa_ranking":            org_json.get("alexa_ranking"),
+        "phone":                    org_json.get("sanitized_phone") or org_json.get("phone"),
+        "primary_phone":            org_json.get("primary_phone"),
+        "languages":                org_json.get("languages") or [],
+        "linkedin_uid":             org_json.get("linkedin_uid"),
+        "founded_year":             org_json.get("founded_year"),
+        "publicly_traded_symbol":   org_json.get("publicly_traded_symbol"),
+        "publicly_traded_exchange": org_json.get("publicly_traded_exchange"),
+        "logo_url":                 org_json.get("logo_url"),
+        "crunchbase_url":           org_json.get("crunchbase_url"),
+        "primary_domain":           org_json.get("primary_domain"),
+        "keywords":                 org_json.get("keywords") or [],
+        "estimated_num_employees":  org_json.get("estimated_num_employees"),
+        "industries":               org_json.get("industries") or [],
+        "secondary_industries":     org_json.get("secondary_industries") or [],
+        "snippets_loaded":          org_json.get("snippets_loaded"),
+        "industry_tag_id":          org_json.get("industry_tag_id"),
+        "industry_tag_hash":        org_json.get("industry_tag_hash"),
+        "retail_location_count":    org_json.get("retail_location_count"),
+        "raw_address":              org_json.get("raw_address"),
+        "street_address":           org_json.get("street_address"),
+        "city":                     org_json.get("city"),
+        "state":                    org_json.get("state"),
+        "postal_code":              org_json.get("postal_code"),
+        "country":                  org_json.get("country"),
+        "owned_by_organization_id": org_json.get("owned_by_organization_id"),
+        "seo_description":          org_json.get("seo_description"),
+        "short_description":        org_json.get("short_description"),
+        "suborganizations":         org_json.get("suborganizations") or [],
+        "num_suborganizations":     org_json.get("num_suborganizations"),
+        "annual_revenue_printed":   org_json.get("annual_revenue_printed"),
+        "annual_revenue":           org_json.get("annual_revenue"),
+        "total_funding":            org_json.get("total_funding"),
+        "total_funding_printed":    org_json.get("total_funding_printed"),
+        "latest_funding_round_date": org_json.get("latest_funding_round_date"),
+        "latest_funding_stage":     org_json.get("latest_funding_stage"),
+        "funding_events":           org_json.get("funding_events") or [],
+        "technology_names": (
+            org_json.get("technology_names")
+            or [t.get("name") for t in org_json.get("current_technologies", [])]
+            or []
+        ),
+        "org_chart_root_people_ids": org_json.get("org_chart_root_people_ids") or [],
+        "org_chart_sector":         org_json.get("org_chart_sector"),
+        "org_chart_removed":        org_json.get("org_chart_removed"),
+        "org_chart_show_department_filter": org_json.get("org_chart_show_department_filter"),
+        "account_id":               org_json.get("account_id"),
+        "departmental_head_count":  org_json.get("departmental_head_count"),
+    }
+
+
+# --- people -------------------------------------------------------------------
+def person_stub_columns(stub: dict) -> dict:
+    """`people` columns from a /mixed_people/search stub."""
+    return {
+        "first_name":       stub.get("first_name"),
+        "last_name":        stub.get("last_name"),
+        "title":            stub.get("title"),
+        "seniority":        stub.get("seniority"),
+        "email":            stub.get("email"),                 # redacted placeholder
+        "linkedin_url":     stub.get("linkedin_url"),
+        "location_city":    stub.get("city"),
+        "location_country": stub.get("country"),
+    }
+
+
+def person_detail_stub_columns(stub: dict) -> dict:
+    """`person_details` columns from a /mixed_people/search stub."""
+    return {
+        "photo_url":         stub.get("photo_url"),
+        "linkedin_url_full": stub.get("linkedin_url"),
+        "headline":          stub.get("headline"),
+        "email_status":      stub.get("email_status"),
+        "departments":       stub.get("departments")    or [],
+        "subdepartments":    stub.get("subdepartments") or [],
+        "functions":         stub.get("functions")      or [],
+        "phone_numbers":     primary_phone(stub),
+    }
+
+
+_ENRICHED_PERSON_FIELDS = ("first_name", "last_name", "title", "seniority", "email")
+_ENRICHED_DETAIL_FIELDS = (
+    "headline", "twitter_url", "github_url", "facebook_url",
+    "extrapolated_email_confidence", "intent_strength", "show_intent",
+    "revealed_for_current_team",
+)
+
+
+def person_enriched_columns(enriched: dict) -> dict:
+    """`people` overlay from /people/match – only keys Apollo returned."""
+    cols = {k: enriched[k] for k in _ENRICHED_PERSON_FIELDS if k in enriched}
+    cols["phone"] = primary_phone(enriched)
+    return cols
+
+
+def person_detail_enriched_columns(enriched: dict) -> dict:
+    """`person_details` overlay from /people/match – only keys Apollo returned."""
+    return {k: enriched[k] for k in _ENRICHED_DETAIL_FIELDS if k in enriched}
+
+
+def person_detail_columns(raw_json: dict, matched: bool) -> dict:
+    """What `enrich_company` wrote to `person_details` from this raw_json.
+
+    Before a match raw_json is the search stub and fills the stub columns.
+    Once matched it is the /people/match person, which only ever overlaid
+    the keys Apollo returned – the stub columns came from a search stub
+    that is no longer stored, so they are left alone.
+    """
+    if matched:
+        return person_detail_enriched_columns(raw_json)
+    return person_detail_stub_columns(raw_json)
+
+
+# every column person_detail_columns can produce
+PERSON_DETAIL_COLUMNS = tuple(dict.fromkeys((*person_detail_stub_columns({}), *_ENRICHED_DETAIL_FIELDS)))
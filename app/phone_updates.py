@@ -0,0 +1,220 @@
+"""
+Apollo phone-webhook payloads: parsing, applying, and parking early ones.
+
+`enrich_company` asks Apollo for a person's phone (/people/match) right
+after inserting the Person row; Apollo's webhook can arrive before that
+row is committed. Instead of 404-ing (and having Apollo retry), the
+webhook parks the payload here, keyed by Apollo person id:
+
+    webhook:pending        hash  apollo_person_id → payload JSON (latest wins)
+    webhook:pending:ts     zset  apollo_person_id → time parked
+
+The enrichment task applies parked payloads for the people it just
+committed; the `sweep_pending_webhooks` beat task applies any whose person
+showed up later and expires the rest after `pending_webhook_ttl`. A
+payload is unparked only after its write committed, and only if no newer
+payload for the same person was parked in the meantime.
+"""
+from __future__ import annotations
+
+import json, logging, time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.redis import get_async_redis, get_redis
+from app.core.settings import get_settings
+from app.db.models import Person, PersonDetails
+from app.db.session import SessionLocal
+from app.identity import claim_keys, find_people, normalize_phone
+from app import history  # noqa: F401  (records contact_blob versions on commit)
+from app.zoho import phone_push
+
+log = logging.getLogger("phone_updates")
+
+PENDING_KEY = "webhook:pending"
+PENDING_TS_KEY = "webhook:pending:ts"
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+@dataclass
+class PhoneUpdate:
+    apollo_person_id: str
+    number: str
+    status: str
+    phones: list[dict[str, Any]]
+    first_person: dict[str, Any]
+    payload: dict[str, Any]
+
+
+def parse_phone_payload(payload: dict[str, Any]) -> PhoneUpdate:
+    # Apollo always returns an *array* of people; we only ever request one
+    first_person: dict[str, Any] = (payload.get("people") or [{}])[0]
+
+    person_id: str | None = first_person.get("id")
+    if not person_id:
+        raise InvalidPayload("No person id in payload")
+
+    # prefer first sanitized_number, fall back to raw if sanitised missing
+    phones: list[dict[str, Any]] = first_person.get("phone_numbers") or []
+    sanitized_number: str | None = (
+        phones[0].get("sanitized_number") if phones else None
+    ) or (phones[0].get("raw_number") if phones else None)
+
+    if not sanitized_number:
+        raise InvalidPayload("No phone number found")
+
+    return PhoneUpdate(
+        apollo_person_id=person_id,
+        number=sanitized_number,
+        status=first_person.get("status", "verified"),
+        phones=phones,
+        first_person=first_person,
+        payload=payload,
+    )
+
+
+def apply_phone_update(db: Session, person: Person, upd: PhoneUpdate) -> bool:
+    """Write the update onto `person`; False when nothing changed."""
+    if person.personal_phone == upd.number and person.phone_verification_status == upd.status:
+        return False
+
+    person.personal_phone            = upd.number
+    person.phone_verification_status = upd.status
+    person.phones_raw_json           = upd.phones
+    person.updated_at                = datetime.utcnow()
+
+    # PersonDetails (create if missing – race-safe)
+    details: PersonDetails | None = db.scalars(
+        select(PersonDetails).where(PersonDetails.person_id == person.id)
+    ).first()
+    if details is None:
+        details = PersonDetails(person_id=person.id)
+        db.add(details)
+
+    # store the *same* info in details for analytics / BI users
+    details.webhook_phone_number  = upd.number
+    details.webhook_respomse_json = upd.payload
+    details.updated_at            = datetime.utcnow()
+    details.contact_blob          = upd.first_person   # ← freeform JSON column
+
+    if key := normalize_phone(upd.number):
+        claim_keys(db, person.id, [("phone", key)])
+    return True
+
+
+# --- pending store ------------------------------------------------------------
+async def park(upd: PhoneUpdate) -> None:
+    """Called by the webhook when the person row isn't there (yet)."""
+    r = get_async_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.hset(PENDING_KEY, upd.apollo_person_id, json.dumps(upd.payload))
+    pipe.zadd(PENDING_TS_KEY, {upd.apollo_person_id: time.time()})
+    await pipe.execute()
+
+
+def _read(apollo_ids: list[str]) -> dict[str, bytes]:
+    """Parked payloads (raw JSON) for the ids that have one."""
+    raw = get_redis().hmget(PENDING_KEY, apollo_ids)
+    return {pid: p for pid, p in zip(apollo_ids, raw) if p is not None}
+
+
+def _release(applied: dict[str, bytes]) -> None:
+    """Unpark applied payloads – unless a newer one was parked meanwhile."""
+    if not applied:
+        return
+
+    def unpark(pipe: redis.client.Pipeline) -> None:
+        current = pipe.hmget(PENDING_KEY, list(applied))
+        done = [pid for pid, raw in zip(applied, current) if raw == applied[pid]]
+        pipe.multi()
+        if done:
+            pipe.hdel(PENDING_KEY, *done)
+            pipe.zrem(PENDING_TS_KEY, *done)
+
+    get_redis().transaction(unpark, PENDING_KEY)
+
+
+def _apply_payloads(payloads: dict[str, dict], filtered: bool = True) -> list[str]:
+    """Apply parked payloads whose person exists; return the ids applied."""
+    applied: list[str] = []
+    company_ids: set[int] = set()
+    changed: list[int] = []
+    with SessionLocal() as db, db.begin():
+        people = find_people(db, payloads, filtered=filtered)
+        for pid, payload in payloads.items():
+            person = people.get(pid)
+            if person is None:
+                continue
+            if apply_phone_update(db, person, parse_phone_payload(payload)):
+                company_ids.update(cache.company_ids_for_person(db, person.id))
+                changed.append(person.id)
+            applied.append(pid)
+    cache.invalidate_company(*company_ids)
+    phone_push.buffer(*changed)
+    return applied
+
+
+def apply_pending(apollo_ids: list[str]) -> int:
+    """Apply payloads parked for people the caller has just committed.
+
+    Payloads stay parked until their write committed: if the transaction
+    fails (and the enrichment task retries) or the person isn't visible
+    yet, the sweeper still has them.
+    """
+    if not apollo_ids:
+        return 0
+    try:
+        raw = _read(apollo_ids)
+    except redis.RedisError as exc:
+        log.warning("Pending webhook lookup failed: %s", exc)
+        return 0
+    if not raw:
+        return 0
+    applied = _apply_payloads({pid: json.loads(p) for pid, p in raw.items()})
+    for pid in raw.keys() - set(applied):
+        log.warning("Pending webhook for %s has no person yet; left for the sweeper", pid)
+    try:
+        _release({pid: raw[pid] for pid in applied})
+    except redis.RedisError as exc:
+        # applied but still parked: the sweeper re-applies it as "unchanged"
+        log.warning("Could not unpark applied webhooks %s: %s", applied, exc)
+    log.info("Applied %d parked phone webhook(s)", len(applied))
+    return len(applied)
+
+
+def sweep_pending(batch_size: int = 500) -> dict:
+    """Apply parked payloads whose person has appeared; expire orphans."""
+    ttl = get_settings().pending_webhook_ttl
+    r = get_redis()
+    # anything parked in the last few seconds is probably being handled by
+    # the enrichment task right now
+    ids = [i.decode() for i in r.zrangebyscore(PENDING_TS_KEY, "-inf", time.time() - 30, 0, batch_size)]
+    if not ids:
+        return {"applied": 0, "expired": 0}
+
+    ages = dict(zip(ids, r.zmscore(PENDING_TS_KEY, ids)))
+    raw = _read(ids)
+    payloads = {pid: json.loads(p) for pid, p in raw.items()}
+    # the known-id filter may not have heard of a person yet – ask the DB
+    applied = _apply_payloads(payloads, filtered=False) if payloads else []
+    _release({pid: raw[pid] for pid in applied})
+    expired = [
+        pid for pid in ids
+        if pid not in applied and (pid not in payloads or time.time() - (ages[pid] or 0) > ttl)
+    ]
+    if expired:
+        pipe = r.pipeline(transaction=True)
+        pipe.hdel(PENDING_KEY, *expired)
+        pipe.zrem(PENDING_TS_KEY, *expired)
+        pipe.execute()
+        log.warning("Expired %d orphan phone webhook(s): %s", len(expired), expired[:20])
+    return {"applied": len(applied), "expired": len(expired)}
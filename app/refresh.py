@@ -0,0 +1,171 @@
+"""
+Background re-enrichment of stale companies.
+
+A beat task (`refresh_stale_companies`) runs every `refresh_tick_seconds`.
+Each tick it:
+
+1. takes this tick's share of the daily budget – `refresh_daily_cap`
+   spread evenly over the day, reserved on a per-day Redis counter so a
+   restarted beat or an extra tick can never exceed the cap;
+2. loads the `refresh_candidate_pool` least recently enriched companies
+   older than `refresh_min_age_days` (index `ix_companies_refresh`) and
+   ranks them by
+
+       score = age / refresh_min_age_days × importance
+       importance = 1 + log10(1 + employee_count) + log10(1 + linked people)
+
+   so a big account with many contacts is refreshed before a tiny one of
+   the same age, and anything left waiting keeps climbing;
+3. sends `enrich_company` for the winners to the `enrich_low` queue with a
+   countdown spread over the tick (even slots plus jitter), so Apollo and
+   the DB see a flat trickle instead of a burst.
+
+`enrich_low` is consumed by its own small worker (see docker-compose.yaml),
+so refreshes never queue in front of user-requested enrichments and don't
+count towards POST /enrich admission capacity. A company that was scheduled
+is not picked again for `REFRESH_CLAIM_SECONDS`, even if its task failed.
+"""
+from __future__ import annotations
+
+import logging, math, random, uuid
+from datetime import date, datetime, timedelta
+
+import redis
+from sqlalchemy import func, select
+
+from app.core.celery_app import celery, ENRICH_LOW_QUEUE, ENRICH_TASK
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.db.models import Company, CompanyPeople
+from app.db.session import SessionLocal
+
+log = logging.getLogger("refresh")
+
+REFRESH_CLAIM_SECONDS = 86400
+DAY_SECONDS = 86400
+
+
+def _budget_key(day: date) -> str:
+    return f"refresh:budget:{day:%Y%m%d}"
+
+
+def _claim_key(company_id: int) -> str:
+    return f"refresh:company:{company_id}"
+
+
+# --- budget -------------------------------------------------------------------
+def tick_quota(daily_cap: int, tick_seconds: int) -> int:
+    """Even share of the daily cap for one tick (at least 1 while cap > 0)."""
+    if daily_cap <= 0:
+        return 0
+    return max(1, math.ceil(daily_cap * tick_seconds / DAY_SECONDS))
+
+
+def reserve(wanted: int, daily_cap: int, day: date) -> int:
+    """Take up to `wanted` from today's budget; returns what was granted."""
+    if wanted <= 0:
+        return 0
+    r = get_redis()
+    key = _budget_key(day)
+    pipe = r.pipeline()
+    pipe.incrby(key, wanted)
+    pipe.expire(key, DAY_SECONDS * 2)
+    used, _ = pipe.execute()
+    over = min(wanted, max(used - daily_cap, 0))
+    if over:
+        r.decrby(key, over)
+    return wanted - over
+
+
+def release(unused: int, day: date) -> None:
+    if unused > 0:
+        get_redis().decrby(_budget_key(day), unused)
+
+
+# --- ranking ------------------------------------------------------------------
+def importance(employee_count: int | None, people: int) -> float:
+    return 1 + math.log10(1 + (employee_count or 0)) + math.log10(1 + people)
+
+
+def score(enriched_at: datetime, employee_count: int | None, people: int,
+          now: datetime, min_age_days: int) -> float:
+    age_days = (now - enriched_at).total_seconds() / DAY_SECONDS
+    return age_days / max(min_age_days, 1) * importance(employee_count, people)
+
+
+def candidates(now: datetime, min_age_days: int, pool: int) -> list[tuple[float, int, str, str | None]]:
+    """Stale companies as (score, id, name, domain_entered), best first."""
+    cutoff = now - timedelta(days=min_age_days)
+    with SessionLocal() as db:
+        stale = (
+            select(Company.id, Company.name, Company.domain_entered,
+                   Company.enriched_at, Company.employee_count)
+            .where(Company.is_enriched.is_(True), Company.enriched_at < cutoff)
+            .order_by(Company.enriched_at)
+            .limit(pool)
+        ).subquery()
+        people = (
+            select(func.count(CompanyPeople.id))
+            .where(CompanyPeople.company_id == stale.c.id)
+            .scalar_subquery()
+            .label("people")
+        )
+        rows = db.execute(select(*stale.c, people)).all()
+    ranked = [
+        (score(r.enriched_at, r.employee_count, r.people, now, min_age_days), r.id, r.name, r.domain_entered)
+        for r in rows
+    ]
+    ranked.sort(key=lambda c: -c[0])
+    return ranked
+
+
+# --- scheduling ---------------------------------------------------------------
+def _claim(company_id: int) -> bool:
+    return bool(get_redis().set(_claim_key(company_id), 1, nx=True, ex=REFRESH_CLAIM_SECONDS))
+
+
+def countdowns(n: int, window: float, rng: random.Random = random) -> list[float]:
+    """`n` start offsets over `window` seconds: one per equal slot, jittered within it."""
+    slot = window / n if n else 0
+    return [i * slot + rng.uniform(0, slot) for i in range(n)]
+
+
+def schedule_refresh(now: datetime | None = None) -> dict:
+    """One tick: reserve budget, rank stale companies, send paced tasks."""
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    today = now.date()
+    stats = {"granted": 0, "scheduled": 0, "candidates": 0}
+
+    try:
+        granted = reserve(
+            tick_quota(settings.refresh_daily_cap, settings.refresh_tick_seconds),
+            settings.refresh_daily_cap, today,
+        )
+    except redis.RedisError as exc:
+        log.warning("Refresh budget unavailable, skipping tick: %s", exc)
+        return stats
+    stats["granted"] = granted
+    if not granted:
+        return stats
+
+    ranked = candidates(now, settings.refresh_min_age_days, settings.refresh_candidate_pool)
+    stats["candidates"] = len(ranked)
+    picked = []
+    for _, company_id, name, domain_entered in ranked:
+        if len(picked) == granted:
+            break
+        if _claim(company_id):
+            picked.append((company_id, name, domain_entered))
+
+    for (company_id, name, domain_entered), countdown in zip(
+        picked, countdowns(len(picked), settings.refresh_tick_seconds)
+    ):
+        # the same (name, domain_entered) pair finds the existing company row
+        celery.send_task(
+            ENRICH_TASK, args=(str(uuid.uuid4()), name, domain_entered),
+            queue=ENRICH_LOW_QUEUE, countdown=round(countdown, 1),
+        )
+    stats["scheduled"] = len(picked)
+    release(granted - len(picked), today)
+    return stats
@@ -0,0 +1,155 @@
+"""
+Offline re-processor: rebuild derived columns from stored raw_json.
+
+When app/mapping.py changes (a new column, a fixed parse) existing rows can
+be brought up to date from the JSON we already keep, without paying for
+another Apollo call:
+
+    python -m app.reprocess org                      # organization_details
+    python -m app.reprocess person --columns headline,phone_numbers
+    python -m app.reprocess org --chunk 5000 --workers 8
+
+Rows are read in primary-key order (keyset, never OFFSET), the mapping runs
+in a process pool – it is pure CPU on JSON – and each chunk goes back as one
+executemany UPDATE keyed by the primary key. Only the DB is touched.
+
+Person rows are mapped the way `enrich_company` wrote them: a stub's
+raw_json refills the stub columns, a matched person's only the /people/match
+overlay (mapping.person_detail_columns).
+"""
+from __future__ import annotations
+
+import argparse, logging, os
+from collections import deque
+from multiprocessing import Pool
+from typing import Callable, Iterator
+
+from sqlalchemy import false, select, update
+
+from app.db.models import OrganizationDetails, Person, PersonDetails
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.mapping import PERSON_DETAIL_COLUMNS, org_detail_columns, person_detail_columns
+from app.terms import SOURCE_COLUMNS, sync_company_terms
+
+log = logging.getLogger("reprocess")
+
+def _org_columns(raw_json: dict, matched: bool) -> dict:
+    return org_detail_columns(raw_json)
+
+
+# target → (model, primary-key column name, (raw_json, matched) → columns,
+#           columns the mapper can produce)
+TARGETS: dict[str, tuple[type, str, Callable[[dict, bool], dict], tuple[str, ...]]] = {
+    "org":    (OrganizationDetails, "company_id", _org_columns, tuple(org_detail_columns({}))),
+    "person": (PersonDetails,       "person_id",  person_detail_columns, PERSON_DETAIL_COLUMNS),
+}
+CHUNK_SIZE = 2000
+
+
+def iter_chunks(target: str, chunk_size: int = CHUNK_SIZE) -> Iterator[list[tuple[int, dict, bool]]]:
+    """(pk, raw_json, matched) rows with stored JSON, in keyset-paginated chunks.
+
+    `matched` tells which shape raw_json has (see mapping.person_detail_columns).
+    """
+    model, pk_name, _, _ = TARGETS[target]
+    pk = getattr(model, pk_name)
+    last = None
+    while True:
+        if model is PersonDetails:
+            stmt = (select(pk, model.raw_json, Person.is_enriched)
+                    .join(Person, Person.id == PersonDetails.person_id))
+        else:
+            stmt = select(pk, model.raw_json, false())
+        stmt = stmt.where(model.raw_json.is_not(None))
+        if last is not None:
+            stmt = stmt.where(pk > last)
+        # primary: the columns written back must match the current raw_json
+        with SessionLocal(primary=True) as db:
+            rows = db.execute(stmt.order_by(pk).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield [(row[0], row[1], bool(row[2])) for row in rows]
+        last = rows[-1][0]
+
+
+def map_chunk(target: str, rows: list[tuple[int, dict, bool]], columns: tuple[str, ...] | None) -> list[dict]:
+    """Worker side: raw_json → UPDATE parameter dicts (pk included)."""
+    _, pk_name, mapper, _ = TARGETS[target]
+    out = []
+    for pk, raw, matched in rows:
+        if not isinstance(raw, dict):
+            continue
+        cols = mapper(raw, matched)
+        if columns:
+            cols = {k: v for k, v in cols.items() if k in columns}
+        if not cols:
+            continue
+        cols[pk_name] = pk
+        out.append(cols)
+    return out
+
+
+def write_chunk(target: str, params: list[dict]) -> None:
+    if not params:
+        return
+    model = TARGETS[target][0]
+    with SessionLocal() as db, db.begin():
+        # ORM bulk UPDATE by primary key → one executemany
+        db.execute(update(model), params)
+        if target == "org" and params[0].keys() >= set(SOURCE_COLUMNS):
+            # term postings are derived from the same arrays
+            for p in params:
+                sync_company_terms(db, p["company_id"], p)
+
+
+def reprocess(
+    target: str,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int | None = None,
+    columns: tuple[str, ...] | None = None,
+) -> int:
+    """Re-derive `target`'s columns for every row; returns rows updated."""
+    if target not in TARGETS:
+        raise ValueError(f"unknown target {target!r}; choose from {sorted(TARGETS)}")
+    if columns:
+        unknown = set(columns) - set(TARGETS[target][3])
+        if unknown:
+            raise ValueError(f"not derived from raw_json: {sorted(unknown)}")
+
+    workers = workers or os.cpu_count() or 1
+    updated = 0
+    # keep at most 2×workers chunks in flight so reading never runs far
+    # ahead of writing
+    window: deque = deque()
+    with Pool(workers) as pool:
+        for rows in iter_chunks(target, chunk_size):
+            window.append(pool.apply_async(map_chunk, (target, rows, columns)))
+            if len(window) >= 2 * workers:
+                params = window.popleft().get()
+                write_chunk(target, params)
+                updated += len(params)
+        while window:
+            params = window.popleft().get()
+            write_chunk(target, params)
+            updated += len(params)
+    log.info("Reprocessed %d %s row(s)", updated, target)
+    return updated
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild derived columns from stored raw_json")
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="rows per read/UPDATE")
+    parser.add_argument("--workers", type=int, help="mapping processes (default: CPU count)")
+    parser.add_argument("--columns", help="comma-separated subset of columns to rewrite")
+    args = parser.parse_args(argv)
+
+    setup_logging("cli")
+    columns = tuple(c.strip() for c in args.columns.split(",") if c.strip()) if args.columns else None
+    reprocess(args.target, chunk_size=args.chunk, workers=args.workers, columns=columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Retention for `company_search_runs` / `company_search_results`.
+
+Both tables are RANGE-partitioned by month on MySQL (`p202507` holds July
+2025; `pmax` catches the future). The daily beat task:
+
+1. deletes search hits that were never used for domain resolution
+   (`company_id IS NULL`) once they are `search_unused_hit_days` old, in
+   primary-key batches of `retention_batch_size`;
+2. makes sure next month's partitions exist (split off `pmax`);
+3. drops whole monthly partitions older than `search_retention_months` –
+   at most `retention_max_partitions` per table per run, so one run never
+   holds metadata locks for long.
+
+The durable record of a used hit is the company row it produced
+(`companies.domain_resolved`), which the local resolver indexes too.
+
+On a non-partitioned database (SQLite, a MySQL that hasn't run the
+migration) step 3 falls back to batched DELETEs.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.settings import get_settings
+from app.db.models import CompanySearchResults, CompanySearchRun
+from app.db.session import SessionLocal, get_engine
+
+log = logging.getLogger("retention")
+
+# table → column it is partitioned on
+PARTITIONED = {
+    CompanySearchRun.__tablename__:     "created_at",
+    CompanySearchResults.__tablename__: "matched_at",
+}
+
+
+def month_start(d: date, shift: int = 0) -> date:
+    """First day of the month `shift` months after `d`'s month."""
+    y, m = divmod(d.year * 12 + d.month - 1 + shift, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+# --- 1. unused hits -----------------------------------------------------------
+def purge_unused_hits(older_than: datetime, batch_size: int) -> int:
+    removed = 0
+    while True:
+        with SessionLocal() as db, db.begin():
+            ids = db.scalars(
+                select(CompanySearchResults.id)
+                .where(
+                    CompanySearchResults.company_id.is_(None),
+                    CompanySearchResults.matched_at < older_than,
+                )
+                .order_by(CompanySearchResults.id)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                return removed
+            db.execute(delete(CompanySearchResults).where(CompanySearchResults.id.in_(ids)))
+        removed += len(ids)
+
+
+# --- 2/3. partitions (MySQL) --------------------------------------------------
+def _partitions(conn: Connection, table: str) -> list[str]:
+    return list(conn.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"t": table}).scalars())
+
+
+def ensure_future_partitions(conn: Connection, table: str, today: date, months_ahead: int = 2) -> None:
+    existing = set(_partitions(conn, table))
+    for shift in range(months_ahead + 1):
+        month = month_start(today, shift)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        conn.execute(text(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ("
+            f"PARTITION {name} VALUES LESS THAN ('{month_start(month, 1):%Y-%m-%d}'), "
+            f"PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+        ))
+        log.info("Added partition %s.%s", table, name)
+
+
+def drop_expired_partitions(conn: Connection, table: str, cutoff: date, limit: int) -> list[str]:
+    """Drop monthly partitions whose whole month lies before `cutoff`."""
+    expired = [
+        name for name in _partitions(conn, table)
+        if name != "pmax" and month_start(datetime.strptime(name[1:], "%Y%m").date(), 1) <= cutoff
+    ][:limit]
+    if expired:
+        conn.execute(text(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}"))
+        log.info("Dropped partitions %s.%s", table, expired)
+    return expired
+
+
+# --- fallback without partitions ----------------------------------------------
+def purge_expired_runs(cutoff: datetime, batch_size: int) -> int:
+    removed = 0
+    while True:
+        with SessionLocal() as db, db.begin():
+            run_ids = db.scalars(
+                select(CompanySearchRun.id)
+                .where(CompanySearchRun.created_at < cutoff)
+                .order_by(CompanySearchRun.id)
+                .limit(batch_size)
+            ).all()
+            if not run_ids:
+                break
+            db.execute(delete(CompanySearchResults).where(CompanySearchResults.run_id.in_(run_ids)))
+            db.execute(delete(CompanySearchRun).where(CompanySearchRun.id.in_(run_ids)))
+        removed += len(run_ids)
+    while True:
+        with SessionLocal() as db, db.begin():
+            hit_ids = db.scalars(
+                select(CompanySearchResults.id)
+                .where(CompanySearchResults.matched_at < cutoff)
+                .order_by(CompanySearchResults.id)
+                .limit(batch_size)
+            ).all()
+            if not hit_ids:
+                return removed
+            db.execute(delete(CompanySearchResults).where(CompanySearchResults.id.in_(hit_ids)))
+
+
+def run_retention(today: date | None = None) -> dict:
+    settings = get_settings()
+    today = today or datetime.utcnow().date()
+    cutoff = month_start(today, -settings.search_retention_months)
+    stats: dict = {}
+
+    stats["unused_hits_deleted"] = purge_unused_hits(
+        datetime.utcnow() - timedelta(days=settings.search_unused_hit_days),
+        settings.retention_batch_size,
+    )
+
+    engine = get_engine()
+    if engine.dialect.name == "mysql":
+        with engine.begin() as conn:
+            partitioned = all(_partitions(conn, t) for t in PARTITIONED)
+        if partitioned:
+            for table in PARTITIONED:
+                # DDL auto-commits in MySQL; one connection per table keeps
+                # failures isolated
+                with engine.connect() as conn:
+                    ensure_future_partitions(conn, table, today)
+                    stats[f"{table}_dropped"] = drop_expired_partitions(
+                        conn, table, cutoff, settings.retention_max_partitions
+                    )
+            return stats
+
+    stats["expired_runs_deleted"] = purge_expired_runs(
+        datetime.combine(cutoff, datetime.min.time()), settings.retention_batch_size
+    )
+    return stats
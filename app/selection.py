@@ -0,0 +1,116 @@
+"""
+Which people-search stubs are worth a paid /people/match.
+
+`enrich_company` stores every stub the search returns (cheap), then matches
+only the best `people_match_top_n` of them:
+
+* stubs are deduped by Apollo person id – the search returns a person in
+  both `people` and `contacts` when they are already in our Apollo CRM;
+* each stub is scored as the sum of its best seniority, title-word and
+  department weight (PEOPLE_*_WEIGHTS, "key=weight,…");
+* people matched within `people_match_fresh_days` – or already matched
+  under an earlier Apollo id – are not matched again;
+* the rest are ranked by score, ties kept in search order.
+
+The search filters are the weighted seniorities and title words, so
+"what we search for" and "what we pay to match" stay one list.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from app.core.settings import get_settings
+
+_WORD = re.compile(r"[a-z]+")
+
+
+@dataclass(frozen=True)
+class Weights:
+    seniority: dict[str, float]
+    title: dict[str, float]
+    department: dict[str, float]
+
+
+@dataclass
+class Candidate:
+    apollo_id: str
+    person_id: int
+    score: float
+    order: int
+    enriched_at: datetime | None      # set when this row was already matched
+    matched_as: str | None            # the Apollo id it was matched under
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    weights = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        key, _, weight = item.partition("=")
+        weights[key.strip().lower()] = float(weight or 1)
+    return weights
+
+
+def load_weights() -> Weights:
+    settings = get_settings()
+    return Weights(
+        seniority=parse_weights(settings.people_seniority_weights),
+        title=parse_weights(settings.people_title_weights),
+        department=parse_weights(settings.people_department_weights),
+    )
+
+
+def search_filters(weights: Weights) -> tuple[list[str], list[str]]:
+    """(seniorities, titles) for /mixed_people/search."""
+    return list(weights.seniority), list(weights.title)
+
+
+def stub_id(stub: dict) -> str | None:
+    return stub.get("person_id") or stub.get("id")
+
+
+def dedupe(stubs: Iterable[dict], seen: set[str]) -> list[dict]:
+    """Stubs whose id isn't in `seen` (updated in place), first occurrence wins."""
+    out = []
+    for stub in stubs:
+        apollo_id = stub_id(stub)
+        if apollo_id and apollo_id in seen:
+            continue
+        if apollo_id:
+            seen.add(apollo_id)
+        out.append(stub)
+    return out
+
+
+def score(stub: dict, weights: Weights) -> float:
+    seniority = weights.seniority.get((stub.get("seniority") or "").lower(), 0.0)
+    words = _WORD.findall((stub.get("title") or "").lower())
+    title = max((weights.title.get(w, 0.0) for w in words), default=0.0)
+    department = max(
+        (weights.department.get(d.lower(), 0.0) for d in stub.get("departments") or []),
+        default=0.0,
+    )
+    return seniority + title + department
+
+
+def already_matched(apollo_id: str, enriched_at: datetime | None, matched_as: str | None,
+                    fresh_after: datetime) -> bool:
+    if enriched_at is None:
+        return False
+    return matched_as != apollo_id or enriched_at >= fresh_after
+
+
+def fresh_after(now: datetime | None = None) -> datetime:
+    """Matches newer than this are not repeated."""
+    return (now or datetime.utcnow()) - timedelta(days=get_settings().people_match_fresh_days)
+
+
+def choose(candidates: list[Candidate], fresh_after: datetime) -> tuple[list[Candidate], int]:
+    """The candidates to match, best first, and how many were skipped as fresh."""
+    eligible = [
+        c for c in candidates
+        if not already_matched(c.apollo_id, c.enriched_at, c.matched_as, fresh_after)
+    ]
+    eligible.sort(key=lambda c: (-c.score, c.order))
+    return eligible[:get_settings().people_match_top_n], len(candidates) - len(eligible)
@@ -1,69 +1,126 @@
-from celery import Celery
+from celery.signals import task_prerun, worker_process_init, worker_ready, worker_shutdown
 from datetime import datetime
-from app.db.session import SessionLocal
+from app.core.celery_app import celery, ENRICH_QUEUE, ENRICH_TASK
+from app.db.session import SessionLocal, dispose_engine, reset_pin
 from app.db.models import Company, OrganizationDetails, Person, PersonDetails, CompanyPeople, CompanySearchResults, CompanySearchRun
-from app.apollo.client import ApolloClient
-from sqlalchemy import select
+from app.apollo.client import get_apollo, reset_apollo, replaying, ApolloTransientError
+from app.zoho.client import ZohoTransientError, reset_zoho
+from app.zoho import phone_push
+from app.core.checkpoint import Checkpoint, idempotency_key
+from app.core.redis import reset_redis
+from app.core import cache
+from app.core.admission import start_heartbeat
+from app.core.logging import debug_scope, log_context, setup_logging
+from app.core import profiling
+from app.retention import run_retention
+from app.refresh import schedule_refresh
+from app.phone_updates import apply_pending, sweep_pending
+from app.terms import sync_company_terms
+from app import known_ids, selection
+from app.known_ids import reset_known_ids
+from app import history  # noqa: F401  (records raw_json versions on commit)
+from app.identity import claim_keys, find_person, resolve_identity, stub_keys
+from app.mapping import (
+    company_columns, org_detail_columns, person_stub_columns, person_detail_stub_columns,
+    person_enriched_columns, person_detail_enriched_columns,
+)
+from app.apollo.resolver import get_resolver
+from app.apollo.paginate import iterate_sync
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
 from app.core.settings import get_settings
 import uuid, logging
 
-celery = Celery("tasks", broker=get_settings().redis_url)
-celery.conf.task_default_queue = "enrich"
-apollo = ApolloClient()
 log = logging.getLogger("worker")
 
-from urllib.parse import urljoin
-settings = get_settings()
-WEBHOOK_URL = urljoin(settings.public_base_url, "/webhook/apollo_phone")
 
-# TITLES_FILTER = [
-#     "owner", "founder", "c_suite", "partner", "vp",
-#     "head", "director", "manager", "senior"
-# ]
+@worker_process_init.connect
+def _reset_process_resources(**_):
+    """Each prefork child gets its own DB pool, HTTP sessions, Redis pool and log listener."""
+    setup_logging("worker")
+    dispose_engine()
+    reset_apollo()
+    reset_zoho()
+    reset_redis()
+    reset_known_ids()
+
 
-# TITLES_FILTER = [
-#     "owner", "founder", "manager", "director"
-# ]
+@task_prerun.connect
+def _new_read_scope(**_):
+    """Reads may use replicas again until this task writes (app/db/session.py)."""
+    reset_pin()
 
-TITLES_FILTER = ["vp", "director", "head", "manager", "owner", "partner", "founder"],
 
-def _primary_phone(stub: dict) -> str | None:
-    """Return the best single phone number for either payload type."""
-    # 1) person‐level
-    if stub.get("sanitized_phone"):
-        return stub["sanitized_phone"]
-    if stub.get("phone_numbers"):
-        return stub["phone_numbers"][0].get("sanitized_number")
+_heartbeat_stop = None
 
-    # 2) fallback to the nested org‐block, if present
-    org = stub.get("organization", {})
-    # Apollo sometimes gives both "sanitized_phone" *and*
-    # "primary_phone":{…}, so check both
-    if org.get("sanitized_phone"):
-        return org["sanitized_phone"]
-    if isinstance(org.get("primary_phone"), dict):
-        return org["primary_phone"].get("sanitized_number")
 
-    # 3) legacy
-    if stub.get("number"):
-        return (stub["number"] or [{}])[0].get("sanitized_number")
+@worker_ready.connect
+def _advertise_capacity(sender=None, **_):
+    """Publish this worker's pool size for the API's admission control."""
+    global _heartbeat_stop
+    if ENRICH_QUEUE not in sender.app.amqp.queues.consume_from:
+        return                          # e.g. the enrich_low refresh worker
+    _heartbeat_stop = start_heartbeat(sender.hostname, sender.controller.concurrency)
 
 
+@worker_shutdown.connect
+def _withdraw_capacity(**_):
+    if _heartbeat_stop is not None:
+        _heartbeat_stop.set()
+
+from urllib.parse import urljoin
+settings = get_settings()
+WEBHOOK_URL = urljoin(settings.public_base_url, "/webhook/apollo_phone")
 
-# @celery.task(bind=True, max_retries=None, autoretry_for=(Exception,),
-#              retry_backoff=True, retry_jitter=True)
-@celery.task(bind=True, max_retries=0)
-def enrich_company(self, task_id: str, company_name: str, domain_entered: str | None):
+@celery.task(
+    bind=True,
+    name=ENRICH_TASK,
+    # only transient failures are retried; each retry resumes from the
+    # task's checkpoint (keyed by our task_id, which retries keep)
+    autoretry_for=(ApolloTransientError, OperationalError),
+    max_retries=settings.enrich_max_retries,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+)
+def enrich_company(self, task_id: str, company_name: str, domain_entered: str | None,
+                   debug: bool = False, profile: bool = False):
+    ckpt = Checkpoint(task_id)
+    with log_context(task_id=task_id), debug_scope(debug), \
+            profiling.profiled("task", task_id, profiling.should_profile(profile)):
+        if self.request.retries:
+            log.info("RETRY %d for %s – resuming from checkpoint", self.request.retries, task_id)
+        with replaying(ckpt):
+            _enrich_company(task_id, company_name, domain_entered, ckpt)
+    ckpt.clear()
+
+
+def _enrich_company(task_id: str, company_name: str, domain_entered: str | None, ckpt: Checkpoint):
     log.info("START %s – %s", task_id, company_name)
+    apollo = get_apollo()
+    profiling.mark("resolve")
 
     # 0) Search by name if no domain supplied --------------------------------
     # ---------------------------------------------------------------------
     # A) SEARCH   (save the entire search response immediately)
     # ---------------------------------------------------------------------
-    domain_for_enrich = domain_entered
+    domain_for_enrich = domain_entered or ckpt.get("search")
+    if domain_for_enrich is None:
+        # try the local index of past runs before paying for a search
+        resolver = get_resolver()
+        resolved = resolver.resolve(company_name)
+        if resolved and resolved.confidence >= settings.resolver_min_confidence:
+            log.info("Resolved %s locally → %s (%.2f, via %r)",
+                     company_name, resolved.domain, resolved.confidence, resolved.matched_name)
+            domain_for_enrich = resolved.domain
+
     if domain_for_enrich is None:
-        sr_json   = apollo.company_search(name=company_name, per_page=5)   # now returns "accounts"
-        log.info("DOMAIN SEARCH", sr_json)
+        profiling.mark("company_search")
+        sr_json   = apollo.company_search(                                # now returns "accounts"
+            name=company_name, per_page=5,
+            idempotency_key=idempotency_key(task_id, "company_search", company_name),
+        )
+        log.debug("Domain search response: %r", sr_json, extra={"event": "apollo.response"})
         accounts  = sr_json.get("accounts", [])
 
         # 1. store the RUN metadata + full JSON
@@ -80,8 +137,9 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
             db.add(run); db.flush()                   # run.id now available
 
             # 2. store EACH account hit
+            hit_rows = []
             for hit in accounts:
-                db.add(CompanySearchResults(
+                hit_rows.append(CompanySearchResults(
                     run_id         = run.id,
                     apollo_org_id  = hit["id"],
                     name           = hit["name"],
@@ -92,6 +150,12 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
                     alexa_ranking  = hit.get("alexa_ranking"),
                     raw_json       = hit,
                 ))
+                resolver.add(hit["name"], hit.get("primary_domain") or hit.get("domain"))
+            db.add_all(hit_rows); db.flush()
+            if hit_rows:
+                # remember which hit we resolve with; it's linked to the
+                # company below and survives the unused-hit purge
+                ckpt.set("search_hit", hit_rows[0].id)
             db.commit()
 
         # 3. pick the first hit we’ll enrich
@@ -101,7 +165,7 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
 
         first_hit = accounts[0]
 
-        log.info("First hit: %s", first_hit)
+        log.debug("First hit: %s", first_hit)
 
         # 4. derive domain
         from urllib.parse import urlparse
@@ -116,11 +180,16 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
         if not domain_for_enrich:
             log.warning("No domain found in first hit for %s", company_name)
             return
+
+    if domain_entered is None:
+        ckpt.set("search", domain_for_enrich)
     # ---------------------------------------------------------------------
     # B) COMPANY UPSERT shell row (before enrich)
     # ---------------------------------------------------------------------
-    with SessionLocal() as db:
-        comp = db.scalars(
+    profiling.mark("company_upsert")
+    with SessionLocal(primary=True) as db:
+        comp_id = ckpt.get("company")
+        comp = db.get(Company, comp_id) if comp_id else db.scalars(
             select(Company).where(
                 Company.name == company_name, Company.domain_entered == domain_entered
             )
@@ -128,171 +197,129 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
         if not comp:
             comp = Company(name=company_name, domain_entered=domain_entered)
             db.add(comp); db.commit(); db.refresh(comp)
+    ckpt.set("company", comp.id)
+
+    if hit_id := ckpt.get("search_hit"):
+        with SessionLocal() as db, db.begin():
+            db.execute(
+                update(CompanySearchResults)
+                .where(CompanySearchResults.id == hit_id)
+                .values(company_id=comp.id)
+            )
 
     domain = domain_entered if domain_entered is not None else domain_for_enrich
     log.info("Domain trying for: %s", domain)
 
     # ---------- 1) organization enrichment  -------------------------------
-    org_enrich = apollo.enrich_org(name=company_name, domain=domain)
-    print("Enrich response for %s: %r", company_name, org_enrich)
-    if "organization" not in org_enrich:
-        log.error("Missing 'organization' key in response; full payload: %r", org_enrich)
-        return  # or raise a custom error
-    org_json = org_enrich["organization"]
-
-    with SessionLocal() as db:
-        comp = db.get(Company, comp.id)                      # re-attach
-        comp.apollo_org_id    = org_json["id"]
-        comp.domain_resolved  = domain
-        comp.employee_count   = org_json.get("estimated_num_employees")
-        comp.industry         = org_json.get("industry")
-        comp.location_city    = org_json.get("city")
-        comp.location_country = org_json.get("country")
-        comp.revenue          = org_json.get("annual_revenue")
-        comp.enriched_at      = datetime.utcnow()
-        comp.is_enriched      = True
-
-        det = OrganizationDetails(
-            company_id=comp.id,
-            raw_json=org_json
-        )
-        det.website_url              = org_json.get("website_url")          or det.website_url
-        det.blog_url                 = org_json.get("blog_url")             or det.blog_url
-        det.angellist_url            = org_json.get("angellist_url")        or det.angellist_url
-        det.linkedin_url             = org_json.get("linkedin_url")         or det.linkedin_url
-        det.twitter_url              = org_json.get("twitter_url")          or det.twitter_url
-        det.facebook_url             = org_json.get("facebook_url")         or det.facebook_url
-        det.alexa_ranking            = org_json.get("alexa_ranking")        or det.alexa_ranking
-        det.phone                    = (
-            org_json.get("sanitized_phone")
-            or org_json.get("phone")
-            or det.phone
-        )
-        det.primary_phone            = org_json.get("primary_phone")        or det.primary_phone
-        det.languages                = org_json.get("languages")            or det.languages or []
-        det.linkedin_uid             = org_json.get("linkedin_uid")         or det.linkedin_uid
-        det.founded_year             = org_json.get("founded_year")         or det.founded_year
-        det.publicly_traded_symbol   = org_json.get("publicly_traded_symbol")   or det.publicly_traded_symbol
-        det.publicly_traded_exchange = org_json.get("publicly_traded_exchange") or det.publicly_traded_exchange
-        det.logo_url                 = org_json.get("logo_url")             or det.logo_url
-        det.crunchbase_url           = org_json.get("crunchbase_url")       or det.crunchbase_url
-        det.primary_domain           = org_json.get("primary_domain")       or det.primary_domain
-        det.keywords                 = org_json.get("keywords")             or det.keywords or []
-        det.estimated_num_employees  = org_json.get("estimated_num_employees") or det.estimated_num_employees
-        det.industries               = org_json.get("industries")           or det.industries or []
-        det.secondary_industries     = org_json.get("secondary_industries") or det.secondary_industries or []
-        det.snippets_loaded          = org_json.get("snippets_loaded", det.snippets_loaded)
-        det.industry_tag_id          = org_json.get("industry_tag_id")      or det.industry_tag_id
-        det.industry_tag_hash        = org_json.get("industry_tag_hash")    or det.industry_tag_hash
-        det.retail_location_count    = org_json.get("retail_location_count")    or det.retail_location_count
-        det.raw_address              = org_json.get("raw_address")          or det.raw_address
-        det.street_address           = org_json.get("street_address")       or det.street_address
-        det.city                     = org_json.get("city")                 or det.city
-        det.state                    = org_json.get("state")                or det.state
-        det.postal_code              = org_json.get("postal_code")          or det.postal_code
-        det.country                  = org_json.get("country")              or det.country
-        det.owned_by_organization_id = org_json.get("owned_by_organization_id") or det.owned_by_organization_id
-        det.seo_description          = org_json.get("seo_description")      or det.seo_description
-        det.short_description        = org_json.get("short_description")    or det.short_description
-        det.suborganizations         = org_json.get("suborganizations")     or det.suborganizations or []
-        det.num_suborganizations     = org_json.get("num_suborganizations") or det.num_suborganizations
-        det.annual_revenue_printed   = org_json.get("annual_revenue_printed")   or det.annual_revenue_printed
-        det.annual_revenue           = org_json.get("annual_revenue")       or det.annual_revenue
-        det.total_funding            = org_json.get("total_funding")        or det.total_funding
-        det.total_funding_printed    = org_json.get("total_funding_printed")    or det.total_funding_printed
-        det.latest_funding_round_date= org_json.get("latest_funding_round_date") or det.latest_funding_round_date
-        det.latest_funding_stage     = org_json.get("latest_funding_stage") or det.latest_funding_stage
-        det.funding_events           = org_json.get("funding_events")       or det.funding_events or []
-        det.technology_names         = (
-            org_json.get("technology_names")
-            or [t.get("name") for t in org_json.get("current_technologies", [])]
-            or det.technology_names
-            or []
-        )
-        det.org_chart_root_people_ids = org_json.get("org_chart_root_people_ids") or det.org_chart_root_people_ids or []
-        det.org_chart_sector         = org_json.get("org_chart_sector")     or det.org_chart_sector
-        det.org_chart_removed        = org_json.get("org_chart_removed", det.org_chart_removed)
-        det.org_chart_show_department_filter = org_json.get(
-            "org_chart_show_department_filter", det.org_chart_show_department_filter
+    profiling.mark("org_enrich")
+    if not ckpt.get("org"):
+        org_enrich = apollo.enrich_org(
+            name=company_name, domain=domain,
+            idempotency_key=idempotency_key(task_id, "org", domain),
         )
-        det.account_id               = org_json.get("account_id")          or det.account_id
-        det.departmental_head_count  = org_json.get("departmental_head_count") or det.departmental_head_count
-        det.primary_phone            = org_json.get("primary_phone")       or det.primary_phone
-
-        det.updated_at = datetime.utcnow()
-
-        db.merge(det)
-        db.commit()
-
-    # ---------- 2) people search -----------------------------------------
-    search = apollo.people_search(
+        log.debug("Enrich response for %s: %r", company_name, org_enrich, extra={"event": "apollo.response"})
+        if "organization" not in org_enrich:
+            log.error("Missing 'organization' key in response; full payload: %r", org_enrich)
+            return  # or raise a custom error
+        org_json = org_enrich["organization"]
+
+        with SessionLocal(primary=True) as db:
+            comp = db.get(Company, comp.id)                      # re-attach
+            for col, value in company_columns(org_json).items():
+                setattr(comp, col, value)
+            comp.domain_resolved  = domain
+            comp.enriched_at      = datetime.utcnow()
+            comp.is_enriched      = True
+
+            det_columns = org_detail_columns(org_json)
+            det = OrganizationDetails(company_id=comp.id, raw_json=org_json, **det_columns)
+            det.updated_at = datetime.utcnow()
+
+            db.merge(det)
+            sync_company_terms(db, comp.id, det_columns)
+            db.commit()
+        cache.invalidate_company(comp.id)
+        ckpt.set("org", True)
+
+    # ---------- 2) people search: store every stub ----------------------
+    profiling.mark("people")
+    weights = selection.load_weights()
+    seniorities, titles = selection.search_filters(weights)
+    # pages stream in (fetched concurrently, yielded in order) and each one
+    # is persisted before the next is requested
+    pages = iterate_sync(apollo.iter_people_search(
         domain      = domain,
-        seniorities = TITLES_FILTER,
-        titles      = ["hr", "people", "talent", "cfo", "finance", "founder", "owner", "ceo", "coo", "chro"],
-        page        = 1,
-        per_page    = 5,
-    )
-    # ── 1. normalise the list of “stubs” ──────────────────────────
-    stubs: list[dict] = search.get("people", []) + search.get("contacts", [])
-    log.info("People search returned %d stubs for %s", len(stubs), domain)
-
-    for stub in stubs:
-         # ── 2. figure out which identifier we can enrich with ─────
-        apollo_id: str | None = stub.get("person_id") or stub.get("id")
-        if not apollo_id:          # extremely rare, but be safe
-            log.warning("Skipping stub without person/contact id: %s", stub)
+        seniorities = seniorities,
+        titles      = titles,
+        per_page    = settings.people_search_per_page,
+        max_people  = settings.people_per_company_cap,
+        idempotency_key = idempotency_key(task_id, "people_search", domain),
+    ))
+    seen: set[str] = set()
+    candidates: list[selection.Candidate] = []
+
+    for stubs in pages:
+        log.info("People search page returned %d stubs for %s", len(stubs), domain)
+        stored: list[str] = []
+        for stub in selection.dedupe(stubs, seen):
+            apollo_id = selection.stub_id(stub)
+            if not apollo_id:          # extremely rare, but be safe
+                log.warning("Skipping stub without person/contact id: %s", stub)
+                continue
+            for attempt in range(2):
+                try:
+                    with SessionLocal() as db, db.begin():
+                        person, _ = upsert_person_stub(db, comp.id, company_name, apollo_id, stub)
+                        # register the linkedin key; folds in an older duplicate row
+                        person = resolve_identity(db, person)
+                        cand = selection.Candidate(
+                            apollo_id   = apollo_id,
+                            person_id   = person.id,
+                            score       = selection.score(stub, weights),
+                            order       = len(candidates),
+                            enriched_at = person.enriched_at if person.is_enriched else None,
+                            matched_as  = person.apollo_person_id,
+                        )
+                    candidates.append(cand)
+                    break
+                except IntegrityError:
+                    # inserted by another worker a moment ago (maybe before its
+                    # id reached our known-id filter) – once more, as an update
+                    if attempt:
+                        raise
+                    log.info("Person %s was stored concurrently; retrying", apollo_id)
+                    if known := known_ids.get_known_ids():
+                        known.remember(apollo_id)
+            stored.append(apollo_id)
+
+        # the company's people list changed – drop the cached read model
+        cache.invalidate_company(comp.id)
+        # phone webhooks that beat our commits were parked – apply them now
+        apply_pending(stored)
+
+    # ---------- 3) paid matches for the best stubs only ------------------
+    profiling.mark("people_match")
+    fresh_after = selection.fresh_after()
+    chosen, fresh = selection.choose(candidates, fresh_after)
+    log.info("Matching %d of %d people for %s (%d matched recently)",
+             len(chosen), len(candidates), domain, fresh)
+    matched: list[str] = []
+
+    for cand in chosen:
+        apollo_id = cand.apollo_id
+        if ckpt.person_done(apollo_id):
             continue
 
         # ────────────────────────────── start tx for ONE person ────────────
         with SessionLocal() as db, db.begin():
-            # 1. stub insert / update (guarantees PK for FK linkage)
-            person = db.scalars(
-                select(Person).where(Person.apollo_person_id == apollo_id)
-            ).first()
-
-            if person is None:
-                person = Person(apollo_person_id=apollo_id)
-                db.add(person)
-
-            # fill stub data first
-            person.first_name        = stub.get("first_name")
-            person.last_name         = stub.get("last_name")
-            person.title             = stub.get("title")
-            person.seniority         = stub.get("seniority")
-            person.email             = stub.get("email")                 # redacted placeholder
-            person.linkedin_url      = stub.get("linkedin_url")
-            person.location_city     = stub.get("city")
-            person.location_country  = stub.get("country")
-            person.updated_at        = datetime.utcnow()
-            person.company_name      = company_name
-
-            db.flush()
-
-            # 1-a. PersonDetails stub
-            details = db.get(PersonDetails, person.id)
-            if details is None:
-                details = PersonDetails()
-                details.person = person     # <— binds person_id for us
-                db.add(details)
-            
-            details.photo_url         = stub.get("photo_url")
-            details.linkedin_url_full = stub.get("linkedin_url")
-            details.headline          = stub.get("headline")
-            details.email_status      = stub.get("email_status")
-            details.departments       = stub.get("departments")    or []
-            details.subdepartments    = stub.get("subdepartments") or []
-            details.functions         = stub.get("functions")      or []
-            details.raw_json          = stub                       # keep the search snapshot
-            details.updated_at        = datetime.utcnow()
-            details.phone_numbers     = _primary_phone(stub)
-
-            db.flush()          # person.id now available for FK
-
-            # 1-b. company-person link (idempotent merge)
-            link = CompanyPeople(company_id=comp.id, person_id=person.id)
-            db.merge(link)
-
-            # 2. trigger enrichment and capture the immediate response
+            # merged into an earlier row since the stub pass?
+            person = db.get(Person, cand.person_id) or find_person(db, apollo_id)
+            if person is None or person.is_enriched and selection.already_matched(
+                apollo_id, person.enriched_at, person.apollo_person_id, fresh_after,
+            ):
+                ckpt.mark_person(apollo_id)
+                continue
+
             try:
                 enrich_resp = apollo.enrich_person_async(
                     person_id      = apollo_id,
@@ -301,46 +328,143 @@ def enrich_company(self, task_id: str, company_name: str, domain_entered: str |
                     reveal_email   = True,
                     reveal_phone   = True,
                     domain         = domain,
+                    idempotency_key = idempotency_key(task_id, "match", apollo_id),
                 )
-                log.info("Enrich instant response: ", enrich_resp)
-                print("Enrich instant response: ", enrich_resp)
+                log.debug("Enrich instant response for %s: %r", apollo_id, enrich_resp,
+                          extra={"event": "apollo.response"})
                 enriched = enrich_resp.get("person", {})
 
+            except ApolloTransientError:
+                raise                       # roll back this person, retry the task
             except Exception as exc:
                 log.warning("Enrich call failed for %s: %s", apollo_id, exc)
                 enriched = {}
 
-            # 3. overlay enriched fields (only if returned)
+            # overlay enriched fields (only if returned)
             if enriched:
-                person.first_name        = enriched.get("first_name", person.first_name)
-                person.last_name         = enriched.get("last_name",  person.last_name)
-                person.title             = enriched.get("title",      person.title)
-                person.seniority         = enriched.get("seniority",  person.seniority)
-                person.email             = enriched.get("email",      person.email)
-                person.phone            = _primary_phone(enriched)
-
-                # write extra details
-                details.headline                      = enriched.get("headline", details.headline)
-                details.twitter_url                   = enriched.get("twitter_url", details.twitter_url)
-                details.github_url                    = enriched.get("github_url",  details.github_url)
-                details.facebook_url                  = enriched.get("facebook_url", details.facebook_url)
-                details.extrapolated_email_confidence = enriched.get(
-                    "extrapolated_email_confidence", details.extrapolated_email_confidence
-                )
-                details.intent_strength               = enriched.get("intent_strength", details.intent_strength)
-                details.show_intent                   = enriched.get("show_intent", details.show_intent)
-                details.revealed_for_current_team     = enriched.get(
-                    "revealed_for_current_team", details.revealed_for_current_team
-                )
+                details = db.get(PersonDetails, person.id)
+                if details is None:
+                    details = PersonDetails()
+                    details.person = person
+                    db.add(details)
+
+                for col, value in person_enriched_columns(enriched).items():
+                    setattr(person, col, value)
+                for col, value in person_detail_enriched_columns(enriched).items():
+                    setattr(details, col, value)
 
                 # Overwrite raw_json with the latest full blob
                 details.raw_json = enriched
+                details.updated_at = datetime.utcnow()
 
-                # mark person as enriched
                 person.is_enriched = True
                 person.enriched_at = datetime.utcnow()
 
-            log.info("Upserted & enriched person %s (%s)", person.id, apollo_id)
-        # ────────────────────────────── end tx for ONE person ───────────────
+                # register email keys; folds in an older duplicate row
+                person = resolve_identity(db, person)
 
-    log.info("Finished import for %s – processed %d people", domain, len(stubs))
\ No newline at end of file
+            log.info("Upserted & enriched person %s (%s)", person.id, apollo_id,
+                     extra={"event": "person.upserted"})
+        # ────────────────────────────── end tx for ONE person ───────────────
+        ckpt.mark_person(apollo_id)
+        matched.append(apollo_id)
+
+    if matched:
+        cache.invalidate_company(comp.id)
+        apply_pending(matched)
+
+    log.info("Finished import for %s – stored %d people, matched %d", domain, len(candidates), len(matched))
+
+
+def upsert_person_stub(
+    db, company_id: int, company_name: str, apollo_id: str, stub: dict,
+) -> tuple[Person, PersonDetails]:
+    """Person + PersonDetails from a people-search stub, linked to the company."""
+    # same human under a new Apollo id (job change) → same row
+    person = find_person(db, apollo_id, stub_keys(stub))
+
+    if person is None:
+        person = Person(apollo_person_id=apollo_id)
+        db.add(person)
+        db.flush()
+        known_ids.add(db, apollo_id, person.id)
+    elif person.apollo_person_id != apollo_id:
+        db.flush()
+        claim_keys(db, person.id, [("apollo", apollo_id)])
+
+    # fill stub data first – a matched person keeps the real email
+    stub_columns = person_stub_columns(stub)
+    if person.is_enriched:
+        stub_columns.pop("email")
+    for col, value in stub_columns.items():
+        setattr(person, col, value)
+    person.updated_at        = datetime.utcnow()
+    person.company_name      = company_name
+
+    db.flush()
+
+    # 1-a. PersonDetails stub
+    details = db.get(PersonDetails, person.id)
+    if details is None:
+        details = PersonDetails()
+        details.person = person     # <— binds person_id for us
+        db.add(details)
+
+    for col, value in person_detail_stub_columns(stub).items():
+        setattr(details, col, value)
+    if not person.is_enriched:
+        details.raw_json      = stub                       # keep the search snapshot
+    details.updated_at        = datetime.utcnow()
+
+    db.flush()          # person.id now available for FK
+
+    # 1-b. company-person link (once per pair)
+    if not db.scalar(
+        select(CompanyPeople.id)
+        .where(CompanyPeople.company_id == company_id, CompanyPeople.person_id == person.id)
+        .limit(1)
+    ):
+        db.add(CompanyPeople(company_id=company_id, person_id=person.id))
+    return person, details
+
+
+@celery.task(name="app.tasks.purge_company_search")
+def purge_company_search():
+    """Daily retention for company_search_runs/results (see app/retention.py)."""
+    stats = run_retention()
+    log.info("Company search retention: %s", stats)
+    return stats
+
+
+@celery.task(name="app.tasks.sweep_pending_webhooks")
+def sweep_pending_webhooks():
+    """Apply parked phone webhooks whose person now exists; expire orphans."""
+    stats = sweep_pending()
+    if stats["applied"] or stats["expired"]:
+        log.info("Pending webhook sweep: %s", stats)
+    return stats
+
+
+@celery.task(name="app.tasks.refresh_stale_companies")
+def refresh_stale_companies():
+    """Pace re-enrichment of the stalest, most important companies (see app/refresh.py)."""
+    stats = schedule_refresh()
+    if stats["scheduled"]:
+        log.info("Refresh tick: %s", stats)
+    return stats
+
+
+@celery.task(
+    name="app.tasks.push_phones_to_zoho",
+    autoretry_for=(ZohoTransientError,),
+    max_retries=5,
+    retry_backoff=True,
+    retry_backoff_max=120,
+    retry_jitter=True,
+)
+def push_phones_to_zoho(force: bool = False):
+    """Flush buffered phone updates to Zoho in bulk (see app/zoho/phone_push.py)."""
+    stats = phone_push.flush(force)
+    if any(stats.values()):
+        log.info("Zoho phone push: %s", stats)
+    return stats
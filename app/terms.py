@@ -0,0 +1,205 @@
+"""
+Normalised term postings for organisation segmentation.
+
+`organization_details` keeps technologies, keywords and industries as JSON
+arrays, which only a full scan can search. Each distinct value is stored
+once in `terms` (kind, value) and linked to its companies in
+`company_terms`, so "uses Salesforce AND HubSpot" is an index lookup:
+
+    technology  ← technology_names
+    keyword     ← keywords
+    industry    ← industries + secondary_industries
+
+`enrich_company` calls `sync_company_terms` in the same transaction that
+writes the org details; existing rows are indexed with
+
+    python -m app.terms backfill [--chunk N]
+"""
+from __future__ import annotations
+
+import argparse, logging, re
+from typing import Iterable, Iterator, Mapping
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import CompanyTerm, OrganizationDetails, Term
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+
+log = logging.getLogger("terms")
+
+# kind → organization_details columns it is built from
+SOURCES: dict[str, tuple[str, ...]] = {
+    "technology": ("technology_names",),
+    "keyword":    ("keywords",),
+    "industry":   ("industries", "secondary_industries"),
+}
+SOURCE_COLUMNS = tuple(col for cols in SOURCES.values() for col in cols)
+MAX_TERM_LEN = 255
+BACKFILL_CHUNK = 1000
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_term(value: str) -> str:
+    return _WS.sub(" ", value).strip().lower()[:MAX_TERM_LEN]
+
+
+def parse_term(spec: str) -> tuple[str, str]:
+    """'technology:Salesforce' → ('technology', 'salesforce')."""
+    kind, sep, value = spec.partition(":")
+    kind = kind.strip().lower()
+    if not sep or kind not in SOURCES or not value.strip():
+        raise ValueError(f"expected <kind>:<value> with kind in {sorted(SOURCES)}, got {spec!r}")
+    return kind, normalize_term(value)
+
+
+def extract_terms(columns: Mapping) -> set[tuple[str, str]]:
+    """(kind, value) pairs from org-detail column values."""
+    pairs: set[tuple[str, str]] = set()
+    for kind, cols in SOURCES.items():
+        for col in cols:
+            for raw in columns.get(col) or []:
+                if isinstance(raw, str) and (value := normalize_term(raw)):
+                    pairs.add((kind, value))
+    return pairs
+
+
+# --- dictionary ---------------------------------------------------------------
+def term_ids(db: Session, pairs: Iterable[tuple[str, str]], *, create: bool = False) -> dict[tuple[str, str], int]:
+    """Ids for the given terms; with `create`, missing ones are inserted."""
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    by_kind: dict[str, list[str]] = {}
+    for kind, value in pairs:
+        by_kind.setdefault(kind, []).append(value)
+
+    def lookup() -> dict[tuple[str, str], int]:
+        found = {}
+        for kind, values in by_kind.items():
+            rows = db.execute(
+                select(Term.id, Term.value).where(Term.kind == kind, Term.value.in_(values))
+            )
+            found.update({(kind, value): tid for tid, value in rows})
+        return found
+
+    ids = lookup()
+    missing = pairs - ids.keys()
+    if not (create and missing):
+        return ids
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(Term), [{"kind": k, "value": v} for k, v in missing])
+    except IntegrityError:
+        # another worker added some of them first – insert the rest one by one
+        for kind, value in missing:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(Term), [{"kind": kind, "value": value}])
+            except IntegrityError:
+                pass
+    return lookup()
+
+
+# --- postings -----------------------------------------------------------------
+def sync_company_terms(db: Session, company_id: int, columns: Mapping) -> None:
+    """Make `company_terms` for one company match its org-detail arrays."""
+    wanted = set(term_ids(db, extract_terms(columns), create=True).values())
+    current = set(db.scalars(select(CompanyTerm.term_id).where(CompanyTerm.company_id == company_id)))
+
+    if stale := current - wanted:
+        db.execute(
+            delete(CompanyTerm)
+            .where(CompanyTerm.company_id == company_id, CompanyTerm.term_id.in_(stale))
+        )
+    if added := wanted - current:
+        db.execute(insert(CompanyTerm), [{"company_id": company_id, "term_id": t} for t in added])
+
+
+def backfill(chunk_size: int = BACKFILL_CHUNK) -> int:
+    """Rebuild postings for every organization_details row (keyset chunks)."""
+    cols = [getattr(OrganizationDetails, c) for c in SOURCE_COLUMNS]
+    done, last = 0, None
+    while True:
+        stmt = select(OrganizationDetails.company_id, *cols)
+        if last is not None:
+            stmt = stmt.where(OrganizationDetails.company_id > last)
+        with SessionLocal() as db, db.begin():
+            rows = db.execute(stmt.order_by(OrganizationDetails.company_id).limit(chunk_size)).all()
+            for row in rows:
+                sync_company_terms(db, row.company_id, row._mapping)
+        if not rows:
+            break
+        done += len(rows)
+        last = rows[-1].company_id
+        log.info("Indexed terms for %d companies (up to id %s)", done, last)
+    return done
+
+
+# --- queries ------------------------------------------------------------------
+def match_companies(
+    db: Session,
+    all_of: Iterable[tuple[str, str]] = (),
+    any_of: Iterable[tuple[str, str]] = (),
+    *,
+    after_id: int | None = None,
+    limit: int = 100,
+) -> list[int]:
+    """Company ids carrying every term in `all_of` and at least one of `any_of`.
+
+    Ordered by id; pass the last id back as `after_id` for the next page.
+    """
+    all_of, any_of = set(all_of), set(any_of)
+    if not (all_of or any_of):
+        raise ValueError("need at least one term")
+
+    all_ids = term_ids(db, all_of)
+    any_ids = term_ids(db, any_of)
+    if len(all_ids) < len(all_of) or (any_of and not any_ids):
+        return []                       # an unknown term can't match anything
+
+    stmt = select(CompanyTerm.company_id)
+    if all_ids:
+        stmt = (
+            stmt.where(CompanyTerm.term_id.in_(all_ids.values()))
+            .group_by(CompanyTerm.company_id)
+            .having(func.count() == len(all_ids))
+        )
+        if any_ids:
+            stmt = stmt.where(CompanyTerm.company_id.in_(
+                select(CompanyTerm.company_id).where(CompanyTerm.term_id.in_(any_ids.values()))
+            ))
+    else:
+        stmt = stmt.where(CompanyTerm.term_id.in_(any_ids.values())).distinct()
+
+    if after_id is not None:
+        stmt = stmt.where(CompanyTerm.company_id > after_id)
+    return list(db.scalars(stmt.order_by(CompanyTerm.company_id).limit(limit)))
+
+
+def iter_terms(db: Session, kind: str, prefix: str = "", limit: int = 50) -> Iterator[str]:
+    """Dictionary values of one kind, for autocompletion."""
+    stmt = select(Term.value).where(Term.kind == kind)
+    if prefix:
+        stmt = stmt.where(Term.value.startswith(normalize_term(prefix), autoescape=True))
+    yield from db.scalars(stmt.order_by(Term.value).limit(limit))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain the organisation term postings")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    bf = sub.add_parser("backfill", help="(re)build company_terms from organization_details")
+    bf.add_argument("--chunk", type=int, default=BACKFILL_CHUNK)
+    args = parser.parse_args(argv)
+
+    setup_logging("cli")
+    if args.cmd == "backfill":
+        backfill(args.chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Seed enrichment from Zoho CRM accounts via the Bulk Read API.
+
+    python -m app.zoho.bulk_read [--module Accounts] [--criteria '{"api_name": …}']
+                                 [--chunk 500] [--dry-run]
+
+For each result page (Zoho caps a job at 200k records; `more_records` means
+another job for the next page):
+
+1. create the export job and poll it with exponential backoff (5 s → 60 s,
+   give up after `zoho_bulk_poll_max_seconds`);
+2. stream the result zip into a SpooledTemporaryFile – it stays in memory
+   while small and rolls over to disk after that; the zip's CSV member is
+   then read row by row through `zipfile` + `csv`, never as a whole;
+3. per chunk of `--chunk` rows: drop accounts whose company was enriched
+   within `refresh_min_age_days` (by domain, or by name when the account
+   has no website) and duplicates within the run, then publish one
+   `enrich_company` message per account onto `enrich_low` over a single
+   producer connection (admission.enqueue_many).
+
+Before each chunk the importer waits while `enrich_low` holds more than
+`zoho_enqueue_max_depth` messages, so a 200k-account region is fed to the
+workers at the pace they drain it instead of sitting in Redis.
+"""
+from __future__ import annotations
+
+import argparse, csv, io, json, logging, tempfile, time, uuid, zipfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import IO, Iterable, Iterator
+from urllib.parse import urlparse
+
+from sqlalchemy import or_, select
+
+from app.core.admission import enqueue_many
+from app.core.celery_app import ENRICH_LOW_QUEUE, ENRICH_TASK
+from app.core.logging import setup_logging
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.db.models import Company
+from app.db.session import SessionLocal
+from app.zoho.client import ZohoClient, get_zoho
+
+log = logging.getLogger("zoho")
+
+MODULE = "Accounts"
+FIELDS = ["id", "Account_Name", "Website"]
+CHUNK_SIZE = 500
+SPOOL_BYTES = 32 << 20           # keep result zips up to this size in memory
+POLL_FIRST, POLL_MAX = 5.0, 60.0
+DEPTH_WAIT = 10.0
+
+
+class BulkReadFailed(Exception):
+    pass
+
+
+@dataclass
+class Account:
+    zoho_id: str
+    name: str
+    domain: str | None
+
+
+def normalize_domain(website: str | None) -> str | None:
+    website = (website or "").strip().lower()
+    if not website:
+        return None
+    host = urlparse(website if "//" in website else f"//{website}").hostname or ""
+    host = host.removeprefix("www.")
+    return host if "." in host else None
+
+
+# --- job lifecycle ------------------------------------------------------------
+def wait_for_job(client: ZohoClient, job_id: str, max_seconds: float) -> dict:
+    """Poll until COMPLETED (returns the job's `result`) with exponential backoff."""
+    delay, waited = POLL_FIRST, 0.0
+    while True:
+        job = client.bulk_read_job(job_id)
+        state = job.get("state")
+        if state == "COMPLETED":
+            return job["result"]
+        if state == "FAILURE":
+            raise BulkReadFailed(f"Zoho bulk read {job_id} failed: {job}")
+        if waited >= max_seconds:
+            raise BulkReadFailed(f"Zoho bulk read {job_id} still {state} after {waited:.0f}s")
+        log.info("Bulk read %s is %s; next check in %.0fs", job_id, state, delay)
+        time.sleep(delay)
+        waited += delay
+        delay = min(delay * 2, POLL_MAX)
+
+
+def iter_csv_rows(zip_file: IO[bytes]) -> Iterator[dict]:
+    """Rows of the (single) CSV member, decoded lazily."""
+    with zipfile.ZipFile(zip_file) as zf:
+        member = next(n for n in zf.namelist() if n.lower().endswith(".csv"))
+        with zf.open(member) as raw:
+            yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+
+
+def iter_accounts(rows: Iterable[dict]) -> Iterator[Account]:
+    for row in rows:
+        name = (row.get("Account_Name") or "").strip()
+        if name:
+            yield Account(row.get("id", ""), name[:255], normalize_domain(row.get("Website")))
+
+
+def iter_pages(client: ZohoClient, module: str, fields: list[str], criteria: dict | None,
+               max_seconds: float) -> Iterator[Iterator[dict]]:
+    """One row iterator per Bulk Read page; each zip is released after its page."""
+    page = 1
+    while True:
+        job_id = client.create_bulk_read(module, fields, page=page, criteria=criteria)
+        log.info("Bulk read job %s created for %s page %d", job_id, module, page)
+        result = wait_for_job(client, job_id, max_seconds)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as spool:
+            size = client.download_bulk_read(job_id, spool)
+            spool.seek(0)
+            log.info("Bulk read %s: %s records, %d bytes", job_id, result.get("count"), size)
+            yield iter_csv_rows(spool)
+        if not result.get("more_records"):
+            return
+        page += 1
+
+
+# --- filtering + enqueue ------------------------------------------------------
+def _chunks(items: Iterable[Account], size: int) -> Iterator[list[Account]]:
+    chunk: list[Account] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def fresh_keys(accounts: list[Account], fresh_after: datetime) -> set[str]:
+    """Domains (and names, for accounts without one) enriched since `fresh_after`."""
+    domains = {a.domain for a in accounts if a.domain}
+    names = {a.name for a in accounts if not a.domain}
+    conds = []
+    if domains:
+        conds += [Company.domain_resolved.in_(domains), Company.domain_entered.in_(domains)]
+    if names:
+        conds.append(Company.name.in_(names))
+    if not conds:
+        return set()
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Company.name, Company.domain_resolved, Company.domain_entered)
+            .where(Company.enriched_at >= fresh_after, or_(*conds))
+        ).all()
+    return {key for row in rows for key in row if key}
+
+
+def _key(account: Account) -> str:
+    return account.domain or account.name
+
+
+def _wait_for_room(max_depth: int) -> None:
+    while (depth := get_redis().llen(ENRICH_LOW_QUEUE)) > max_depth:
+        log.info("%s holds %d messages; waiting", ENRICH_LOW_QUEUE, depth)
+        time.sleep(DEPTH_WAIT)
+
+
+def ingest(accounts: Iterable[Account], chunk_size: int = CHUNK_SIZE, dry_run: bool = False) -> dict:
+    settings = get_settings()
+    fresh_after = datetime.utcnow() - timedelta(days=settings.refresh_min_age_days)
+    seen: set[str] = set()
+    stats = {"accounts": 0, "fresh": 0, "duplicate": 0, "enqueued": 0}
+
+    for chunk in _chunks(accounts, chunk_size):
+        stats["accounts"] += len(chunk)
+        fresh = fresh_keys(chunk, fresh_after)
+        calls = []
+        for account in chunk:
+            key = _key(account)
+            if key in fresh:
+                stats["fresh"] += 1
+            elif key in seen:
+                stats["duplicate"] += 1
+            else:
+                seen.add(key)
+                task_id = str(uuid.uuid4())
+                calls.append((task_id, (task_id, account.name, account.domain)))
+        if calls and not dry_run:
+            _wait_for_room(settings.zoho_enqueue_max_depth)
+            enqueue_many(ENRICH_TASK, calls, queue=ENRICH_LOW_QUEUE)
+        stats["enqueued"] += len(calls)
+        log.info("Zoho import: %s", stats)
+    return stats
+
+
+def run(module: str = MODULE, criteria: dict | None = None,
+        chunk_size: int = CHUNK_SIZE, dry_run: bool = False) -> dict:
+    client = get_zoho()
+    max_seconds = get_settings().zoho_bulk_poll_max_seconds
+    pages = iter_pages(client, module, FIELDS, criteria, max_seconds)
+    return ingest(
+        (account for rows in pages for account in iter_accounts(rows)),
+        chunk_size=chunk_size, dry_run=dry_run,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Enqueue enrichment for Zoho CRM accounts")
+    parser.add_argument("--module", default=MODULE)
+    parser.add_argument("--criteria", type=json.loads,
+                        help='Bulk Read criteria as JSON, e.g. {"api_name": "Billing_Country", '
+                             '"comparator": "equal", "value": "Germany"}')
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count, don't enqueue")
+    args = parser.parse_args(argv)
+
+    setup_logging("cli")
+    run(args.module, args.criteria, args.chunk, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
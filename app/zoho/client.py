@@ -0,0 +1,137 @@
+"""
+Minimal Zoho CRM client: OAuth refresh-token auth, Bulk Read and upserts.
+
+Both hosts are settings, so tests (or a region other than .com) can point
+the client at a local stand-in:
+
+    ZOHO_ACCOUNTS_URL=http://localhost:9000  ZOHO_API_BASE=http://localhost:9000
+
+The access token is fetched with ZOHO_REFRESH_TOKEN on first use and again
+shortly before it expires or after a 401.
+"""
+from __future__ import annotations
+
+import logging, os, time
+from typing import IO
+
+import requests
+
+from app.core.settings import get_settings
+
+log = logging.getLogger("zoho")
+
+TOKEN_MARGIN = 60              # refresh this many seconds before expiry
+DOWNLOAD_CHUNK = 1 << 20
+
+
+class ZohoTransientError(Exception):
+    """429 / 5xx / network failure – worth retrying later."""
+
+
+class ZohoClient:
+    def __init__(self):
+        settings = get_settings()
+        self.accounts_url = settings.zoho_accounts_url.rstrip("/")
+        self.api_base = settings.zoho_api_base.rstrip("/")
+        self.session = requests.Session()
+        self._token: str | None = None
+        self._token_expires = 0.0
+
+    # --- auth ---------------------------------------------------------------
+    def _access_token(self, force: bool = False) -> str:
+        if force or self._token is None or time.monotonic() >= self._token_expires:
+            settings = get_settings()
+            try:
+                resp = self.session.post(f"{self.accounts_url}/oauth/v2/token", timeout=30, data={
+                    "grant_type":    "refresh_token",
+                    "refresh_token": settings.zoho_refresh_token,
+                    "client_id":     settings.zoho_client_id,
+                    "client_secret": settings.zoho_client_secret,
+                })
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                raise ZohoTransientError(f"Zoho token refresh: {exc}") from exc
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ZohoTransientError(f"Zoho token refresh returned {resp.status_code}")
+            resp.raise_for_status()
+            data = resp.json()
+            if "access_token" not in data:
+                raise RuntimeError(f"Zoho token refresh failed: {data.get('error', data)}")
+            self._token = data["access_token"]
+            self._token_expires = time.monotonic() + int(data.get("expires_in", 3600)) - TOKEN_MARGIN
+        return self._token
+
+    # --- internal helpers --------------------------------------------------
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        url = path if path.startswith("http") else f"{self.api_base}{path}"
+        for attempt in range(2):
+            headers = {"Authorization": f"Zoho-oauthtoken {self._access_token(force=attempt > 0)}"}
+            try:
+                resp = self.session.request(method, url, timeout=60, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                raise ZohoTransientError(f"Zoho {method} {path}: {exc}") from exc
+            if resp.status_code != 401:
+                break                               # 401: token revoked/expired early – once more
+        if resp.status_code >= 400:
+            log.error("Zoho %s %s returned %s: %s", method, path, resp.status_code, resp.text)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ZohoTransientError(f"Zoho {method} {path} returned {resp.status_code}")
+            resp.raise_for_status()
+        return resp
+
+    def _call(self, method: str, path: str, **kwargs) -> dict:
+        return self._request(method, path, **kwargs).json()
+
+    # --- Bulk Read -----------------------------------------------------------
+    def create_bulk_read(self, module: str, fields: list[str], page: int = 1,
+                         criteria: dict | None = None) -> str:
+        """Start an export job; returns its id."""
+        query: dict = {"module": {"api_name": module}, "fields": fields, "page": page}
+        if criteria:
+            query["criteria"] = criteria
+        data = self._call("POST", "/crm/bulk/v2/read", json={"query": query})
+        return data["data"][0]["details"]["id"]
+
+    def bulk_read_job(self, job_id: str) -> dict:
+        """Job state: `state` is ADDED | IN PROGRESS | COMPLETED | FAILURE; `result` once done."""
+        return self._call("GET", f"/crm/bulk/v2/read/{job_id}")["data"][0]
+
+    def download_bulk_read(self, job_id: str, out: IO[bytes]) -> int:
+        """Stream the result zip into `out`; returns bytes written."""
+        resp = self._request("GET", f"/crm/bulk/v2/read/{job_id}/result", stream=True)
+        written = 0
+        with resp:
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK):
+                out.write(chunk)
+                written += len(chunk)
+        return written
+
+    # --- records -------------------------------------------------------------
+    def upsert(self, module: str, records: list[dict], duplicate_check_fields: list[str]) -> list[dict]:
+        """POST /crm/v2/{module}/upsert (max 100 records); one result per record."""
+        data = self._call("POST", f"/crm/v2/{module}/upsert", json={
+            "data": records,
+            "duplicate_check_fields": duplicate_check_fields,
+        })
+        return data.get("data", [])
+
+
+# --- per-process instance ------------------------------------------------
+# Same rule as get_apollo(): a requests.Session must not cross a fork.
+_zoho: ZohoClient | None = None
+_zoho_pid: int | None = None
+
+
+def get_zoho() -> ZohoClient:
+    global _zoho, _zoho_pid
+    if _zoho is None or _zoho_pid != os.getpid():
+        _zoho = ZohoClient()
+        _zoho_pid = os.getpid()
+    return _zoho
+
+
+def reset_zoho() -> None:
+    global _zoho, _zoho_pid
+    if _zoho is not None and _zoho_pid == os.getpid():
+        _zoho.session.close()
+    _zoho = None
+    _zoho_pid = None
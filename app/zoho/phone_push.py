@@ -0,0 +1,152 @@
+"""
+Coalesced push of verified phone numbers to Zoho CRM contacts.
+
+The phone webhook (and the parked-webhook paths) only record *who* changed:
+
+    zoho:phone_push            zset  person_id → first time buffered
+    zoho:phone_push:inflight   zset  the batch being flushed right now
+
+A person buffered twice before a flush is pushed once, with whatever the
+database holds at flush time. The `push_phones_to_zoho` task flushes when
+the buffer is `zoho_push_window_seconds` old or holds
+`zoho_push_batch_size` people – beat runs it every
+`zoho_push_interval_seconds`, and `buffer()` kicks it early once the batch
+is full. Both go to the `zoho` queue, so a kick never waits behind the
+enrichment backlog (or counts towards it). A flush RENAMEs the buffer to
+the inflight key (new numbers keep buffering), loads the people in one
+query and sends one Zoho upsert per 100 records, matched on Email. People are removed from the inflight set
+only after their batch was accepted; a 429 / 5xx / network error leaves
+them there, the task retries with backoff, and the next flush resumes the
+inflight set before taking a new buffer – nothing is dropped.
+"""
+from __future__ import annotations
+
+import logging, time, uuid
+
+import redis
+from sqlalchemy import select
+
+from app.core.admission import enqueue, enqueue_many
+from app.core.celery_app import ZOHO_QUEUE
+from app.core.redis import get_async_redis, get_redis
+from app.core.settings import get_settings
+from app.db.models import Person
+from app.db.session import SessionLocal
+from app.identity import normalize_email
+from app.zoho.client import get_zoho
+
+log = logging.getLogger("zoho")
+
+BUFFER_KEY = "zoho:phone_push"
+INFLIGHT_KEY = "zoho:phone_push:inflight"
+LOCK_KEY = "zoho:phone_push:lock"
+KICK_KEY = "zoho:phone_push:kick"
+LOCK_SECONDS = 300
+ZOHO_UPSERT_MAX = 100
+PUSH_TASK = "app.tasks.push_phones_to_zoho"
+
+
+# --- buffering ----------------------------------------------------------------
+def _full(size: int) -> bool:
+    return size >= get_settings().zoho_push_batch_size
+
+
+def buffer(*person_ids: int) -> None:
+    """Queue people whose phone changed (sync callers)."""
+    if not person_ids:
+        return
+    try:
+        r = get_redis()
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(BUFFER_KEY, {str(pid): time.time() for pid in person_ids}, nx=True)
+        pipe.zcard(BUFFER_KEY)
+        _, size = pipe.execute()
+        if _full(size) and r.set(KICK_KEY, 1, nx=True, ex=get_settings().zoho_push_window_seconds):
+            enqueue_many(PUSH_TASK, [(str(uuid.uuid4()), ())], queue=ZOHO_QUEUE)
+    except redis.RedisError as exc:
+        log.warning("Could not buffer Zoho phone push for %s: %s", person_ids, exc)
+
+
+async def abuffer(*person_ids: int) -> None:
+    """Same as `buffer` for the API's async handlers."""
+    if not person_ids:
+        return
+    try:
+        r = get_async_redis()
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(BUFFER_KEY, {str(pid): time.time() for pid in person_ids}, nx=True)
+        pipe.zcard(BUFFER_KEY)
+        _, size = await pipe.execute()
+        if _full(size) and await r.set(KICK_KEY, 1, nx=True, ex=get_settings().zoho_push_window_seconds):
+            await enqueue(PUSH_TASK, str(uuid.uuid4()), (), queue=ZOHO_QUEUE)
+    except redis.RedisError as exc:
+        log.warning("Could not buffer Zoho phone push for %s: %s", person_ids, exc)
+
+
+# --- flushing -----------------------------------------------------------------
+def _due(r: redis.Redis, force: bool) -> bool:
+    size = r.zcard(BUFFER_KEY)
+    if not size:
+        return False
+    if force or _full(size):
+        return True
+    (_, oldest), = r.zrange(BUFFER_KEY, 0, 0, withscores=True)
+    return time.time() - oldest >= get_settings().zoho_push_window_seconds
+
+
+def contact_record(person: Person) -> dict | None:
+    email = normalize_email(person.email) or normalize_email(person.personal_email)
+    if not email:
+        return None                     # nothing Zoho can match the contact on
+    return {
+        "Email":      email,
+        "First_Name": person.first_name,
+        "Last_Name":  person.last_name or "-",      # mandatory in Zoho
+        get_settings().zoho_phone_field: person.personal_phone,
+    }
+
+
+def _push_batch(person_ids: list[int]) -> dict:
+    # primary: a replica may not have the phone the webhook just committed,
+    # and a person read as unverified is dropped from the inflight set
+    with SessionLocal(primary=True) as db:
+        people = db.scalars(
+            select(Person).where(Person.id.in_(person_ids), Person.has_verified_phone.is_(True))
+        ).all()
+    records = [rec for p in people if (rec := contact_record(p))]
+    stats = {"pushed": 0, "skipped": len(person_ids) - len(records), "rejected": 0}
+    if records:
+        settings = get_settings()
+        results = get_zoho().upsert(settings.zoho_contacts_module, records, ["Email"])
+        rejected = [(rec["Email"], res) for rec, res in zip(records, results)
+                    if res.get("status") != "success"]
+        if rejected:
+            log.warning("Zoho rejected %d contact(s): %s", len(rejected), rejected[:5])
+        stats["rejected"] = len(rejected)
+        stats["pushed"] = len(records) - len(rejected)
+    return stats
+
+
+def flush(force: bool = False) -> dict:
+    """Push the inflight batch (if a previous flush was cut short) or the buffer."""
+    stats = {"pushed": 0, "skipped": 0, "rejected": 0}
+    r = get_redis()
+    token = uuid.uuid4().hex
+    if not r.set(LOCK_KEY, token, nx=True, ex=LOCK_SECONDS):
+        return stats                    # another flush is running
+    try:
+        if not r.exists(INFLIGHT_KEY):
+            if not _due(r, force):
+                return stats
+            r.rename(BUFFER_KEY, INFLIGHT_KEY)
+            r.delete(KICK_KEY)
+        ids = [int(m) for m in r.zrange(INFLIGHT_KEY, 0, -1)]
+        for i in range(0, len(ids), ZOHO_UPSERT_MAX):
+            batch = ids[i:i + ZOHO_UPSERT_MAX]
+            for key, value in _push_batch(batch).items():
+                stats[key] += value
+            r.zrem(INFLIGHT_KEY, *batch)        # accepted – a retry won't resend
+    finally:
+        if r.get(LOCK_KEY) == token.encode():
+            r.delete(LOCK_KEY)
+    return stats
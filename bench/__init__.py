@@ -0,0 +1,24 @@
+"""
+Synthetic data + DB benchmarks for the enrichment schema.
+
+    python -m bench.generate --url sqlite:////tmp/bench.db --people 100000 --create-schema
+    python -m bench.run      --url sqlite:////tmp/bench.db --iterations 2000
+
+See README.md ("Benchmarks").
+"""
+import os
+
+# the app's Settings insist on these; the benchmarks never reach Apollo/Zoho
+for _name, _default in {
+    "APOLLO_API_KEY": "bench",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "PUBLIC_BASE_URL": "http://localhost:8000",
+}.items():
+    os.environ.setdefault(_name, _default)
+
+
+def use_database(url: str) -> None:
+    """Point app.db.session at `url` (must run before the engine is built)."""
+    os.environ["MYSQL_URI"] = url
+    from app.core.settings import get_settings
+    get_settings.cache_clear()
@@ -0,0 +1,187 @@
+"""
+Time the DB work `enrich_company` and the `apollo_phone` webhook do per
+company / person, against a database filled by bench.generate.
+
+Each operation calls the same functions the app uses (upsert_person_stub,
+find_person, apply_phone_update, sync_company_terms, …) on randomly chosen
+existing rows, in its own transaction like the app does, and reports
+latency percentiles:
+
+    python -m bench.run --url sqlite:////tmp/bench.db --iterations 2000
+    python -m bench.run --url mysql+pymysql://… --only person_upsert,webhook_phone --json out.json
+
+Writes are real (they commit), so run it against a scratch database.
+"""
+from __future__ import annotations
+
+import argparse, json, random, statistics, time, uuid
+from typing import Callable
+
+from bench import use_database
+
+SAMPLE = 5000          # rows pre-loaded as operation inputs
+
+
+def _samples(rng: random.Random):
+    from sqlalchemy import func, select
+
+    from app.db.models import Company, OrganizationDetails, Person, PersonDetails
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        max_company = db.scalar(select(func.max(Company.id))) or 0
+        max_person = db.scalar(select(func.max(Person.id))) or 0
+        if not (max_company and max_person):
+            raise SystemExit("empty database – run python -m bench.generate first")
+        company_ids = rng.sample(range(1, max_company + 1), min(SAMPLE, max_company))
+        person_ids = rng.sample(range(1, max_person + 1), min(SAMPLE, max_person))
+        companies = db.execute(
+            select(Company.id, Company.name, Company.domain_entered, Company.domain_resolved)
+            .where(Company.id.in_(company_ids))
+        ).all()
+        orgs = db.execute(
+            select(OrganizationDetails.company_id, OrganizationDetails.raw_json)
+            .where(OrganizationDetails.company_id.in_(company_ids))
+        ).all()
+        people = db.execute(
+            select(Person.id, Person.apollo_person_id, PersonDetails.raw_json)
+            .join(PersonDetails, PersonDetails.person_id == Person.id)
+            .where(Person.id.in_(person_ids))
+        ).all()
+    return companies, orgs, people
+
+
+def operations(rng: random.Random) -> dict[str, Callable[[], None]]:
+    from sqlalchemy import or_, select
+
+    from app.api.companies import _load
+    from app.core import cache
+    from app.db.models import Company, OrganizationDetails
+    from app.db.session import SessionLocal
+    from app.identity import find_person, resolve_identity, stub_keys
+    from app.mapping import org_detail_columns
+    from app.phone_updates import PhoneUpdate, apply_phone_update
+    from app.tasks import upsert_person_stub
+    from app.terms import match_companies, sync_company_terms
+
+    companies, orgs, people = _samples(rng)
+    with_domain = [c for c in companies if c.domain_resolved] or companies
+
+    def company_lookup():
+        # enrich_company B): shell row by (name, domain_entered)
+        c = rng.choice(companies)
+        with SessionLocal() as db:
+            db.scalars(select(Company).where(
+                Company.name == c.name, Company.domain_entered == c.domain_entered
+            )).first()
+
+    def company_read():
+        # GET /companies/by-domain/{domain} on a cache miss
+        c = rng.choice(with_domain)
+        with SessionLocal() as db:
+            _load(db, or_(Company.domain_resolved == c.domain_resolved,
+                          Company.domain_entered == c.domain_resolved))
+
+    def person_lookup():
+        p = rng.choice(people)
+        with SessionLocal() as db:
+            find_person(db, p.apollo_person_id, stub_keys(p.raw_json or {}))
+
+    def person_upsert():
+        # one iteration of enrich_company's people loop, minus the Apollo call;
+        # one in five is a person we haven't seen
+        p, c = rng.choice(people), rng.choice(companies)
+        stub = dict(p.raw_json or {})
+        apollo_id = p.apollo_person_id
+        if rng.random() < 0.2:
+            apollo_id = f"bench-{uuid.uuid4().hex[:20]}"
+            stub["linkedin_url"] = f"http://www.linkedin.com/in/{apollo_id}"
+        with SessionLocal() as db, db.begin():
+            person, _ = upsert_person_stub(db, c.id, c.name, apollo_id, stub)
+            resolve_identity(db, person)
+
+    def webhook_phone():
+        # apollo_phone: person lookup, phone update, companies to invalidate
+        p = rng.choice(people)
+        number = f"+49{rng.randint(10**9, 10**10 - 1)}"
+        payload = {"people": [{"id": p.apollo_person_id, "phone_numbers": [{"sanitized_number": number}]}]}
+        upd = PhoneUpdate(p.apollo_person_id, number, "verified",
+                          payload["people"][0]["phone_numbers"], payload["people"][0], payload)
+        with SessionLocal() as db, db.begin():
+            person = find_person(db, upd.apollo_person_id)
+            if person is not None and apply_phone_update(db, person, upd):
+                cache.company_ids_for_person(db, person.id)
+
+    def org_upsert():
+        # enrich_company 1): organization_details merge + term postings
+        o = rng.choice(orgs)
+        with SessionLocal() as db, db.begin():
+            cols = org_detail_columns(o.raw_json)
+            db.merge(OrganizationDetails(company_id=o.company_id, raw_json=o.raw_json, **cols))
+            sync_company_terms(db, o.company_id, cols)
+
+    def terms_and():
+        # GET /segments/terms?all=…&all=…
+        techs = (rng.choice(orgs).raw_json or {}).get("technology_names") or ["tech-0"]
+        with SessionLocal() as db:
+            match_companies(db, [("technology", t.lower()) for t in techs[:2]], limit=100)
+
+    return {
+        "company_lookup": company_lookup,
+        "company_read": company_read,
+        "person_lookup": person_lookup,
+        "person_upsert": person_upsert,
+        "webhook_phone": webhook_phone,
+        "org_upsert": org_upsert,
+        "terms_and": terms_and,
+    }
+
+
+def measure(fn: Callable[[], None], iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    pct = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]
+    return {
+        "n": iterations,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "ops_s": round(1000 / statistics.fmean(timings), 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark enrich/webhook DB operations")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--only", help="comma-separated subset of operations")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    use_database(args.url)
+    rng = random.Random(args.seed)
+    ops = operations(rng)
+    wanted = args.only.split(",") if args.only else list(ops)
+
+    results = {}
+    print(f"{'operation':<16}{'n':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'ops/s':>10}")
+    for name in wanted:
+        r = results[name] = measure(ops[name], args.iterations, args.warmup)
+        print(f"{name:<16}{r['n']:>7}{r['mean_ms']:>10}{r['p50_ms']:>10}"
+              f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['ops_s']:>10}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"url": args.url.split("@")[-1], "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Shared fixtures: a SQLite database behind `SessionLocal`, fakeredis behind
+`get_redis()` / `get_async_redis()`, Celery on kombu's in-memory broker and
+an Apollo client whose HTTP session answers from canned responses.
+
+Settings are read from the environment on first use, so the variables are
+set before anything from `app` is imported.
+"""
+import os, tempfile
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="enricher-tests-"), "test.db")
+os.environ.update({
+    "APOLLO_API_KEY":    "test-key",
+    "MYSQL_URI":         f"sqlite:///{_DB_PATH}",
+    "REDIS_URL":         "redis://localhost:6379/15",
+    "PUBLIC_BASE_URL":   "http://testserver",
+    "KNOWN_IDS_ENABLED": "false",
+})
+
+import fakeredis, fakeredis.aioredis
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER PRIMARY KEY
+    return "INTEGER"
+
+
+from app.apollo import client as apollo_client
+from app.apollo.keys import KeyPool
+from app.core import redis as app_redis
+from app.core.celery_app import celery
+from app.core.settings import get_settings
+from app.db.models import Base
+from app.db.session import SessionLocal, get_engine, reset_pin
+
+
+celery.conf.broker_url = "memory://"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    Base.metadata.create_all(get_engine())
+    yield
+    get_engine().dispose()
+
+
+@pytest.fixture(autouse=True)
+def db_clean(_schema):
+    yield
+    reset_pin()
+    with get_engine().begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    """Both clients share one fake server, as the real ones share Redis."""
+    server = fakeredis.FakeServer()
+    app_redis._client = fakeredis.FakeRedis(server=server)
+    app_redis._client_pid = os.getpid()
+    app_redis._async_client = fakeredis.aioredis.FakeRedis(server=server)
+    app_redis._async_client_pid = os.getpid()
+    yield app_redis._client
+    app_redis._client = app_redis._async_client = None
+    app_redis._client_pid = app_redis._async_client_pid = None
+
+
+@pytest.fixture
+def broker():
+    """Drain messages published during the test: queue → [(task name, args, kwargs)]."""
+    def drain(queue: str) -> list[tuple]:
+        out = []
+        with celery.connection_for_read() as conn:
+            channel = conn.default_channel
+            while (message := channel.basic_get(queue, no_ack=True)) is not None:
+                args, kwargs, _ = message.decode()
+                out.append((message.headers["task"], tuple(args), kwargs))
+        return out
+    yield drain
+    with celery.connection_for_read() as conn:
+        for queue in list(conn.default_channel.queues):
+            conn.default_channel.queues[queue].queue.clear()
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """The cached Settings; attributes set through `monkeypatch` are undone."""
+    return get_settings()
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: dict | None = None, headers: dict | None = None):
+        self.status_code = status
+        self._body = body or {}
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.text = str(self._body)
+
+    def json(self) -> dict:
+        return self._body
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeApolloHttp:
+    """Stands in for the client's requests.Session.
+
+    `route(path, *answers)` queues answers for a path – a FakeResponse, a
+    dict (200 with that body), an exception to raise, or a callable taking
+    the request kwargs. The last answer repeats. Every request is kept in
+    `calls` as (method, path, headers, kwargs)."""
+
+    def __init__(self):
+        self.routes: dict[str, list] = {}
+        self.calls: list[tuple[str, str, dict, dict]] = []
+
+    def route(self, path: str, *answers) -> None:
+        self.routes[path] = list(answers)
+
+    def paths(self) -> list[str]:
+        return [path for _, path, _, _ in self.calls]
+
+    def request(self, method, url, timeout=None, headers=None, **kwargs):
+        path = url.removeprefix(apollo_client.ApolloClient.BASE)
+        self.calls.append((method, path, dict(headers or {}), kwargs))
+        answers = self.routes[path]
+        answer = answers.pop(0) if len(answers) > 1 else answers[0]
+        if callable(answer) and not isinstance(answer, type):
+            answer = answer(kwargs)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer if isinstance(answer, FakeResponse) else FakeResponse(200, answer)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def apollo(monkeypatch):
+    """The process' Apollo client (two keys) over a FakeApolloHttp: `apollo.http`."""
+    client = apollo_client.ApolloClient(KeyPool(["key-a", "key-b"]))
+    client.session = client.http = FakeApolloHttp()
+    monkeypatch.setattr(apollo_client, "_apollo", client)
+    monkeypatch.setattr(apollo_client, "_apollo_pid", os.getpid())
+    return client
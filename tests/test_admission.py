@@ -0,0 +1,68 @@
+import asyncio, threading, time
+
+import pytest
+from celery.contrib.testing.worker import start_worker
+
+from app.core import admission
+from app.core.celery_app import ENRICH_LOW_QUEUE, ENRICH_QUEUE, celery
+
+received: list[tuple] = []
+done = threading.Event()
+
+
+@celery.task(name="tests.record")
+def record(*args, **kwargs):
+    received.append((args, kwargs))
+    done.set()
+
+
+def test_enqueue_round_trips_through_a_worker():
+    received.clear()
+    done.clear()
+    asyncio.run(admission.enqueue("tests.record", "t-1", ("Acme", "acme.com"), {"debug": True}))
+    with start_worker(celery, pool="solo", perform_ping_check=False, queues=[ENRICH_QUEUE]):
+        assert done.wait(10)
+    assert received == [(("Acme", "acme.com"), {"debug": True})]
+
+
+def test_enqueue_many_publishes_one_message_per_call(broker):
+    admission.enqueue_many("app.tasks.enrich_company",
+                           [("t1", ("t1", "Acme", None)), ("t2", ("t2", "Beta", "beta.io"))],
+                           queue=ENRICH_LOW_QUEUE)
+    assert broker(ENRICH_LOW_QUEUE) == [
+        ("app.tasks.enrich_company", ("t1", "Acme", None), {}),
+        ("app.tasks.enrich_company", ("t2", "Beta", "beta.io"), {}),
+    ]
+    assert broker(ENRICH_QUEUE) == []
+
+
+def test_worker_capacity_counts_live_heartbeats_only(fake_redis):
+    admission._capacity = (0.0, 0)
+    admission._beat(fake_redis, "w1", 8)
+    admission._beat(fake_redis, "w2", 4)
+    fake_redis.zadd(admission.WORKERS_KEY, {"dead": time.time() - 1})
+    fake_redis.hset(admission.WORKER_SLOTS_KEY, "dead", 100)
+    assert asyncio.run(admission.worker_capacity()) == 12
+
+    admission._beat(fake_redis, "w1", 8)                 # prunes the expired worker
+    assert fake_redis.hkeys(admission.WORKER_SLOTS_KEY) == [b"w1", b"w2"]
+
+
+def test_worker_capacity_is_cached(fake_redis):
+    admission._capacity = (0.0, 0)
+    admission._beat(fake_redis, "w1", 8)
+    assert asyncio.run(admission.worker_capacity()) == 8
+    admission._beat(fake_redis, "w2", 4)
+    assert asyncio.run(admission.worker_capacity()) == 8
+    admission._capacity = (0.0, 0)
+
+
+@pytest.mark.parametrize("depth, slots, allowed", [(60, 0, False), (10, 4, True), (300, 4, False)])
+def test_backlog_limit_scales_with_live_slots(fake_redis, settings, monkeypatch, depth, slots, allowed):
+    monkeypatch.setattr(settings, "enrich_backlog_per_slot", 50)
+    monkeypatch.setattr(admission, "_capacity", (float("inf"), slots))
+    for _ in range(depth):
+        fake_redis.lpush(ENRICH_QUEUE, b"x")
+    decision = asyncio.run(admission.admit("10.0.0.1"))
+    assert decision.allowed is allowed
+    assert decision.allowed or decision.retry_after > 0
@@ -0,0 +1,34 @@
+import random
+
+from sqlalchemy import func, select
+
+from app.db.models import Company, CompanyPeople, Person, PersonDetails
+from app.db.session import SessionLocal
+from bench import generate, run
+
+
+def _count(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def test_generate_caps_people_and_keeps_rows_consistent(capsys):
+    stats = generate.generate(people=100, batch=40)
+    assert stats["people"] == 100
+    with SessionLocal() as db:
+        assert _count(db, Person) == _count(db, PersonDetails) == 100
+        assert _count(db, Company) == stats["companies"]
+        orphans = db.scalar(select(func.count()).select_from(CompanyPeople)
+                            .where(CompanyPeople.person_id.not_in(select(Person.id))))
+        assert orphans == 0
+
+    generate.generate(people=20, batch=40)          # appends after the existing ids
+    with SessionLocal() as db:
+        assert _count(db, Person) == 120
+
+
+def test_every_benchmark_operation_runs(capsys):
+    generate.generate(people=80, batch=40)
+    ops = run.operations(random.Random(1))
+    for name, op in ops.items():
+        result = run.measure(op, iterations=2, warmup=0)
+        assert result["n"] == 2 and result["p50_ms"] >= 0, name
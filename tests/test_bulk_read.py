@@ -0,0 +1,115 @@
+import io, zipfile
+from datetime import datetime
+
+import pytest
+
+from app.core.celery_app import ENRICH_LOW_QUEUE, ENRICH_TASK
+from app.db.models import Company
+from app.zoho import bulk_read
+from app.zoho.bulk_read import BulkReadFailed, normalize_domain
+
+
+def _zip(rows: list[tuple[str, str, str]]) -> bytes:
+    lines = ["id,Account_Name,Website"] + [",".join(r) for r in rows]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("123.csv", "﻿" + "\r\n".join(lines))      # Zoho writes a BOM
+    return buf.getvalue()
+
+
+class FakeZoho:
+    """One bulk-read job per page; each job reports IN PROGRESS once."""
+
+    def __init__(self, pages: list[list[tuple[str, str, str]]]):
+        self.pages = pages
+        self.polls: dict[str, int] = {}
+
+    def create_bulk_read(self, module, fields, page=1, criteria=None):
+        return f"job-{page}"
+
+    def bulk_read_job(self, job_id):
+        self.polls[job_id] = self.polls.get(job_id, 0) + 1
+        if self.polls[job_id] == 1:
+            return {"state": "IN PROGRESS"}
+        page = int(job_id.split("-")[1])
+        return {"state": "COMPLETED",
+                "result": {"count": len(self.pages[page - 1]), "more_records": page < len(self.pages)}}
+
+    def download_bulk_read(self, job_id, out):
+        data = _zip(self.pages[int(job_id.split("-")[1]) - 1])
+        out.write(data)
+        return len(data)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr(bulk_read.time, "sleep", waited.append)
+    return waited
+
+
+@pytest.mark.parametrize("raw, domain", [
+    ("https://www.Acme.com/about", "acme.com"),
+    ("acme.co.uk", "acme.co.uk"),
+    ("localhost", None),
+    ("", None),
+])
+def test_normalize_domain(raw, domain):
+    assert normalize_domain(raw) == domain
+
+
+def test_pages_are_filtered_deduped_and_enqueued_in_chunks(db, broker, sleeps, monkeypatch):
+    db.add(Company(name="Fresh", domain_resolved="fresh.com", enriched_at=datetime.utcnow()))
+    db.add(Company(name="Stale", domain_resolved="stale.com", enriched_at=datetime(2020, 1, 1)))
+    db.commit()
+    zoho = FakeZoho([
+        [("1", "Acme", "www.acme.com"), ("2", "Fresh", "fresh.com"), ("3", "Stale", "stale.com")],
+        [("4", "Acme GmbH", "acme.com"), ("5", "No Site", ""), ("6", "", "blank.com")],
+    ])
+    monkeypatch.setattr(bulk_read, "get_zoho", lambda: zoho)
+
+    stats = bulk_read.run(chunk_size=2)
+    assert stats == {"accounts": 5, "fresh": 1, "duplicate": 1, "enqueued": 3}
+    sent = broker(ENRICH_LOW_QUEUE)
+    assert {task for task, _, _ in sent} == {ENRICH_TASK}
+    assert all(len(args) == 3 for _, args, _ in sent)              # (task_id, name, domain)
+    assert [args[1:] for _, args, _ in sent] == [
+        ("Acme", "acme.com"), ("Stale", "stale.com"), ("No Site", None)]
+    assert sleeps == [bulk_read.POLL_FIRST, bulk_read.POLL_FIRST]     # one wait per job
+
+
+def test_dry_run_enqueues_nothing(broker, sleeps, monkeypatch):
+    monkeypatch.setattr(bulk_read, "get_zoho", lambda: FakeZoho([[("1", "Acme", "acme.com")]]))
+    assert bulk_read.run(dry_run=True)["enqueued"] == 1
+    assert broker(ENRICH_LOW_QUEUE) == []
+
+
+def test_waits_while_enrich_low_is_deep(fake_redis, broker, sleeps, settings, monkeypatch):
+    monkeypatch.setattr(settings, "zoho_enqueue_max_depth", 1)
+    fake_redis.rpush(ENRICH_LOW_QUEUE, "m1", "m2")
+
+    def drain(seconds):
+        sleeps.append(seconds)
+        fake_redis.lpop(ENRICH_LOW_QUEUE)
+
+    monkeypatch.setattr(bulk_read.time, "sleep", drain)
+    bulk_read.ingest([bulk_read.Account("1", "Acme", "acme.com")])
+    assert sleeps == [bulk_read.DEPTH_WAIT]
+    assert len(broker(ENRICH_LOW_QUEUE)) == 1
+
+
+def test_polling_backs_off_and_gives_up(sleeps):
+    class Stuck:
+        def bulk_read_job(self, job_id):
+            return {"state": "IN PROGRESS"}
+
+    with pytest.raises(BulkReadFailed, match="still IN PROGRESS"):
+        bulk_read.wait_for_job(Stuck(), "job-1", max_seconds=200)
+    assert sleeps == [5, 10, 20, 40, 60, 60, 60]
+
+    class Failed:
+        def bulk_read_job(self, job_id):
+            return {"state": "FAILURE"}
+
+    with pytest.raises(BulkReadFailed, match="failed"):
+        bulk_read.wait_for_job(Failed(), "job-1", max_seconds=200)
@@ -0,0 +1,21 @@
+import pytest
+
+from app.core.celery_app import ENRICH_QUEUE, MAINTENANCE_QUEUE, ZOHO_QUEUE, celery
+
+
+def _queue(task: str, options: dict | None = None) -> str:
+    return celery.amqp.router.route(dict(options or {}), task)["queue"].name
+
+
+@pytest.mark.parametrize("entry", sorted(celery.conf.beat_schedule))
+def test_beat_tasks_stay_off_the_enrich_queue(entry):
+    spec = celery.conf.beat_schedule[entry]
+    assert _queue(spec["task"], spec.get("options")) != ENRICH_QUEUE
+
+
+def test_housekeeping_is_routed_to_maintenance_when_called_directly():
+    for task in ("app.tasks.purge_company_search", "app.tasks.sweep_pending_webhooks",
+                 "app.tasks.refresh_stale_companies"):
+        assert _queue(task) == MAINTENANCE_QUEUE
+    assert _queue("app.tasks.push_phones_to_zoho") == ZOHO_QUEUE
+    assert _queue("app.tasks.enrich_company") == ENRICH_QUEUE
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.apollo.client import ApolloTransientError, replaying
+from app.core.checkpoint import Checkpoint, idempotency_key
+from app.db.models import Company, Person
+from app.db.session import SessionLocal
+from conftest import FakeResponse
+
+ORG = {"organization": {"id": "org-1", "name": "Acme", "primary_domain": "acme.com"}}
+
+
+def _people(*ids: str) -> dict:
+    return {"people": [{"id": i, "name": f"Person {i}", "title": "CTO"} for i in ids],
+            "pagination": {"page": 1, "per_page": 25, "total_pages": 1, "total_entries": len(ids)}}
+
+
+def _match(kwargs: dict) -> dict:
+    return {"person": {"id": kwargs["json"]["id"], "email": f"{kwargs['json']['id']}@acme.com"}}
+
+
+def test_idempotency_key_is_stable_per_call():
+    assert idempotency_key("t1", "org", "acme.com") == idempotency_key("t1", "org", "acme.com")
+    assert idempotency_key("t1", "org", "acme.com") != idempotency_key("t2", "org", "acme.com")
+    assert idempotency_key("t1", None) == idempotency_key("t1", "")
+
+
+def test_stages_and_people_survive_until_cleared(fake_redis):
+    ckpt = Checkpoint("t1")
+    ckpt.set("company", 7)
+    ckpt.mark_person("p1")
+    ckpt.put_response("k", {"a": 1})
+
+    again = Checkpoint("t1")                        # the retry
+    assert again.get("company") == 7 and again.person_done("p1")
+    assert again.get_response("k") == {"a": 1}
+    assert 0 < fake_redis.ttl("enrich:ckpt:t1") <= 7 * 24 * 3600
+
+    again.clear()
+    assert again.get("company") is None and not again.person_done("p1")
+    assert again.get_response("k") is None
+
+
+def test_responses_with_a_key_are_replayed(apollo):
+    apollo.http.route("/organizations/enrich", ORG)
+    ckpt = Checkpoint("t1")
+    with replaying(ckpt):
+        first = apollo.enrich_org(domain="acme.com", idempotency_key="org")
+        again = apollo.enrich_org(domain="acme.com", idempotency_key="org")
+        apollo.enrich_org(domain="acme.com")        # no key: never replayed
+    assert first == again == ORG
+    assert apollo.http.paths() == ["/organizations/enrich"] * 2
+    assert apollo.http.calls[0][2]["Idempotency-Key"] == "org"
+    assert "Idempotency-Key" not in apollo.http.calls[1][2]
+    assert ckpt.get_response("org") == ORG
+
+
+def test_failed_responses_are_not_stored(apollo):
+    apollo.http.route("/organizations/enrich", FakeResponse(503), ORG)
+    ckpt = Checkpoint("t1")
+    with replaying(ckpt):
+        with pytest.raises(ApolloTransientError):
+            apollo.enrich_org(domain="acme.com", idempotency_key="org")
+        assert ckpt.get_response("org") is None
+        assert apollo.enrich_org(domain="acme.com", idempotency_key="org") == ORG
+
+
+def test_a_retried_task_resumes_instead_of_paying_again(apollo, settings, monkeypatch):
+    import app.tasks
+    monkeypatch.setattr(settings, "people_match_top_n", 2)
+    apollo.http.route("/organizations/enrich", ORG)
+    apollo.http.route("/people/match", _match, FakeResponse(503), _match)
+    apollo.http.route("/mixed_people/search", _people("p1", "p2"))
+
+    app.tasks.enrich_company.apply(args=("t1", "Acme", "acme.com")).get()
+
+    calls = apollo.http.paths()
+    assert calls.count("/organizations/enrich") == 1
+    # p1 matched, p2 failed → retry: p1 is skipped, p2 matched
+    assert calls.count("/people/match") == 3
+    matched = [kw["json"]["id"] for _, path, _, kw in apollo.http.calls if path == "/people/match"]
+    assert matched == ["p1", "p2", "p2"]
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(Company)) == 1
+        assert db.scalars(select(Person.email).order_by(Person.apollo_person_id)).all() == [
+            "p1@acme.com", "p2@acme.com"]
+    assert Checkpoint("t1").get("org") is None      # cleared once the task finished
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+import redis
+
+from app.core import cache
+from app.db.models import Company, CompanyPeople, Person
+from app.db.session import SessionLocal
+
+
+@pytest.fixture
+def api():
+    from fastapi.testclient import TestClient
+    import app.tasks  # noqa: F401  (registers the task signals before the API imports)
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def company():
+    with SessionLocal() as db, db.begin():
+        comp = Company(name="Acme", domain_resolved="acme.com", is_enriched=True)
+        person = Person(apollo_person_id="a1", first_name="Ann")
+        db.add_all([comp, person])
+        db.flush()
+        db.add_all([CompanyPeople(company_id=comp.id, person_id=person.id),
+                    CompanyPeople(company_id=comp.id, person_id=person.id)])
+        return comp.id
+
+
+def _rename(company_id: int, name: str) -> None:
+    with SessionLocal() as db, db.begin():
+        db.get(Company, company_id).name = name
+
+
+def test_served_from_cache_until_invalidated(api, company):
+    first = api.get(f"/companies/{company}").json()
+    assert first["name"] == "Acme"
+    assert [p["apollo_person_id"] for p in first["people"]] == ["a1"]     # duplicate link folded
+
+    _rename(company, "Acme 2")
+    assert api.get(f"/companies/{company}").json()["name"] == "Acme"
+    cache.invalidate_company(company)
+    assert api.get(f"/companies/{company}").json()["name"] == "Acme 2"
+
+
+def test_by_domain_shares_the_entry(api, company):
+    assert api.get("/companies/by-domain/acme.com").json()["id"] == company
+    _rename(company, "Acme 2")
+    cache.invalidate_company(company)
+    assert api.get("/companies/by-domain/acme.com").json()["name"] == "Acme 2"
+
+
+def test_phone_webhook_invalidates_the_companies_of_the_person(api, company):
+    api.get(f"/companies/{company}")
+    body = {"people": [{"id": "a1", "status": "verified",
+                        "phone_numbers": [{"sanitized_number": "+4915112345678"}]}]}
+    assert api.post("/webhook/apollo_phone", json=body).json()["status"] == "ok"
+    people = api.get(f"/companies/{company}").json()["people"]
+    assert people[0]["personal_phone"] == "+4915112345678"
+
+
+def test_missing_company_is_not_cached(api, fake_redis):
+    assert api.get("/companies/999").status_code == 404
+    assert not fake_redis.exists(cache.company_key(999))
+
+
+def test_redis_outage_falls_back_to_the_db(api, company, monkeypatch):
+    def down():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(cache, "get_redis", down)
+    assert api.get(f"/companies/{company}").json()["name"] == "Acme"
+    cache.invalidate_company(company)                                   # logged, not raised
+
+
+def test_cached_payload_is_the_response(api, company, fake_redis):
+    body = api.get(f"/companies/{company}").content
+    assert json.loads(fake_redis.get(cache.company_key(company))) == json.loads(body)
@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import admission
+from app.core.celery_app import ENRICH_QUEUE
+
+
+@pytest.fixture
+def api(settings, monkeypatch):
+    import app.tasks  # noqa: F401
+    from app.main import app
+    monkeypatch.setattr(settings, "enrich_rate_limit_per_minute", 2)
+    monkeypatch.setattr(admission, "_capacity", (float("inf"), 4))     # 4 live slots
+    return TestClient(app)
+
+
+def test_rate_limit_ignores_caller_supplied_ids(api, broker):
+    codes = [
+        api.post("/enrich", json={"company_name": "Acme"}, headers={"X-Caller-Id": f"c{i}"}).status_code
+        for i in range(3)
+    ]
+    assert codes == [202, 202, 429]
+    assert len(broker(ENRICH_QUEUE)) == 2
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Company, CompanyPeople, Person
+from app.export import export_query
+
+FROM, TO = datetime(2025, 7, 1), datetime(2025, 8, 1)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _row(db, n: int, company_updated: datetime, person_updated: datetime) -> None:
+    db.add(Company(id=n, name=f"c{n}", updated_at=company_updated))
+    db.add(Person(id=n, apollo_person_id=f"p{n}", updated_at=person_updated))
+    db.add(CompanyPeople(id=n, company_id=n, person_id=n))
+    db.flush()
+
+
+def _exported(db, updated_from=None, updated_to=None) -> set[int]:
+    return {row.company_id for row in db.execute(export_query(updated_from, updated_to))}
+
+
+def test_sides_outside_the_window_at_opposite_ends_are_not_exported(db):
+    _row(db, 1, company_updated=datetime(2025, 6, 1), person_updated=datetime(2025, 9, 1))
+    _row(db, 2, company_updated=datetime(2025, 9, 1), person_updated=datetime(2025, 6, 1))
+    assert _exported(db, FROM, TO) == set()
+
+
+def test_either_side_inside_the_window_is_exported(db):
+    _row(db, 1, company_updated=datetime(2025, 7, 15), person_updated=datetime(2025, 9, 1))
+    _row(db, 2, company_updated=datetime(2025, 6, 1), person_updated=datetime(2025, 7, 15))
+    _row(db, 3, company_updated=datetime(2025, 6, 1), person_updated=datetime(2025, 6, 1))
+    assert _exported(db, FROM, TO) == {1, 2}
+
+
+def test_missing_bound_is_open(db):
+    _row(db, 1, company_updated=datetime(2025, 6, 1), person_updated=datetime(2025, 6, 1))
+    _row(db, 2, company_updated=datetime(2025, 9, 1), person_updated=datetime(2025, 6, 1))
+    assert _exported(db, updated_from=FROM) == {2}
+    assert _exported(db, updated_to=FROM) == {1, 2}
+    assert _exported(db) == {1, 2}
+
+
+@pytest.fixture
+def api():
+    from fastapi.testclient import TestClient
+    import app.tasks  # noqa: F401
+    from app.main import app
+    return TestClient(app)
+
+
+def test_http_export_is_off_without_a_token(api):
+    assert api.get("/export/enriched").status_code == 404
+
+
+def test_http_export_needs_the_token(api, settings, monkeypatch):
+    monkeypatch.setattr(settings, "export_token", "s3cret")
+    assert api.get("/export/enriched").status_code == 401
+    assert api.get("/export/enriched", headers={"Authorization": "Bearer nope"}).status_code == 401
+    resp = api.get("/export/enriched", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+
+def test_export_reads_from_a_replica_even_when_pinned(tmp_path, settings, monkeypatch):
+    from app.db import session as db_session
+
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(settings, "mysql_replica_uris", replica_url)
+    db_session._pinned.set(True)                     # something in this request wrote
+    try:
+        with db_session.SessionLocal(bulk_read=True) as bulk, db_session.SessionLocal() as plain:
+            assert str(bulk.get_bind().url) == replica_url
+            assert plain.get_bind() is db_session.get_engine()
+    finally:
+        db_session.reset_pin()
+        db_session.dispose_engine()
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from app.apollo import client as apollo_client
+from app.core import redis as app_redis
+from app.db import session as db_session
+from app.db.session import get_engine
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+
+def _in_child(check) -> str:
+    """Run `check()` in a forked child; returns what it wrote (or the error)."""
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:                                    # child
+        try:
+            out = check()
+        except BaseException as exc:
+            out = f"error: {exc!r}"
+        os.write(write, str(out).encode())
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    with os.fdopen(read) as f:
+        return f.read()
+
+
+def test_child_builds_its_own_pools_and_leaves_the_parents_alone(monkeypatch):
+    monkeypatch.setattr(app_redis, "_client", None)     # the real lazy path
+    parent_engine, parent_redis = get_engine(), app_redis.get_redis()
+    with parent_engine.connect() as conn:               # a pooled connection to inherit
+        conn.execute(text("SELECT 1"))
+    parent_apollo = apollo_client.get_apollo()
+
+    def check():
+        fresh = [
+            get_engine() is not parent_engine,
+            app_redis.get_redis() is not parent_redis,
+            apollo_client.get_apollo() is not parent_apollo,
+        ]
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return "ok" if all(fresh) else f"shared: {fresh}"
+
+    assert _in_child(check) == "ok"
+    assert get_engine() is parent_engine
+    assert app_redis.get_redis() is parent_redis
+    with get_engine().connect() as conn:                # parent pool still usable
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_worker_process_init_drops_inherited_resources():
+    import app.tasks
+
+    get_engine()
+    app.tasks._reset_process_resources()
+    assert db_session._engine is None and app_redis._client is None
+    assert apollo_client._apollo is None
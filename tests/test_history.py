@@ -0,0 +1,71 @@
+import pytest
+
+from app import history
+from app.db.models import Person, PersonDetails
+from app.db.session import SessionLocal
+from app.history import apply_patch, json_diff, payload_at, versions
+
+CASES = [
+    ({"a": 1, "b": [1, 2, 3]}, {"a": 1, "b": [1, 3], "c": {"d": None}}),
+    ({"x/y": 1, "t~": 2}, {"x/y": 2}),
+    ([1, 2], [1, 2, 3, 4]),
+    ({"n": 1}, {"n": True}),                        # 1 and True differ in JSON
+    ({"a": 1}, [1]),
+]
+
+
+@pytest.mark.parametrize("old, new", CASES)
+def test_patch_turns_old_into_new(old, new):
+    ops = json_diff(old, new)
+    assert apply_patch(old, ops) == new and type(apply_patch(old, ops)) is type(new)
+    assert json_diff(new, new) == []
+
+
+def _details() -> int:
+    with SessionLocal() as db, db.begin():
+        person = Person(apollo_person_id="a1")
+        db.add(person)
+        db.flush()
+        db.add(PersonDetails(person_id=person.id, raw_json=_doc(0)))
+        return person.id
+
+
+def _doc(i: int) -> dict:
+    return {"id": "a1", "title": f"title {i}", "bio": "x" * 200}
+
+
+def _write(pid: int, doc: dict, commit: bool = True) -> None:
+    with SessionLocal() as db:
+        db.get(PersonDetails, pid).raw_json = doc
+        db.commit() if commit else db.rollback()
+
+
+def test_each_commit_is_a_version_and_every_version_rebuilds(settings, monkeypatch):
+    monkeypatch.setattr(settings, "history_keyframe_every", 3)
+    pid = _details()
+    for i in range(1, 6):
+        _write(pid, _doc(i))
+    _write(pid, _doc(5))                            # unchanged
+    _write(pid, _doc(99), commit=False)             # rolled back
+
+    with SessionLocal() as db:
+        rows = versions(db, "person", pid)
+        assert [r.version for r in rows] == [1, 2, 3, 4, 5, 6]
+        assert [r.is_keyframe for r in rows] == [True, False, False, True, False, False]
+        for row in rows:
+            assert payload_at(db, "person", pid, version=row.version)[1] == _doc(row.version - 1)
+        assert payload_at(db, "person", pid)[1] == _doc(5)
+
+
+def test_one_version_per_transaction():
+    pid = _details()
+    with SessionLocal() as db:
+        details = db.get(PersonDetails, pid)
+        details.raw_json = _doc(1)
+        db.flush()
+        details.raw_json = _doc(2)
+        db.commit()
+    with SessionLocal() as db:
+        rows = versions(db, "person", pid)
+        assert len(rows) == 2
+        assert history.apply_patch(rows[0].doc, rows[1].doc) == _doc(2)
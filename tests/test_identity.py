@@ -0,0 +1,89 @@
+from sqlalchemy import select
+
+from app.db.models import Company, CompanyPeople, Person, PersonDetails, PersonIdentity
+from app.db.session import SessionLocal
+from app.identity import (
+    dedupe, find_person, identity_keys, normalize_email, normalize_linkedin, resolve_identity,
+)
+
+LINKEDIN = "https://www.linkedin.com/in/Jane-Doe/?trk=x"
+
+
+def _person(db, apollo_id: str, company_id: int | None = None, **columns) -> Person:
+    person = Person(apollo_person_id=apollo_id, **columns)
+    db.add(person)
+    db.flush()
+    if company_id is not None:
+        db.add(CompanyPeople(company_id=company_id, person_id=person.id))
+    return person
+
+
+def _company(db) -> int:
+    company = Company(name="c")
+    db.add(company)
+    db.flush()
+    return company.id
+
+
+def test_keys_are_normalised_and_placeholders_ignored():
+    assert normalize_linkedin(LINKEDIN) == "in/jane-doe"
+    assert normalize_email(" Jane@Acme.COM ") == "jane@acme.com"
+    assert normalize_email("email_not_unlocked@domain.com") is None
+    person = Person(email="email_not_unlocked@acme.com", personal_email="jane@gmail.com",
+                    personal_phone="+49 151 1234-5678", linkedin_url=LINKEDIN)
+    assert identity_keys(person) == {
+        ("linkedin", "in/jane-doe"), ("email", "jane@gmail.com"), ("phone", "+4915112345678")}
+
+
+def test_job_change_folds_into_the_older_row(db):
+    old_co, new_co = _company(db), _company(db)
+    keep = _person(db, "old-id", old_co, linkedin_url=LINKEDIN, title="Engineer")
+    db.add(PersonDetails(person_id=keep.id))
+    resolve_identity(db, keep)
+
+    dupe = _person(db, "new-id", new_co, linkedin_url=LINKEDIN.upper(), email="jane@new.com")
+    db.add(PersonDetails(person_id=dupe.id, headline="CTO at New"))
+    db.flush()
+    dupe_id = dupe.id
+    survivor = resolve_identity(db, dupe)
+    db.commit()
+
+    assert survivor.id == keep.id
+    assert db.get(Person, dupe_id) is None
+    assert survivor.email == "jane@new.com" and survivor.title == "Engineer"
+    assert db.get(PersonDetails, keep.id).headline == "CTO at New"
+    assert sorted(db.scalars(
+        select(CompanyPeople.company_id).where(CompanyPeople.person_id == keep.id))) == [old_co, new_co]
+    assert db.scalars(select(PersonIdentity.key).where(
+        PersonIdentity.kind == "apollo", PersonIdentity.person_id == keep.id)).all() == ["new-id"]
+    assert find_person(db, "new-id").id == keep.id          # the merged id is an alias
+
+
+def test_shared_company_link_is_not_duplicated(db):
+    co = _company(db)
+    keep = _person(db, "a", co, personal_email="j@x.com")
+    resolve_identity(db, keep)
+    dupe = _person(db, "b", co, personal_email="J@X.com")
+    resolve_identity(db, dupe)
+    db.commit()
+    assert db.scalars(select(CompanyPeople.person_id).where(CompanyPeople.company_id == co)).all() == [keep.id]
+
+
+def test_find_person_by_stub_key(db):
+    person = _person(db, "a", linkedin_url=LINKEDIN)
+    resolve_identity(db, person)
+    db.commit()
+    assert find_person(db, "unknown", {("linkedin", "in/jane-doe")}).id == person.id
+    assert find_person(db, "unknown") is None
+
+
+def test_dedupe_merges_rows_written_before_the_index(db):
+    for i in range(3):
+        _person(db, f"id-{i}", linkedin_url=LINKEDIN)
+    _person(db, "other", linkedin_url="https://linkedin.com/in/someone-else")
+    db.commit()
+
+    assert dedupe(chunk_size=2) == 2
+    with SessionLocal() as fresh:
+        assert fresh.scalars(select(Person.apollo_person_id).order_by(Person.id)).all() == ["id-0", "other"]
+        assert find_person(fresh, "id-2").apollo_person_id == "id-0"
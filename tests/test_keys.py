@@ -0,0 +1,76 @@
+import pytest
+import redis
+
+from app.apollo import keys as keys_module
+from app.apollo.client import ApolloTransientError
+from app.apollo.keys import KeyPool, NoHealthyKey, fingerprint
+from conftest import FakeResponse
+
+A, B = fingerprint("key-a"), fingerprint("key-b")
+
+
+def _used(apollo) -> list[str]:
+    return [headers["x-api-key"] for _, _, headers, _ in apollo.http.calls]
+
+
+def test_remaining_is_the_tightest_window(fake_redis):
+    pool = KeyPool(["key-a"])
+    pool.record(A, 200, {"x-minute-requests-left": "40", "x-hourly-requests-left": "7",
+                         "x-24-hour-requests-left": "900", "x-rate-limit-remaining": "n/a"})
+    assert fake_redis.hget(f"apollo:key:{A}", "remaining") == b"7"
+
+
+def test_acquire_prefers_the_key_with_most_quota_and_reserves_a_unit(fake_redis):
+    pool = KeyPool(["key-a", "key-b"])
+    pool.record(A, 200, {"x-minute-requests-left": "3"})
+    pool.record(B, 200, {"x-minute-requests-left": "5"})
+    picks = [pool.acquire()[1] for _ in range(4)]
+    # b: 5 → 4 → 3, then the two keys take turns
+    assert picks[:2] == ["key-b", "key-b"]
+    remaining = sorted(int(fake_redis.hget(f"apollo:key:{fp}", "remaining")) for fp in (A, B))
+    assert remaining == [2, 2]
+
+
+def test_429_benches_the_key_and_the_call_moves_on(apollo, fake_redis):
+    apollo.keys.record(B, 200, {"x-minute-requests-left": "1"})      # a first, then b
+    apollo.http.route("/organizations/enrich",
+                      FakeResponse(429, headers={"retry-after": "30"}), {"organization": {}})
+    assert apollo.enrich_org(domain="acme.com") == {"organization": {}}
+    assert _used(apollo) == ["key-a", "key-b"]
+    assert 0 < fake_redis.ttl(f"apollo:key:{A}:ejected") <= 30
+    assert fake_redis.hget(f"apollo:key:{A}", "remaining") == b"0"
+
+    apollo.http.calls.clear()
+    apollo.enrich_org(domain="acme.com")
+    assert _used(apollo) == ["key-b"]                               # a is still benched
+
+
+def test_every_key_rate_limited_is_transient(apollo):
+    apollo.http.route("/organizations/enrich", FakeResponse(429))
+    with pytest.raises(ApolloTransientError):
+        apollo.enrich_org(domain="acme.com")
+    assert sorted(_used(apollo)) == ["key-a", "key-b"]
+    with pytest.raises(ApolloTransientError, match="ejected"):
+        apollo.enrich_org(domain="acme.com")                        # nothing left to try
+
+
+def test_repeated_errors_eject_a_key(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(settings, "apollo_key_max_errors", 3)
+    pool = KeyPool(["key-a"])
+    pool.record(A, 500)
+    pool.record(A, None)
+    pool.record(A, 200)                                             # success resets the streak
+    for _ in range(3):
+        pool.record(A, 502)
+    assert fake_redis.exists(f"apollo:key:{A}:ejected")
+    with pytest.raises(NoHealthyKey):
+        pool.acquire()
+
+
+def test_round_robin_when_redis_is_down(monkeypatch):
+    def down():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(keys_module, "get_redis", down)
+    pool = KeyPool(["key-a", "key-b"])
+    assert sorted(pool.acquire()[1] for _ in range(4)) == ["key-a", "key-a", "key-b", "key-b"]
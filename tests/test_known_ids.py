@@ -0,0 +1,155 @@
+import pytest
+from sqlalchemy import event
+
+from app import identity, known_ids
+from app.db.models import Person
+from app.db.session import SessionLocal, get_engine
+from app.known_ids import BloomFilter, KnownIds, snapshot_key
+
+
+@pytest.fixture
+def known(settings, monkeypatch):
+    """An enabled index whose sync thread does nothing; tests call `_load` themselves."""
+    monkeypatch.setattr(settings, "known_ids_enabled", True)
+    monkeypatch.setattr(settings, "known_ids_capacity", 1_000)
+    monkeypatch.setattr(KnownIds, "_run", lambda self: None)
+    known_ids.reset_known_ids()
+    yield known_ids.get_known_ids()
+    known_ids.reset_known_ids()
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    event.listen(get_engine(), "before_cursor_execute", record)
+    yield seen
+    event.remove(get_engine(), "before_cursor_execute", record)
+
+
+def _person(apollo_id: str, commit: bool = True) -> int:
+    with SessionLocal() as db:
+        person = Person(apollo_person_id=apollo_id)
+        db.add(person)
+        db.flush()
+        known_ids.add(db, apollo_id, person.id)
+        db.commit() if commit else db.rollback()
+        return person.id
+
+
+def test_bloom_has_no_false_negatives_and_matches_redis_bits(fake_redis):
+    bloom = BloomFilter(1_000, 0.01)
+    ids = [f"p{i}" for i in range(1_000)]
+    for apollo_id in ids:
+        bloom.add(apollo_id)
+    assert all(apollo_id in bloom for apollo_id in ids)
+
+    for apollo_id in ids:                           # same offsets through SETBIT
+        for pos in bloom._positions(apollo_id):
+            fake_redis.setbit("bits", pos, 1)
+    loaded = BloomFilter(1_000, 0.01)
+    loaded.load(fake_redis.get("bits"))
+    assert loaded.bits == bloom.bits
+    assert loaded.count == pytest.approx(1_000, rel=0.1)
+
+
+def test_first_load_builds_from_the_db_and_later_loads_do_not(known, statements, fake_redis):
+    with SessionLocal() as db, db.begin():          # stored before the index existed
+        db.add(Person(apollo_person_id="old"))
+
+    known._load()
+    assert known.ready and known.might_exist("old") and not known.might_exist("new")
+    assert fake_redis.exists(f"{snapshot_key()}:ready")
+    assert not fake_redis.exists(f"{snapshot_key()}:build")
+
+    statements.clear()
+    other = KnownIds()                              # another process
+    other._load()
+    assert other.might_exist("old")
+    assert statements == []
+
+
+def test_build_scans_a_replica(known, monkeypatch):
+    opened = []
+    real = known_ids.SessionLocal
+
+    def session(**kw):
+        opened.append(kw)
+        return real(**kw)
+
+    monkeypatch.setattr(known_ids, "SessionLocal", session)
+    known._load()
+    assert opened == [{"bulk_read": True}]
+
+
+def test_waits_for_another_builder(known, fake_redis, monkeypatch):
+    key = snapshot_key()
+    fake_redis.set(f"{key}:build", 1)
+
+    def other_process_finishes(seconds):
+        fake_redis.delete(f"{key}:build")
+        fake_redis.set(f"{key}:ready", 1)
+
+    monkeypatch.setattr(known_ids.time, "sleep", other_process_finishes)
+    monkeypatch.setattr(KnownIds, "_build", staticmethod(lambda r, key: pytest.fail("scanned")))
+    known._load()
+    assert known.ready
+
+
+def test_committed_ids_are_announced_rolled_back_ones_are_not(known, fake_redis):
+    known._load()
+    pubsub = fake_redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(known_ids.CHANNEL)
+
+    kept = _person("kept")
+    _person("dropped", commit=False)
+
+    assert known.might_exist("kept") and known.pk("kept") == kept
+    assert not known.might_exist("dropped")
+    messages = [m["data"] for _ in range(5) if (m := pubsub.get_message(timeout=0.05))]
+    assert messages == [f"kept {kept}".encode()]
+
+    reloaded = KnownIds()                           # the shared bitmap has it too
+    reloaded._load()
+    assert reloaded.might_exist("kept") and not reloaded.might_exist("dropped")
+
+
+def test_savepoint_release_waits_for_the_outer_commit(known):
+    known._load()
+    with SessionLocal() as db:
+        db.begin()
+        with db.begin_nested():
+            person = Person(apollo_person_id="inner")
+            db.add(person)
+            db.flush()
+            known_ids.add(db, "inner", person.id)
+        assert not known.might_exist("inner")
+        db.rollback()
+    assert not known.might_exist("inner")
+
+
+def test_find_people_skips_queries_for_unknown_ids(known, statements):
+    pid = _person("stored")
+    known._load()
+    known.forget("stored")                          # only the filter, not the LRU
+
+    with SessionLocal() as db:
+        statements.clear()
+        assert identity.find_people(db, ["new-1", "new-2"]) == {}
+        assert statements == []
+
+        assert identity.find_people(db, ["stored"])["stored"].id == pid
+        assert known.pk("stored") == pid
+
+
+def test_find_people_drops_a_cached_pk_that_was_merged_away(known):
+    known._load()
+    pid = _person("gone")
+    with SessionLocal() as db, db.begin():
+        db.delete(db.get(Person, pid))
+    with SessionLocal() as db:
+        assert identity.find_people(db, ["gone"]) == {}
+    assert known.pk("gone") is None
@@ -0,0 +1,86 @@
+import json, logging, queue
+
+import pytest
+
+from app.core import logging as app_logging
+from app.core.logging import (
+    JsonFormatter, _Gate, _TruncatingQueueHandler, debug_scope, log_context, parse_sample_rates,
+)
+
+
+@pytest.fixture
+def emit():
+    """A logger wired like setup_logging() does, minus the listener thread:
+    returns (log, records) where records() drains the queue."""
+    q = queue.Queue(maxsize=3)
+    handler = _TruncatingQueueHandler(q, max_chars=20, service="test")
+    handler.addFilter(_Gate({"apollo.response": 0.0, "person.upserted": 1.0}))
+    log = logging.getLogger("tests.logging")
+    log.handlers, log.propagate = [handler], False
+    log.setLevel(logging.DEBUG)
+
+    def records():
+        out = []
+        while not q.empty():
+            out.append(q.get_nowait())
+        return out
+
+    log.handler = handler
+    yield log, records
+    log.handlers = []
+
+
+def test_messages_are_formatted_once_and_truncated(emit):
+    log, records = emit
+    payload = {"people": ["x" * 100]}
+    log.info("payload %s", payload)
+    payload["people"].clear()                       # mutated after the call
+    (record,) = records()
+    assert record.msg.startswith("payload {'people': [") and "more chars]" in record.msg
+    assert record.args is None
+
+
+def test_tagged_events_are_sampled_but_warnings_kept(emit):
+    log, records = emit
+    log.info("dropped", extra={"event": "apollo.response"})
+    log.warning("kept", extra={"event": "apollo.response"})
+    log.info("kept too", extra={"event": "person.upserted"})
+    log.info("untagged")
+    assert [r.msg for r in records()] == ["kept", "kept too", "untagged"]
+
+
+def test_debug_only_inside_a_debug_scope(emit):
+    log, records = emit
+    log.debug("outside")
+    with debug_scope():
+        log.debug("inside")
+    with debug_scope(False):
+        log.debug("disabled scope")
+    assert [r.msg for r in records()] == ["inside"]
+    assert logging.getLogger().level == app_logging._base_level
+
+
+def test_context_fields_reach_the_json_line(emit):
+    log, records = emit
+    with log_context(task_id="t1"):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed", extra={"event": "person.upserted"})
+    (record,) = records()
+    line = json.loads(JsonFormatter(max_chars=50).format(record))
+    assert line["task_id"] == "t1" and line["service"] == "test" and line["event"] == "person.upserted"
+    assert line["msg"] == "failed"
+    assert line["exc"].startswith("Traceback") and line["exc"].endswith("more chars]")   # 4 × max_chars
+
+
+def test_full_queue_drops_instead_of_blocking(emit):
+    log, records = emit
+    for i in range(5):
+        log.info("m%d", i)
+    assert [r.msg for r in records()] == ["m0", "m1", "m2"]
+    assert log.handler.dropped == 2
+
+
+def test_parse_sample_rates_clamps():
+    assert parse_sample_rates("a=0.5, b=2,c=-1,") == {"a": 0.5, "b": 1.0, "c": 0.0}
@@ -0,0 +1,69 @@
+import threading, time
+
+from app.apollo.paginate import iterate_sync, paginate
+
+
+class Pages:
+    """A fake search endpoint: `total` items, `per_page` per page. Later pages
+    answer faster, so completion order is the reverse of page order."""
+
+    def __init__(self, total: int, per_page: int = 10, delay: float = 0.0):
+        self.total, self.per_page, self.delay = total, per_page, delay
+        self.fetched: list[int] = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, page: int) -> dict:
+        with self._lock:
+            self.fetched.append(page)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay / page)
+        with self._lock:
+            self.active -= 1
+        start = (page - 1) * self.per_page
+        people = [{"id": i} for i in range(start, min(start + self.per_page, self.total))]
+        total_pages = -(-self.total // self.per_page)
+        return {"people": people, "pagination": {"total_pages": total_pages, "per_page": self.per_page}}
+
+
+def _run(pages: Pages, **kw) -> list[int]:
+    agen = paginate(pages, items=lambda r: r["people"], **kw)
+    return [p["id"] for batch in iterate_sync(agen) for p in batch]
+
+
+def test_pages_come_back_in_order_with_bounded_concurrency():
+    pages = Pages(total=95, delay=0.05)
+    assert _run(pages, concurrency=3) == list(range(95))
+    assert sorted(pages.fetched) == list(range(1, 11))
+    assert pages.peak <= 3
+
+
+def test_max_items_trims_and_skips_later_pages():
+    pages = Pages(total=100)
+    assert _run(pages, concurrency=4, max_items=25) == list(range(25))
+    assert max(pages.fetched) == 3
+
+
+def test_empty_page_stops_early():
+    pages = Pages(total=20)
+
+    def fetch(page):
+        resp = pages(page)
+        resp["pagination"]["total_pages"] = 5       # Apollo over-reports
+        return resp
+
+    assert [p["id"] for b in iterate_sync(paginate(fetch, items=lambda r: r["people"], concurrency=1))
+            for p in b] == list(range(20))
+    assert 5 not in pages.fetched
+
+
+def test_fetching_follows_the_consumer():
+    pages = Pages(total=100)
+    it = iterate_sync(paginate(pages, items=lambda r: r["people"], concurrency=2))
+    next(it)
+    next(it)
+    time.sleep(0.05)
+    assert max(pages.fetched) <= 4                  # page 2 taken → pages 3 and 4 in flight
+    it.close()                                      # closes the generator and its loop
+    assert max(pages.fetched) <= 4
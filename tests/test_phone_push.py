@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from app.core.celery_app import ZOHO_QUEUE
+from app.db.models import Person
+from app.db.session import SessionLocal
+from app.zoho import phone_push
+from app.zoho.client import ZohoTransientError
+from app.zoho.phone_push import BUFFER_KEY, INFLIGHT_KEY, buffer, flush
+
+
+class FakeZoho:
+    def __init__(self):
+        self.upserts: list[list[dict]] = []
+        self.fail = 0
+
+    def upsert(self, module, records, duplicate_check):
+        if self.fail:
+            self.fail -= 1
+            raise ZohoTransientError("503")
+        self.upserts.append(records)
+        return [{"status": "success"} for _ in records]
+
+    def emails(self) -> list[str]:
+        return [r["Email"] for batch in self.upserts for r in batch]
+
+
+@pytest.fixture
+def zoho(monkeypatch):
+    fake = FakeZoho()
+    monkeypatch.setattr(phone_push, "get_zoho", lambda: fake)
+    return fake
+
+
+def _person(name: str, phone="+4915112345678", status="verified", email=True) -> int:
+    with SessionLocal() as db, db.begin():
+        person = Person(apollo_person_id=name, first_name=name, personal_phone=phone,
+                        phone_verification_status=status,
+                        email=f"{name}@acme.com" if email else None)
+        db.add(person)
+        db.flush()
+        return person.id
+
+
+def test_repeated_updates_are_pushed_once_with_the_current_number(zoho):
+    pid = _person("ann")
+    buffer(pid)
+    buffer(pid)
+    with SessionLocal() as db, db.begin():
+        db.get(Person, pid).personal_phone = "+4915100000002"
+    assert flush(force=True) == {"pushed": 1, "skipped": 0, "rejected": 0}
+    assert zoho.upserts == [[{"Email": "ann@acme.com", "First_Name": "ann", "Last_Name": "-",
+                              "Mobile": "+4915100000002"}]]
+
+
+def test_buffer_waits_for_the_window_or_a_full_batch(zoho, fake_redis, settings, monkeypatch, broker):
+    monkeypatch.setattr(settings, "zoho_push_window_seconds", 30)
+    monkeypatch.setattr(settings, "zoho_push_batch_size", 3)
+    ids = [_person(n) for n in ("a", "b", "c")]
+    buffer(ids[0])
+    assert flush() == {"pushed": 0, "skipped": 0, "rejected": 0}        # too young, too small
+
+    buffer(*ids[1:])                                                    # full → one kick
+    buffer(ids[0])
+    assert [task for task, _, _ in broker(ZOHO_QUEUE)] == [phone_push.PUSH_TASK]
+    assert flush()["pushed"] == 3
+
+    buffer(ids[0])
+    fake_redis.zadd(BUFFER_KEY, {str(ids[0]): time.time() - 60})
+    assert flush()["pushed"] == 1                                       # old enough
+
+
+def test_people_without_a_verified_phone_or_email_are_skipped(zoho):
+    ids = [_person("ok"), _person("unverified", status="invalid"), _person("noemail", email=False)]
+    buffer(*ids)
+    assert flush(force=True) == {"pushed": 1, "skipped": 2, "rejected": 0}
+    assert zoho.emails() == ["ok@acme.com"]
+
+
+def test_failed_batch_stays_inflight_and_is_resumed_first(zoho, fake_redis, monkeypatch):
+    monkeypatch.setattr(phone_push, "ZOHO_UPSERT_MAX", 2)
+    ids = [_person(n) for n in ("a", "b", "c")]
+    buffer(*ids)
+    zoho.fail = 1
+    with pytest.raises(ZohoTransientError):
+        flush(force=True)
+    assert fake_redis.zcard(INFLIGHT_KEY) == 3
+
+    late = _person("late")
+    buffer(late)                                    # keeps buffering meanwhile
+    zoho.fail = 0
+    assert flush()["pushed"] == 3                   # the inflight batch, not the new buffer
+    assert not fake_redis.exists(INFLIGHT_KEY)
+    assert fake_redis.zcard(BUFFER_KEY) == 1
+    assert flush(force=True)["pushed"] == 1
+    assert sorted(zoho.emails()) == ["a@acme.com", "b@acme.com", "c@acme.com", "late@acme.com"]
+
+
+def test_partial_failure_does_not_resend_accepted_batches(zoho, fake_redis, monkeypatch):
+    monkeypatch.setattr(phone_push, "ZOHO_UPSERT_MAX", 2)
+    ids = [_person(n) for n in ("a", "b", "c")]
+    buffer(*ids)
+    real = zoho.upsert
+    calls = []
+
+    def second_fails(module, records, keys):
+        calls.append(records)
+        if len(calls) == 2:
+            raise ZohoTransientError("503")
+        return real(module, records, keys)
+
+    monkeypatch.setattr(zoho, "upsert", second_fails)
+    with pytest.raises(ZohoTransientError):
+        flush(force=True)
+    assert fake_redis.zcard(INFLIGHT_KEY) == 1
+    monkeypatch.setattr(zoho, "upsert", real)
+    assert flush()["pushed"] == 1
+    assert sorted(zoho.emails()) == ["a@acme.com", "b@acme.com", "c@acme.com"]
+
+
+def test_only_one_flush_at_a_time(zoho, fake_redis):
+    buffer(_person("a"))
+    fake_redis.set(phone_push.LOCK_KEY, "someone-else")
+    assert flush(force=True)["pushed"] == 0
+    assert zoho.upserts == []
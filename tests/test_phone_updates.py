@@ -0,0 +1,93 @@
+import asyncio, json, time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import phone_updates
+from app.db.models import Person
+from app.db.session import SessionLocal
+from app.phone_updates import (
+    PENDING_KEY, PENDING_TS_KEY, apply_pending, park, parse_phone_payload, sweep_pending,
+)
+
+
+def _payload(apollo_id: str, number: str = "+4915112345678") -> dict:
+    return {"people": [{"id": apollo_id, "status": "verified",
+                        "phone_numbers": [{"sanitized_number": number}]}]}
+
+
+def _park(apollo_id: str, number: str = "+4915112345678", age: float = 0) -> None:
+    asyncio.run(park(parse_phone_payload(_payload(apollo_id, number))))
+    if age:
+        phone_updates.get_redis().zadd(PENDING_TS_KEY, {apollo_id: time.time() - age})
+
+
+def _person(apollo_id: str) -> int:
+    with SessionLocal() as db, db.begin():
+        person = Person(apollo_person_id=apollo_id)
+        db.add(person)
+        db.flush()
+        return person.id
+
+
+def _phone(person_id: int) -> str | None:
+    with SessionLocal() as db:
+        return db.get(Person, person_id).personal_phone
+
+
+def test_apply_pending_applies_and_unparks(fake_redis):
+    _park("a1")
+    pid = _person("a1")
+    assert apply_pending(["a1"]) == 1
+    assert _phone(pid) == "+4915112345678"
+    assert not fake_redis.hexists(PENDING_KEY, "a1")
+    assert fake_redis.zscore(PENDING_TS_KEY, "a1") is None
+
+
+def test_failed_commit_keeps_the_payload_parked(fake_redis, monkeypatch):
+    _park("a1")
+    _person("a1")
+
+    def boom(payloads, filtered=True):
+        raise OperationalError("UPDATE people", {}, Exception("lost connection"))
+
+    monkeypatch.setattr(phone_updates, "_apply_payloads", boom)
+    with pytest.raises(OperationalError):
+        apply_pending(["a1"])
+    assert json.loads(fake_redis.hget(PENDING_KEY, "a1")) == _payload("a1")
+    assert fake_redis.zscore(PENDING_TS_KEY, "a1") is not None
+
+
+def test_person_not_visible_stays_parked(fake_redis):
+    _park("a1")
+    assert apply_pending(["a1"]) == 0
+    assert fake_redis.hexists(PENDING_KEY, "a1")
+
+
+def test_newer_payload_parked_during_apply_is_kept(fake_redis, monkeypatch):
+    _park("a1", "+4915100000001")
+    pid = _person("a1")
+    apply = phone_updates._apply_payloads
+
+    def apply_then_newer_arrives(payloads, filtered=True):
+        applied = apply(payloads, filtered)
+        _park("a1", "+4915100000002")
+        return applied
+
+    monkeypatch.setattr(phone_updates, "_apply_payloads", apply_then_newer_arrives)
+    assert apply_pending(["a1"]) == 1
+    assert _phone(pid) == "+4915100000001"
+    stored = json.loads(fake_redis.hget(PENDING_KEY, "a1"))
+    assert stored["people"][0]["phone_numbers"][0]["sanitized_number"] == "+4915100000002"
+
+
+def test_sweep_applies_late_people_and_expires_orphans(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(settings, "pending_webhook_ttl", 600)
+    _park("late", age=60)
+    _park("orphan", age=3600)
+    _park("fresh")                                   # the enrichment task's to apply
+    pid = _person("late")
+
+    assert sweep_pending() == {"applied": 1, "expired": 1}
+    assert _phone(pid) == "+4915112345678"
+    assert {k.decode() for k in fake_redis.hkeys(PENDING_KEY)} == {"fresh"}
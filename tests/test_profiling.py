@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from app.core import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, settings, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "profile_sample_rate", 0.0)
+    profiling._recent.clear()
+    return tmp_path
+
+
+@pytest.fixture
+def api():
+    from fastapi.testclient import TestClient
+    import app.tasks  # noqa: F401  (registers the task signals before the API imports)
+    from app.main import app
+    return TestClient(app)
+
+
+def _runs(path) -> int:
+    return len(list(path.glob("*.json")))
+
+
+def test_header_ignored_unless_enabled_with_a_token(api, profile_dir, settings, monkeypatch):
+    api.get("/companies/999", headers={"X-Profile": "1"})
+    assert _runs(profile_dir) == 0
+
+    monkeypatch.setattr(settings, "profile_requests_enabled", True)
+    api.get("/companies/999", headers={"X-Profile": "1"})          # no token configured
+    assert _runs(profile_dir) == 0
+
+    monkeypatch.setattr(settings, "profile_token", "s3cret")
+    api.get("/companies/999", headers={"X-Profile": "wrong"})
+    assert _runs(profile_dir) == 0
+    api.get("/companies/999", headers={"X-Profile": "s3cret"})
+    assert _runs(profile_dir) == 1
+
+
+def test_profiles_per_minute_are_capped(settings, monkeypatch):
+    monkeypatch.setattr(settings, "profile_max_per_minute", 2)
+    started = []
+    for i in range(4):
+        with profiling.profiled("task", f"t{i}") as prof:
+            started.append(prof is not None)
+    assert started == [True, True, False, False]
+
+
+def test_only_the_newest_runs_are_kept(profile_dir, settings, monkeypatch):
+    monkeypatch.setattr(settings, "profile_keep", 2)
+    for i in range(4):
+        with profiling.profiled("task", f"t{i}"):
+            pass
+        for path in profile_dir.iterdir():          # mtimes one second apart
+            if f"-t{i}-" in path.name:
+                os.utime(path, (1_000_000 + i, 1_000_000 + i))
+    assert sorted(p.name.split("-")[1] for p in profile_dir.glob("*.json")) == ["t2", "t3"]
@@ -0,0 +1,79 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import refresh
+from app.core.celery_app import ENRICH_LOW_QUEUE, ENRICH_TASK
+from app.db.models import Company, CompanyPeople, Person
+from app.refresh import countdowns, reserve, schedule_refresh, tick_quota
+
+NOW = datetime(2026, 6, 1, 12)
+DAY = NOW.date()
+
+
+@pytest.fixture
+def tick(settings, monkeypatch):
+    monkeypatch.setattr(settings, "refresh_min_age_days", 30)
+    monkeypatch.setattr(settings, "refresh_tick_seconds", 900)
+    monkeypatch.setattr(settings, "refresh_daily_cap", 96 * 2)     # 2 per 15-minute tick
+    return settings
+
+
+def _company(db, name: str, age_days: float, employees: int = 0, people: int = 0,
+             enriched: bool = True) -> int:
+    company = Company(name=name, is_enriched=enriched, employee_count=employees,
+                      enriched_at=NOW - timedelta(days=age_days))
+    db.add(company)
+    db.flush()
+    for i in range(people):
+        person = Person(apollo_person_id=f"{name}-{i}")
+        db.add(person)
+        db.flush()
+        db.add(CompanyPeople(company_id=company.id, person_id=person.id))
+    return company.id
+
+
+def test_tick_quota_spreads_the_daily_cap():
+    assert tick_quota(500, 900) == 6
+    assert tick_quota(1, 900) == 1
+    assert tick_quota(0, 900) == 0
+
+
+def test_reserve_never_exceeds_the_cap():
+    granted = [reserve(3, 10, DAY) for _ in range(5)]
+    assert granted == [3, 3, 3, 1, 0]
+    refresh.release(2, DAY)
+    assert reserve(5, 10, DAY) == 2
+    assert reserve(5, 10, DAY + timedelta(days=1)) == 5              # a new day
+
+
+def test_big_old_accounts_rank_first_and_fresh_ones_wait(db):
+    small = _company(db, "small", 60)
+    big = _company(db, "big", 45, employees=5000, people=5)
+    _company(db, "fresh", 5, employees=5000)
+    _company(db, "never", 90, enriched=False)
+    db.commit()
+    assert [cid for _, cid, _, _ in refresh.candidates(NOW, 30, 100)] == [big, small]
+
+
+def test_a_tick_sends_its_share_to_enrich_low_and_claims_it(db, tick, broker):
+    for i in range(3):
+        _company(db, f"c{i}", 40 + i)
+    db.commit()
+
+    assert schedule_refresh(NOW) == {"granted": 2, "scheduled": 2, "candidates": 3}
+    sent = broker(ENRICH_LOW_QUEUE)
+    assert [(task, args[1:]) for task, args, _ in sent] == [
+        (ENRICH_TASK, ("c2", None)), (ENRICH_TASK, ("c1", None))]
+
+    # the next tick skips the claimed companies and hands back what it can't use
+    assert schedule_refresh(NOW)["scheduled"] == 1
+    assert [args[1] for _, args, _ in broker(ENRICH_LOW_QUEUE)] == ["c0"]
+    assert reserve(1000, tick.refresh_daily_cap, DAY) == tick.refresh_daily_cap - 3
+
+
+def test_countdowns_fill_the_window_one_per_slot():
+    offsets = countdowns(4, 100, random.Random(1))
+    assert all(i * 25 <= o <= (i + 1) * 25 for i, o in enumerate(offsets))
+    assert countdowns(0, 100) == []
@@ -0,0 +1,59 @@
+import pytest
+
+from app.db.models import Person, PersonDetails
+from app.db.session import SessionLocal
+from app.mapping import PERSON_DETAIL_COLUMNS
+from app.reprocess import reprocess
+
+STUB = {"id": "s1", "headline": "Stub headline", "departments": ["sales"], "email_status": "guessed"}
+MATCHED = {"id": "m1", "headline": "Matched headline", "twitter_url": "https://twitter.com/m1",
+           "departments": ["from-match"], "intent_strength": "high"}
+
+
+@pytest.fixture
+def people():
+    with SessionLocal() as db, db.begin():
+        stub = Person(id=1, apollo_person_id="s1", is_enriched=False)
+        matched = Person(id=2, apollo_person_id="m1", is_enriched=True)
+        db.add_all([stub, matched])
+        db.flush()
+        db.add(PersonDetails(person_id=1, raw_json=STUB))
+        # departments came from the search stub before the match
+        db.add(PersonDetails(person_id=2, raw_json=MATCHED, departments=["from-stub"]))
+
+
+def _details(person_id: int) -> PersonDetails:
+    with SessionLocal() as db:
+        return db.get(PersonDetails, person_id)
+
+
+def test_each_shape_is_mapped_like_enrich_company(people):
+    assert reprocess("person", workers=1) == 2
+
+    stub = _details(1)
+    assert (stub.headline, stub.departments, stub.email_status) == ("Stub headline", ["sales"], "guessed")
+
+    matched = _details(2)
+    assert matched.headline == "Matched headline"
+    assert matched.twitter_url == "https://twitter.com/m1"
+    assert matched.intent_strength == "high"
+    assert matched.departments == ["from-stub"]         # not an overlay column
+
+
+@pytest.mark.parametrize("column", ["twitter_url", "github_url", "facebook_url",
+                                    "extrapolated_email_confidence", "intent_strength",
+                                    "show_intent", "revealed_for_current_team"])
+def test_enriched_only_columns_are_accepted(people, column):
+    assert column in PERSON_DETAIL_COLUMNS
+    reprocess("person", workers=1, columns=(column,))
+
+
+def test_column_subset_only_touches_those_rows_and_columns(people):
+    assert reprocess("person", workers=1, columns=("twitter_url",)) == 1
+    assert _details(2).twitter_url == "https://twitter.com/m1"
+    assert _details(2).headline is None
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError, match="not derived from raw_json"):
+        reprocess("person", columns=("nonsense",))
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from app.apollo import resolver as resolver_module
+from app.apollo.resolver import DomainResolver, normalize_name
+from app.db.models import Company, CompanySearchResults, CompanySearchRun
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    fresh = DomainResolver()
+    monkeypatch.setattr(resolver_module, "_resolver", fresh)
+    monkeypatch.setattr(resolver_module, "_resolver_pid", resolver_module.os.getpid())
+    return fresh
+
+
+def _hit(db, name: str, domain: str) -> None:
+    run = CompanySearchRun(query_name=name, raw_json={})
+    db.add(run)
+    db.flush()
+    db.add(CompanySearchResults(run_id=run.id, apollo_org_id=f"org-{run.id}", name=name,
+                                primary_domain=domain, raw_json={}))
+
+
+@pytest.mark.parametrize("raw, norm", [
+    ("The ACME Corp., Inc.", "acme"),
+    ("Société Générale SA", "societe generale"),
+    ("Smith & Sons Holdings Pvt Ltd", "smith and sons"),
+    ("Holding", "holding"),                         # never stripped to nothing
+])
+def test_normalize_name(raw, norm):
+    assert normalize_name(raw) == norm
+
+
+def test_exact_fuzzy_and_ambiguous_names(resolver):
+    resolver._loaded_at = float("inf")              # no DB refresh
+    resolver.add("Acme Inc", "acme.com")
+    resolver.add("Globex", "globex.com")
+    resolver.add("Globex", "globex.io")
+
+    exact = resolver.resolve("ACME, Inc.")
+    assert (exact.domain, exact.confidence) == ("acme.com", 1.0)
+    fuzzy = resolver.resolve("Acme Industries")
+    assert fuzzy.domain == "acme.com" and 0 < fuzzy.confidence < 1
+    assert resolver.resolve("Globex").confidence == 0.5
+    assert resolver.resolve("Zzyzx") is None
+
+
+def test_refresh_reads_only_new_rows_and_trusts_enriched_names(db, resolver):
+    _hit(db, "Initech", "initech.net")
+    db.add(Company(name="Initech LLC", domain_resolved="initech.com", is_enriched=True,
+                   enriched_at=datetime(2026, 1, 1)))
+    db.commit()
+    resolver.refresh()
+    assert resolver.resolve("Initech").domain == "initech.com"          # 3 : 1
+
+    _hit(db, "Umbrella", "umbrella.com")
+    db.commit()
+    resolver.refresh()
+    assert resolver.resolve("Umbrella").domain == "umbrella.com"
+    assert sum(resolver._domains["initech"].values()) == 4              # not re-added
+
+
+def test_confident_local_match_skips_the_paid_search(db, resolver, apollo, settings, monkeypatch):
+    import app.tasks
+    monkeypatch.setattr(settings, "resolver_min_confidence", 0.9)
+    _hit(db, "Acme Corp", "acme.com")
+    db.commit()
+    apollo.http.route("/organizations/enrich", {"organization": {"id": "o1", "name": "Acme"}})
+    apollo.http.route("/mixed_people/search", {"people": [], "pagination": {"total_pages": 1}})
+
+    app.tasks.enrich_company.apply(args=("t1", "ACME Corp.", None)).get()
+    assert "/mixed_companies/search" not in apollo.http.paths()
+    assert apollo.http.calls[0][3]["params"]["domain"] == "acme.com"
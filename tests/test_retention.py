@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import retention
+from app.db.models import Company, CompanySearchResults, CompanySearchRun
+from app.db.session import SessionLocal
+from app.retention import month_start, run_retention
+
+TODAY = date(2026, 6, 15)
+
+
+class RecordingConn:
+    def __init__(self):
+        self.ddl: list[str] = []
+
+    def execute(self, stmt, params=None):
+        self.ddl.append(str(stmt))
+
+
+def _run(db, created_at: datetime, company_id: int | None = None, hits: int = 1) -> int:
+    run = CompanySearchRun(query_name="q", raw_json={}, created_at=created_at)
+    db.add(run)
+    db.flush()
+    for i in range(hits):
+        db.add(CompanySearchResults(run_id=run.id, apollo_org_id=f"o{run.id}-{i}", name="n",
+                                    raw_json={}, matched_at=created_at, company_id=company_id))
+    return run.id
+
+
+def test_month_start():
+    assert month_start(TODAY) == date(2026, 6, 1)
+    assert month_start(TODAY, -6) == date(2025, 12, 1)
+    assert month_start(date(2026, 12, 31), 1) == date(2027, 1, 1)
+
+
+def test_unused_hits_go_used_ones_stay(db, settings, monkeypatch):
+    monkeypatch.setattr(settings, "retention_batch_size", 2)
+    company = Company(name="Acme")
+    db.add(company)
+    db.flush()
+    old = datetime.utcnow() - timedelta(days=30)
+    _run(db, old, hits=5)
+    _run(db, old, company_id=company.id)
+    _run(db, datetime.utcnow(), hits=2)                     # too young
+    db.commit()
+
+    stats = run_retention()
+    assert stats["unused_hits_deleted"] == 5
+    with SessionLocal() as fresh:
+        left = fresh.scalars(select(CompanySearchResults.company_id)).all()
+    assert sorted(left, key=str) == [company.id, None, None]
+
+
+def test_runs_past_the_retention_window_are_deleted_in_batches(db, settings, monkeypatch):
+    monkeypatch.setattr(settings, "search_retention_months", 6)
+    monkeypatch.setattr(settings, "retention_batch_size", 2)
+    company = Company(name="Acme")
+    db.add(company)
+    db.flush()
+    for _ in range(3):
+        _run(db, datetime(2025, 11, 30), company_id=company.id)
+    kept = _run(db, datetime(2025, 12, 1), company_id=company.id)
+    db.commit()
+
+    assert run_retention(TODAY)["expired_runs_deleted"] == 3
+    with SessionLocal() as fresh:
+        assert fresh.scalars(select(CompanySearchRun.id)).all() == [kept]
+        assert fresh.scalars(select(CompanySearchResults.run_id)).all() == [kept]
+
+
+def test_partition_maintenance(monkeypatch):
+    names = ["p202510", "p202511", "p202512", "p202606", "pmax"]
+    monkeypatch.setattr(retention, "_partitions", lambda conn, table: names)
+    conn = RecordingConn()
+    assert retention.drop_expired_partitions(conn, "t", date(2025, 12, 1), limit=1) == ["p202510"]
+    assert retention.drop_expired_partitions(conn, "t", date(2025, 12, 1), limit=5) == ["p202510", "p202511"]
+
+    conn = RecordingConn()
+    retention.ensure_future_partitions(conn, "t", TODAY, months_ahead=2)
+    assert [d.split("PARTITION ")[2].split(" ")[0] for d in conn.ddl] == ["p202607", "p202608"]
+    assert "VALUES LESS THAN ('2026-08-01')" in conn.ddl[0]
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api import segments
+from app.db.models import Company, CompanyPeople, OrganizationDetails, Person
+from app.terms import sync_company_terms
+
+
+@pytest.fixture
+def api():
+    from fastapi.testclient import TestClient
+    import app.tasks  # noqa: F401  (registers the task signals before the API imports)
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def companies(db):
+    def company(name, employees, country, founded=None, techs=(), people=()):
+        comp = Company(name=name, employee_count=employees, location_country=country)
+        db.add(comp)
+        db.flush()
+        db.add(OrganizationDetails(company_id=comp.id, founded_year=founded))
+        sync_company_terms(db, comp.id, {"technology_names": list(techs)})
+        for i, (seniority, phone) in enumerate(people):
+            person = Person(apollo_person_id=f"{name}-{i}", seniority=seniority, personal_phone=phone,
+                            phone_verification_status="verified" if phone else None)
+            db.add(person)
+            db.flush()
+            db.add(CompanyPeople(company_id=comp.id, person_id=person.id))
+        return comp.id
+
+    ids = {
+        "acme":    company("acme", 500, "DE", 1990, ["Salesforce", "HubSpot"], [("vp", None), ("c_suite", "+4915112345678")]),
+        "globex":  company("globex", 50, "DE", 2015, ["Salesforce"], [("vp", "+4915100000001")]),
+        "initech": company("initech", 5000, "US", 2001, [], [("c_suite", None)]),
+    }
+    db.commit()
+    return ids
+
+
+def _names(resp) -> list[str]:
+    assert resp.status_code == 200, resp.text
+    return [c["name"] for c in resp.json()["companies"]]
+
+
+def test_firmographic_filters(api, companies):
+    assert _names(api.get("/segments/companies", params={"country": "DE"})) == ["acme", "globex"]
+    assert _names(api.get("/segments/companies", params={"employees_min": 100})) == ["acme", "initech"]
+    assert _names(api.get("/segments/companies", params={"founded_min": 2000, "country": "DE"})) == ["globex"]
+    assert _names(api.get("/segments/companies", params={"term": "technology:hubspot"})) == ["acme"]
+    assert _names(api.get("/segments/companies", params={"term": "technology:unknown"})) == []
+
+
+def test_one_person_has_to_match_every_person_filter(api, companies):
+    params = {"seniority": "vp", "has_verified_phone": "true"}
+    assert _names(api.get("/segments/companies", params=params)) == ["globex"]
+    assert _names(api.get("/segments/companies", params={"has_verified_phone": "false"})) == ["initech"]
+
+
+def test_keyset_pages(api, companies):
+    first = api.get("/segments/companies", params={"limit": 2}).json()
+    assert [c["name"] for c in first["companies"]] == ["acme", "globex"]
+    rest = api.get("/segments/companies", params={"limit": 2, "after": first["next_after"]}).json()
+    assert [c["name"] for c in rest["companies"]] == ["initech"] and rest["next_after"] is None
+
+
+def test_terms_endpoint_and_bad_terms(api, companies):
+    assert _names(api.get("/segments/terms", params={"any": ["technology:hubspot", "technology:salesforce"]})) == ["acme", "globex"]
+    assert api.get("/segments/terms/technology", params={"prefix": "Sales"}).json() == ["salesforce"]
+    assert api.get("/segments/terms/colour").status_code == 404
+    assert api.get("/segments/terms", params={"all": "salesforce"}).status_code == 422
+    assert api.get("/segments/terms").status_code == 422
+
+
+def test_time_budget_maps_to_504(api, companies, monkeypatch):
+    class Timeout(Exception):
+        args = (segments.MYSQL_QUERY_TIMEOUT, "Query execution was interrupted")
+
+    def slow(stmt):
+        raise OperationalError("SELECT", {}, Timeout())
+
+    monkeypatch.setattr(segments, "_with_budget", slow)
+    assert api.get("/segments/companies").status_code == 504
+
+
+def test_budget_hint_is_mysql_only(settings, monkeypatch):
+    from sqlalchemy import select
+    from sqlalchemy.dialects import mysql, sqlite
+
+    monkeypatch.setattr(settings, "segment_query_timeout_ms", 1500)
+    stmt = segments._with_budget(select(Company.id))
+    assert "/*+ MAX_EXECUTION_TIME(1500) */" in str(stmt.compile(dialect=mysql.dialect()))
+    assert "MAX_EXECUTION_TIME" not in str(stmt.compile(dialect=sqlite.dialect()))
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from app import selection
+from app.selection import Candidate, Weights, choose, dedupe, parse_weights, score
+
+WEIGHTS = Weights(
+    seniority=parse_weights("c_suite=5, vp=3,director"),
+    title=parse_weights("sales=2,marketing=1"),
+    department=parse_weights("sales=1"),
+)
+NOW = datetime(2026, 1, 1)
+FRESH_AFTER = NOW - timedelta(days=90)
+
+
+def _cand(apollo_id: str, score: float, order: int, enriched_at=None, matched_as=None) -> Candidate:
+    return Candidate(apollo_id, order, score, order, enriched_at, matched_as)
+
+
+def test_weights_and_scores():
+    assert WEIGHTS.seniority == {"c_suite": 5.0, "vp": 3.0, "director": 1.0}
+    stub = {"seniority": "VP", "title": "VP Sales & Marketing", "departments": ["Sales", "hr"]}
+    assert score(stub, WEIGHTS) == 3 + 2 + 1
+    assert score({}, WEIGHTS) == 0
+    assert selection.search_filters(WEIGHTS) == (["c_suite", "vp", "director"], ["sales", "marketing"])
+
+
+def test_people_and_contacts_are_deduped_across_pages():
+    seen: set[str] = set()
+    page1 = dedupe([{"id": "a"}, {"person_id": "b", "id": "contact-1"}, {"id": "a"}], seen)
+    page2 = dedupe([{"id": "b"}, {"id": "c"}, {}], seen)
+    assert [selection.stub_id(s) for s in page1 + page2] == ["a", "b", "c", None]
+
+
+def test_choose_ranks_by_score_and_skips_recent_matches(settings, monkeypatch):
+    monkeypatch.setattr(settings, "people_match_top_n", 2)
+    cands = [
+        _cand("low", 1, 0),
+        _cand("fresh", 9, 1, enriched_at=NOW - timedelta(days=10), matched_as="fresh"),
+        _cand("stale", 2, 2, enriched_at=NOW - timedelta(days=200), matched_as="stale"),
+        _cand("moved", 9, 3, enriched_at=NOW - timedelta(days=200), matched_as="old-id"),
+        _cand("tie", 2, 4),
+    ]
+    chosen, skipped = choose(cands, FRESH_AFTER)
+    # fresh: matched lately; moved: matched under its earlier Apollo id
+    assert skipped == 2
+    assert [c.apollo_id for c in chosen] == ["stale", "tie"]
+
+
+def test_fresh_after_uses_the_setting(settings, monkeypatch):
+    monkeypatch.setattr(settings, "people_match_fresh_days", 30)
+    assert selection.fresh_after(NOW) == NOW - timedelta(days=30)
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import select, update
+
+from app.db import session as db_session
+from app.db.models import Person
+from app.db.session import SessionLocal, get_engine, reset_pin
+
+
+@pytest.fixture
+def replica(tmp_path, settings, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(settings, "mysql_replica_uris", url)
+    monkeypatch.setattr(settings, "replica_check_seconds", 0)
+    yield url
+    db_session.dispose_engine()
+
+
+def _on_replica(db) -> bool:
+    return db.get_bind(clause=select(Person)) is not get_engine()
+
+
+def test_plain_reads_use_the_replica_and_writes_the_primary(replica):
+    with SessionLocal() as db:
+        assert str(db.get_bind(clause=select(Person)).url) == replica
+        assert db.get_bind(clause=update(Person).values(title="x")) is get_engine()
+        assert not _on_replica(db)                  # a session that wrote stays put
+    with SessionLocal() as db, db.begin():
+        assert not _on_replica(db)                  # read-modify-write
+    with SessionLocal(primary=True) as db:
+        assert not _on_replica(db)
+
+
+def test_a_write_pins_the_rest_of_the_task(replica):
+    with SessionLocal() as db:
+        assert _on_replica(db)
+    with SessionLocal() as db, db.begin():
+        db.add(Person(apollo_person_id="a1"))
+    with SessionLocal() as db:
+        assert not _on_replica(db)                  # read-your-writes
+        assert db.scalar(select(Person.apollo_person_id)) == "a1"
+    with SessionLocal(bulk_read=True) as db:
+        assert _on_replica(db)
+    reset_pin()                                     # next task
+    with SessionLocal() as db:
+        assert _on_replica(db)
+
+
+@pytest.mark.parametrize("lag, used", [(0.0, True), (5.0, False), (None, False)])
+def test_lagging_or_stopped_replicas_are_skipped(replica, settings, monkeypatch, lag, used):
+    monkeypatch.setattr(settings, "replica_max_lag_seconds", 2)
+    monkeypatch.setattr(db_session, "replica_lag", lambda engine: lag)
+    with SessionLocal() as db:
+        assert _on_replica(db) is used
+
+
+def test_lag_is_checked_once_per_interval(replica, settings, monkeypatch):
+    monkeypatch.setattr(settings, "replica_check_seconds", 3600)
+    checks = []
+    monkeypatch.setattr(db_session, "replica_lag", lambda engine: checks.append(1) or 0.0)
+    for _ in range(3):
+        with SessionLocal() as db:
+            assert _on_replica(db)
+    assert len(checks) == 1
+
+
+def test_unreachable_replica_falls_back_to_the_primary(replica, monkeypatch):
+    def down(engine):
+        raise ConnectionError("replica down")
+
+    monkeypatch.setattr(db_session, "replica_lag", down)
+    with SessionLocal() as db:
+        assert not _on_replica(db)
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.models import Company, CompanyTerm
+from app.db.session import SessionLocal
+from app.terms import match_companies, parse_term, sync_company_terms
+
+SF, HS, SAAS = ("technology", "salesforce"), ("technology", "hubspot"), ("keyword", "saas")
+
+
+def _company(db, **columns) -> int:
+    company = Company(name="c")
+    db.add(company)
+    db.flush()
+    sync_company_terms(db, company.id, columns)
+    return company.id
+
+
+@pytest.fixture
+def companies(db):
+    ids = {
+        "both":  _company(db, technology_names=["Salesforce", "HubSpot"], keywords=["SaaS"]),
+        "sf":    _company(db, technology_names=[" salesforce "]),
+        "hs":    _company(db, technology_names=["HUBSPOT"], keywords=["SaaS"]),
+        "none":  _company(db, industries=["retail"]),
+    }
+    db.commit()
+    return ids
+
+
+def test_all_of_requires_every_term(db, companies):
+    assert match_companies(db, all_of=[SF, HS]) == [companies["both"]]
+    assert match_companies(db, all_of=[SF]) == [companies["both"], companies["sf"]]
+
+
+def test_any_of_and_the_combination(db, companies):
+    assert match_companies(db, any_of=[SF, HS]) == [companies["both"], companies["sf"], companies["hs"]]
+    assert match_companies(db, all_of=[SAAS], any_of=[SF]) == [companies["both"]]
+
+
+def test_unknown_terms_match_nothing(db, companies):
+    assert match_companies(db, all_of=[SF, ("technology", "nope")]) == []
+    assert match_companies(db, any_of=[("technology", "nope")]) == []
+    with pytest.raises(ValueError):
+        match_companies(db)
+
+
+def test_keyset_pages(db, companies):
+    first = match_companies(db, any_of=[SF, HS], limit=2)
+    rest = match_companies(db, any_of=[SF, HS], after_id=first[-1], limit=2)
+    assert first + rest == [companies["both"], companies["sf"], companies["hs"]]
+
+
+def test_resync_drops_stale_postings(db, companies):
+    sync_company_terms(db, companies["both"], {"technology_names": ["Salesforce"]})
+    db.commit()
+    assert match_companies(db, all_of=[HS]) == [companies["hs"]]
+    assert len(db.scalars(select(CompanyTerm).where(CompanyTerm.company_id == companies["both"])).all()) == 1
+
+
+def test_parse_term():
+    assert parse_term("Technology:  Sales   Force ") == ("technology", "sales force")
+    for bad in ("salesforce", "color:red", "keyword: "):
+        with pytest.raises(ValueError):
+            parse_term(bad)
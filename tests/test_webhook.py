@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api import webhook
+from app.db.models import Person
+from app.db.session import SessionLocal
+from app.phone_updates import PENDING_KEY
+
+
+@pytest.fixture
+def api():
+    from fastapi.testclient import TestClient
+    import app.tasks  # noqa: F401  (registers the task signals before the API imports)
+    from app.main import app
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Person ids the webhook wrote a phone for, in order."""
+    calls = []
+    real = webhook.apply_phone_update
+
+    def record(db, person, upd):
+        calls.append(person.id)
+        return real(db, person, upd)
+
+    monkeypatch.setattr(webhook, "apply_phone_update", record)
+    return calls
+
+
+def _body(apollo_id: str, number: str = "+4915112345678") -> bytes:
+    return json.dumps({"people": [{"id": apollo_id, "status": "verified",
+                                   "phone_numbers": [{"sanitized_number": number}]}]}).encode()
+
+
+def _post(api, body: bytes):
+    return api.post("/webhook/apollo_phone", content=body,
+                    headers={"Content-Type": "application/json"})
+
+
+def _person(apollo_id: str) -> int:
+    with SessionLocal() as db, db.begin():
+        person = Person(apollo_person_id=apollo_id)
+        db.add(person)
+        db.flush()
+        return person.id
+
+
+def test_duplicate_is_answered_with_the_first_ack(api, applied):
+    pid = _person("a1")
+    first = _post(api, _body("a1"))
+    again = _post(api, _body("a1"))
+    assert first.status_code == again.status_code == 200
+    assert again.json() == first.json() == {
+        "status": "ok", "person_id": "a1", "personal_phone": "+4915112345678"}
+    assert applied == [pid]
+
+
+def test_different_bodies_are_processed_separately(api, applied):
+    pid = _person("a1")
+    _post(api, _body("a1", "+4915100000001"))
+    _post(api, _body("a1", "+4915100000002"))
+    assert applied == [pid, pid]
+
+
+def test_duplicate_of_a_parked_webhook_stays_202(api, fake_redis):
+    first = _post(api, _body("later"))
+    again = _post(api, _body("later"))
+    assert first.status_code == again.status_code == 202
+    assert again.json() == first.json()
+    assert fake_redis.hexists(PENDING_KEY, "later")
+
+
+def test_delivery_in_flight_is_not_processed_twice(api, applied, fake_redis):
+    _person("a1")
+    fake_redis.set(webhook._dedupe_key(_body("a1")), webhook._PENDING)
+    resp = _post(api, _body("a1"))
+    assert resp.json() == {"status": "duplicate", "detail": "already processing"}
+    assert applied == []
+
+
+def test_failed_delivery_lets_the_retry_through(api, applied, monkeypatch):
+    pid = _person("a1")
+    real = webhook.find_person
+
+    def down_once(db, apollo_id):
+        monkeypatch.setattr(webhook, "find_person", real)
+        raise OperationalError("SELECT", {}, Exception("lost connection"))
+
+    monkeypatch.setattr(webhook, "find_person", down_once)
+    assert _post(api, _body("a1")).status_code == 500
+    assert _post(api, _body("a1")).json()["status"] == "ok"
+    assert applied == [pid]